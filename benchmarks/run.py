@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import as_data, generate_portfolio, write_workbook
+from src.compute_engine import compute_daily_report
+from src.data_loader import load_data
+from src.monthly_performance import compute_monthly_calendar
+from src.pnl import compute_pnl
+from src.utils import compute_kpi_table
+
+HISTORY_PATH = "data/.cache/benchmark_history.json"
+# Au-delà, l'écriture / lecture du classeur Excel domine tout le reste : load_data n'est pas mesuré
+MAX_CELLULES_CLASSEUR = 2_000_000
+# Imports mesurés dans un interpréteur neuf : coût payé par le premier rendu d'un processus Streamlit
+MODULES_IMPORT = {
+    "démarrage (src.startup)": "src.startup",
+    "moteur (src.results)": "src.results",
+    "graphiques (src.plots)": "src.plots",
+    "adaptateur Streamlit": "src.st_adapter",
+    "plotly.graph_objects": "plotly.graph_objects",
+}
+
+
+def _mesurer(fonction, repetitions):
+    # Temps min / médian sur `repetitions` appels, puis pic mémoire (tracemalloc) sur un appel dédié
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    tracemalloc.start()
+    try:
+        fonction()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "secondes_min": min(durees),
+        "secondes_median": statistics.median(durees),
+        "memoire_pic_mo": pic / 2 ** 20,
+    }
+
+
+def _preparer(report, benchmark):
+    # Mêmes colonnes dérivées que src.results pour les pages
+    report = report.sort_values("Date").reset_index(drop=True)
+    report["Mois"] = report["Date"].dt.to_period("M")
+    benchmark = benchmark.sort_values("Date").reset_index(drop=True)
+    benchmark["Mois"] = benchmark["Date"].dt.to_period("M")
+    return report, benchmark
+
+
+def run_config(n_tickers, annees, n_transactions=None, repetitions=3, seed=0, max_cellules=MAX_CELLULES_CLASSEUR):
+    sheets = generate_portfolio(n_tickers, annees, n_transactions, seed=seed)
+    config = {
+        "tickers": n_tickers,
+        "annees": annees,
+        "jours": len(sheets["Jour_Marche"]),
+        "transactions": len(sheets["Transactions"]),
+    }
+    resultats = {}
+
+    with tempfile.TemporaryDirectory() as dossier:
+        if n_tickers * config["jours"] <= max_cellules:
+            chemin = write_workbook(sheets, os.path.join(dossier, "synthetique.xlsx"))
+            # À froid : cache Parquet vide à chaque appel, le classeur est relu
+            resultats["load_data (Excel)"] = _mesurer(
+                lambda: load_data(chemin, cache_dir=tempfile.mkdtemp(dir=dossier)), repetitions)
+            cache_dir = os.path.join(dossier, "cache")
+            load_data(chemin, cache_dir=cache_dir)
+            resultats["load_data (cache)"] = _mesurer(lambda: load_data(chemin, cache_dir=cache_dir), repetitions)
+
+    data = as_data(sheets)
+    calcul = dict(transactions=data["transactions"], prices=data["prices"], jours_marche=data["jours_marche"],
+                  capital_initial=100_000, taux_cash=0.03)
+    resultats["compute_daily_report"] = _mesurer(lambda: compute_daily_report(**calcul), repetitions)
+
+    report, benchmark = _preparer(compute_daily_report(**calcul), data["benchmark"])
+    resultats["calendrier mensuel"] = _mesurer(lambda: compute_monthly_calendar(report, benchmark), repetitions)
+    resultats["kpis"] = _mesurer(lambda: compute_kpi_table(report, benchmark), repetitions)
+
+    prix = data["prices"].resolve(report["Date"], data["transactions"]["Ticker"].unique())
+    for methode in ("pmp", "fifo"):
+        resultats[f"P&L ({methode})"] = _mesurer(lambda: compute_pnl(data["transactions"], prix, methode), repetitions)
+    return {"config": config, "resultats": resultats}
+
+
+def _duree_import(module):
+    code = ("import time; debut = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - debut)")
+    sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(sortie.stdout.strip().splitlines()[-1])
+
+
+def mesurer_imports(repetitions=3, modules=None):
+    # Temps d'import à froid (min / médian sur `repetitions` interpréteurs neufs) de chaque module
+    resultats = {}
+    for libelle, module in (modules or MODULES_IMPORT).items():
+        durees = [_duree_import(module) for _ in range(repetitions)]
+        resultats[libelle] = {"secondes_min": min(durees), "secondes_median": statistics.median(durees)}
+    return resultats
+
+
+def _commit():
+    try:
+        sortie = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return sortie.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _cle(config):
+    return config["tickers"], config["annees"], config["transactions"]
+
+
+def _lire_historique(chemin):
+    try:
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _ecrire_historique(chemin, historique):
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    tmp_path = f"{chemin}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(historique, f, indent=1)
+    os.replace(tmp_path, chemin)
+
+
+def _precedent(historique, config, etape):
+    # Dernière mesure de la même étape sur la même configuration
+    for execution in reversed(historique):
+        for mesure in execution["mesures"]:
+            if _cle(mesure["config"]) == _cle(config) and etape in mesure["resultats"]:
+                return execution.get("commit"), mesure["resultats"][etape]
+    return None, None
+
+
+def _afficher_imports(imports, historique):
+    precedent = next((execution for execution in reversed(historique) if execution.get("imports")), None)
+    print("\nImports à froid (interpréteur neuf)")
+    for libelle, resultat in imports.items():
+        ligne = (f"  {libelle:<26} {resultat['secondes_min'] * 1000:>10.1f} ms (médiane "
+                 f"{resultat['secondes_median'] * 1000:.1f})")
+        ancien = precedent["imports"].get(libelle) if precedent else None
+        if ancien and ancien["secondes_min"] > 0:
+            ecart = resultat["secondes_min"] / ancien["secondes_min"] - 1
+            ligne += f"  {ecart:+.0%} vs {precedent.get('commit') or 'précédent'}"
+        print(ligne)
+
+
+def _afficher(mesures, historique):
+    for mesure in mesures:
+        config = mesure["config"]
+        print(f"\n{config['tickers']} tickers x {config['jours']} jours, {config['transactions']} transactions")
+        for etape, resultat in mesure["resultats"].items():
+            ligne = (f"  {etape:<22} {resultat['secondes_min'] * 1000:>10.1f} ms (médiane "
+                     f"{resultat['secondes_median'] * 1000:.1f})  pic {resultat['memoire_pic_mo']:>8.1f} Mo")
+            commit, precedent = _precedent(historique, config, etape)
+            if precedent and precedent["secondes_min"] > 0:
+                ecart = resultat["secondes_min"] / precedent["secondes_min"] - 1
+                ligne += f"  {ecart:+.0%} vs {commit or 'précédent'}"
+            print(ligne)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques sur portefeuilles synthétiques.")
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 100, 1000], help="nombre de titres (10 à 5000)")
+    parser.add_argument("--annees", type=float, nargs="+", default=[1, 5], help="profondeur d'historique (1 à 20)")
+    parser.add_argument("--transactions", type=int, default=None, help="nombre de transactions (défaut : 3 par titre)")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-cellules", type=int, default=MAX_CELLULES_CLASSEUR,
+                        help="taille maximale (titres x jours) du classeur pour mesurer load_data")
+    parser.add_argument("--sans-imports", action="store_true", help="ne mesure pas les temps d'import")
+    parser.add_argument("--historique", default=HISTORY_PATH, help="fichier JSON d'historique des mesures")
+    parser.add_argument("--sans-historique", action="store_true", help="n'enregistre pas cette exécution")
+    args = parser.parse_args(argv)
+
+    mesures = [
+        run_config(n_tickers, annees, args.transactions, args.repetitions, args.seed, args.max_cellules)
+        for n_tickers in args.tickers
+        for annees in args.annees
+    ]
+
+    imports = {} if args.sans_imports else mesurer_imports(args.repetitions)
+
+    historique = _lire_historique(args.historique)
+    _afficher(mesures, historique)
+    if imports:
+        _afficher_imports(imports, historique)
+    if not args.sans_historique:
+        historique.append({
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repetitions": args.repetitions,
+            "seed": args.seed,
+            "mesures": mesures,
+            "imports": imports,
+        })
+        _ecrire_historique(args.historique, historique)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
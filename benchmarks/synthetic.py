@@ -0,0 +1,102 @@
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from src.price_store import PriceStore
+
+SECTEURS_GICS = [
+    "Communication Services", "Consumer Discretionary", "Consumer Staples", "Energy", "Health Care",
+    "Industrials", "Information Technology", "Materials", "Utilities", "Real Estate", "Financials",
+]
+# Répartition des opérations générées après la constitution du portefeuille
+PROBA_OPERATIONS = {"Achat": 0.5, "Vente": 0.4, "Short": 0.06, "Rachat": 0.04}
+FRAIS = 10
+DEBUT = "2005-01-03"
+
+
+def _tickers(n_tickers):
+    return [f"SYNTHETIC {i:04d} INC. (XNYS:S{i:04d})" for i in range(n_tickers)]
+
+
+def _trajectoires(rng, n_jours, n_series, prix_initial, vol_annuelle=0.25):
+    # Mouvement brownien géométrique journalier, arrondi au centime
+    rendements = rng.normal(0.07 / 252, vol_annuelle / np.sqrt(252), size=(n_jours, n_series))
+    rendements[0] = 0.0
+    return np.round(prix_initial * np.exp(np.cumsum(rendements, axis=0)), 2)
+
+
+def generate_portfolio(n_tickers=80, annees=1.0, n_transactions=None, seed=0):
+    # Feuilles synthétiques au schéma de data.xlsx : Transactions, Benchmark, Prix_Titres, Jour_Marche.
+    # Le portefeuille achète chaque titre le premier jour puis enchaîne des opérations aléatoires.
+    rng = np.random.default_rng(seed)
+    n_jours = max(int(round(252 * annees)), 1)
+    dates = pd.bdate_range(DEBUT, periods=n_jours)
+    tickers = _tickers(n_tickers)
+    n_transactions = n_transactions or 3 * n_tickers
+
+    prix = _trajectoires(rng, n_jours, n_tickers, rng.uniform(10, 500, size=n_tickers))
+    benchmark = _trajectoires(rng, n_jours, 1, 5000.0, vol_annuelle=0.15)[:, 0]
+
+    # Constitution (un achat par titre au premier jour) puis opérations réparties sur la période
+    n_suivantes = max(n_transactions - n_tickers, 0)
+    i_date = np.concatenate([np.zeros(n_tickers, dtype=int), rng.integers(0, n_jours, size=n_suivantes)])
+    i_ticker = np.concatenate([np.arange(n_tickers), rng.integers(0, n_tickers, size=n_suivantes)])
+    types = np.concatenate([
+        np.full(n_tickers, "Achat"),
+        rng.choice(list(PROBA_OPERATIONS), size=n_suivantes, p=list(PROBA_OPERATIONS.values())),
+    ])
+    ordre = np.argsort(i_date, kind="stable")
+    i_date, i_ticker, types = i_date[ordre], i_ticker[ordre], types[ordre]
+
+    nb_actions = rng.integers(1, 100, size=len(types))
+    prix_unitaire = prix[i_date, i_ticker]
+    entree = np.isin(types, ["Achat", "Rachat"])
+    # Même formule que la colonne calculée du classeur
+    montant = np.where(entree, -(nb_actions * prix_unitaire + FRAIS), nb_actions * prix_unitaire - FRAIS)
+
+    noms = np.array([ticker.split(" (")[0] for ticker in tickers])
+    transactions = pd.DataFrame({
+        "Date": dates[i_date],
+        "Type": types.astype(object),
+        "Ticker": np.array(tickers, dtype=object)[i_ticker],
+        "Nom": noms[i_ticker],
+        "ISIN": [f"US{k:010d}" for k in i_ticker],
+        "GICS Class": np.array(SECTEURS_GICS, dtype=object)[i_ticker % len(SECTEURS_GICS)],
+        "Nb actions": nb_actions,
+        "Prix local unitaire": prix_unitaire,
+        "Devise": "USD",
+        "Frais": FRAIS,
+        "Montant total": np.round(montant, 2),
+    })
+
+    return {
+        "Transactions": transactions,
+        "Benchmark": pd.DataFrame({"Date": dates, "Prix": benchmark}),
+        "Prix_Titres": pd.concat([pd.DataFrame({"Date": dates}), pd.DataFrame(prix, columns=tickers)], axis=1),
+        "Jour_Marche": pd.DataFrame({"Date": dates}),
+    }
+
+
+def write_workbook(sheets, filepath):
+    # Classeur .xlsx écrit en flux (mode write_only), lisible par src.data_loader.load_data
+    workbook = openpyxl.Workbook(write_only=True)
+    for nom, df in sheets.items():
+        feuille = workbook.create_sheet(nom)
+        feuille.append(list(df.columns))
+        # Timestamps (sous-classe de datetime) et scalaires Python natifs
+        for ligne in zip(*(df[col].tolist() for col in df.columns)):
+            feuille.append(ligne)
+    workbook.save(filepath)
+    return filepath
+
+
+def as_data(sheets, prices_dtype="float64"):
+    # Équivalent en mémoire de load_data (sans passage par le classeur)
+    return {
+        "transactions": sheets["Transactions"].astype({"Ticker": "category"}),
+        "benchmark": sheets["Benchmark"],
+        "prices": PriceStore.from_wide(sheets["Prix_Titres"], dtype=prices_dtype),
+        "jours_marche": sheets["Jour_Marche"],
+        "timings": {},
+        "version": None,
+    }
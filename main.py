@@ -1,7 +1,12 @@
 import streamlit as st
+from src.startup import start_warm_up
 
 st.set_page_config(page_title="Accueil - SBR US BALANCED Power", layout="wide")
 
+# Préchauffage des caches (données, résultats, VaR...) pendant la lecture de l'accueil ;
+# sans effet s'il a déjà été lancé au démarrage du serveur (python -m src.startup)
+start_warm_up()
+
 # --- Logo ou image d'en-tête ---
 st.image("images/sbr_fund_banner.png", use_container_width=True)
 
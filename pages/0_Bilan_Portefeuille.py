@@ -1,129 +1,141 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-import plotly.express as px
-from src.data_loader import load_data
-from src.compute_engine import compute_daily_report
-
+from src.plots import cached_figure, line_chart
+from src.profiling import stage
+from src.risk import var_table
+from src.st_adapter import load_results, profiling_panel, profiling_start
+from src.rolling import INDICATEURS_ROULANTS
+from src.utils import FENETRE_CREATION
+
+profiling_start("Bilan")
 st.title("📘 Bilan Global du Portefeuille")
 
 # --- Chargement des données ---
-data = load_data()
-report = compute_daily_report(
-    transactions=data["transactions"],
-    prices=data["prices"],
-    jours_marche=data["jours_marche"],
-    capital_initial=100_000,
-    taux_cash=0.03
-)
-
-rf_annual = 0.0475
-rf_daily = rf_annual/252
+data, results = load_results(capital_initial=100_000, taux_cash=0.03)
+report = results.report
+
 # --- Préparation des données (depuis 16 janvier 2024) ---
-report = report.sort_values("Date")
 vl_series = report[["Date", "Valeur Liquidative"]].copy()
-vl_series["Rendement_Ptf"] = vl_series["Valeur Liquidative"].pct_change()
-
-benchmark = data["benchmark"].copy()
-benchmark = benchmark.sort_values("Date")
-benchmark["Rendement_Benchmark"] = benchmark["Prix"].pct_change()
-
-# --- Fusion des rendements ---
-merged = pd.merge(
-    vl_series[["Date", "Rendement_Ptf"]],
-    benchmark[["Date", "Rendement_Benchmark"]],
-    on="Date",
-    how="inner"
-).dropna()
-
-# --- Calcul des KPIs ---
-perf_ptf = vl_series["Valeur Liquidative"].iloc[-1] / vl_series["Valeur Liquidative"].iloc[0] - 1
-perf_bench = benchmark["Prix"].iloc[-1] / benchmark["Prix"].iloc[0] - 1
-
-vol_ptf = merged["Rendement_Ptf"].std() * np.sqrt(252)
-vol_bench = merged["Rendement_Benchmark"].std() * np.sqrt(252)
-
-# --- Taux sans risque ---
-rf_annual = 0.0475
-rf_daily = rf_annual / 252
-
-# --- Rendement & volatilité du portefeuille ---
-mean_return_ptf_daily = merged["Rendement_Ptf"].mean()
-std_return_ptf_daily = merged["Rendement_Ptf"].std()
-vol_ptf = std_return_ptf_daily * np.sqrt(252)
-
-
-perf_annualise = (1+perf_ptf)**(252/303)-1
-# --- Sharpe Ratio (annualisé avec taux sans risque) ---
-sharpe_ptf = (perf_annualise - rf_annual) / (vol_ptf)
-
-# Sortino
-downside = merged["Rendement_Ptf"][merged["Rendement_Ptf"] < 0]
-downside_risk = downside.std() * np.sqrt(252)
-sortino = (perf_annualise - rf_annual)/ downside_risk if downside_risk != 0 else np.nan
-
-# Treynor & Beta & R²
-X = merged["Rendement_Benchmark"].values.reshape(-1, 1)
-y = merged["Rendement_Ptf"].values
-reg = LinearRegression().fit(X, y)
-beta = reg.coef_[0]
-r_squared = reg.score(X, y)
-treynor = (perf_annualise - rf_annual )/ beta 
-
-# Corrélation
-correlation = merged["Rendement_Ptf"].corr(merged["Rendement_Benchmark"])
-
-# Tracking Error + Info Ratio
-tracking_error = (merged["Rendement_Ptf"] - merged["Rendement_Benchmark"]).std() * np.sqrt(252)
-info_ratio = (perf_ptf - perf_bench) / tracking_error if tracking_error != 0 else np.nan
-
-# Max Drawdown
-rolling_max = vl_series["Valeur Liquidative"].cummax()
-drawdowns = vl_series["Valeur Liquidative"] / rolling_max - 1
-max_drawdown = drawdowns.min()
+benchmark = results.benchmark.copy()
+
+# --- KPIs depuis la création (table calculée une fois par version des données) ---
+kpis = results.kpis.loc[FENETRE_CREATION]
+perf_ptf = kpis["Perf_Ptf"]
+perf_bench = kpis["Perf_Bench"]
+vol_ptf = kpis["Vol_Ptf"]
+vol_bench = kpis["Vol_Bench"]
+sharpe_ptf = kpis["Sharpe"]
+sortino = kpis["Sortino"]
+beta = kpis["Beta"]
+r_squared = kpis["R2"]
+treynor = kpis["Treynor"]
+correlation = kpis["Correlation"]
+tracking_error = kpis["Tracking_Error"]
+info_ratio = kpis["Info_Ratio"]
+max_drawdown = kpis["Max_Drawdown"]
 
 # --- Affichage métriques compact ---
 def custom_metric(label, value):
     return f"<div style='font-size:13px; line-height:1.4'><b>{label}</b><br><span style='font-size:15px'>{value}</span></div>"
 
-st.markdown("### 📊 Indicateurs de Performance Depuis le 16 janvier 2024")
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown(custom_metric("Perf. Portefeuille", f"{perf_ptf:.2%}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Volatilité Ptf", f"{vol_ptf:.2%}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Sharpe", f"{sharpe_ptf:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Sortino", f"{sortino:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Max Drawdown", f"{max_drawdown:.2%}"), unsafe_allow_html=True)
-
-with col2:
-    st.markdown(custom_metric("Perf. Benchmark", f"{perf_bench:.2%}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Volatilité Bench", f"{vol_bench:.2%}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Bêta", f"{beta:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Corrélation", f"{correlation:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("R²", f"{r_squared:.2f}"), unsafe_allow_html=True)
-
-with col3:
-    st.markdown(custom_metric("Treynor", f"{treynor:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Info Ratio", f"{info_ratio:.2f}"), unsafe_allow_html=True)
-    st.markdown(custom_metric("Tracking Error", f"{tracking_error:.2%}"), unsafe_allow_html=True)
+with stage("bloc KPIs"):
+    st.markdown("### 📊 Indicateurs de Performance Depuis le 16 janvier 2024")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown(custom_metric("Perf. Portefeuille", f"{perf_ptf:.2%}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Volatilité Ptf", f"{vol_ptf:.2%}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Sharpe (annualisé)", f"{sharpe_ptf:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Sortino (annualisé)", f"{sortino:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Max Drawdown", f"{max_drawdown:.2%}"), unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(custom_metric("Perf. Benchmark", f"{perf_bench:.2%}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Volatilité Bench", f"{vol_bench:.2%}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Bêta", f"{beta:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Corrélation", f"{correlation:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("R²", f"{r_squared:.2f}"), unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(custom_metric("Treynor (annualisé)", f"{treynor:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Info Ratio", f"{info_ratio:.2f}"), unsafe_allow_html=True)
+        st.markdown(custom_metric("Tracking Error", f"{tracking_error:.2%}"), unsafe_allow_html=True)
+
+# --- VaR / CVaR au dernier jour (historique sur la VL, bootstrap des titres détenus) ---
+st.markdown("### ⚠️ Value at Risk au dernier jour de marché")
+with stage("VaR / CVaR"):
+    table_var = var_table(results)
+    if table_var.empty:
+        st.info("Pas assez de données pour estimer la VaR.")
+    else:
+        st.dataframe(
+            table_var.style.format({colonne: "{:.2%}" for colonne in table_var.columns if colonne != "Horizon (jours)"},
+                                   na_rep="N/A"),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Pertes en % de la VL. Bootstrap : rendements journaliers des titres rééchantillonnés "
+                   "avec les poids du jour, cash sans risque.")
+
+# --- Performance sur une période libre (index précalculé : coût indépendant de l'historique) ---
+st.markdown("### 🗓️ Performance sur une période")
+premier_jour, dernier_jour = report["Date"].iloc[0].date(), report["Date"].iloc[-1].date()
+periode = st.date_input("Période", value=(premier_jour, dernier_jour),
+                        min_value=premier_jour, max_value=dernier_jour)
+if isinstance(periode, (tuple, list)) and len(periode) == 2:
+    perf_periode = results.periodes.query(*periode)
+    if perf_periode is None:
+        st.info("Aucun jour de marché sur cette période.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(custom_metric("Perf. Portefeuille", f"{perf_periode['Perf_Ptf']:.2%}"), unsafe_allow_html=True)
+            st.markdown(custom_metric("Max Drawdown", f"{perf_periode['Max_Drawdown']:.2%}"), unsafe_allow_html=True)
+        with col2:
+            st.markdown(custom_metric("Perf. Benchmark", f"{perf_periode['Perf_Bench']:.2%}"), unsafe_allow_html=True)
+            st.markdown(custom_metric("Max Drawdown Bench", f"{perf_periode['Max_Drawdown_Bench']:.2%}"), unsafe_allow_html=True)
+        with col3:
+            st.markdown(custom_metric("Surperformance", f"{perf_periode['Exces']:.2%}"), unsafe_allow_html=True)
+            st.markdown(custom_metric("Jours de marché", f"{perf_periode['Nb_Jours']}"), unsafe_allow_html=True)
 
 # --- Graphique VL vs Benchmark ---
 st.markdown("### 📈 Évolution SBR US BALANCED POWER vs S&P500 exFinancials & Real Estate")
 
-# Normalisation à 100
-vl_series["VL Normalisée"] = vl_series["Valeur Liquidative"] / vl_series["Valeur Liquidative"].iloc[0] * 100
-benchmark["Benchmark Normalisé"] = benchmark["Prix"] / benchmark["Prix"].iloc[0] * 100
-
-df_plot = pd.merge(
-    vl_series[["Date", "VL Normalisée"]],
-    benchmark[["Date", "Benchmark Normalisé"]],
-    on="Date",
-    how="inner"
-)
-
-fig = px.line(df_plot, x="Date", y=["VL Normalisée", "Benchmark Normalisé"],
-              labels={"value": "Valeur $ (base 100)", "Date": "Date"}
-            )
-st.plotly_chart(fig, use_container_width=True)
+cle_resultats = (results.version, results.capital_initial, results.taux_cash)
+
+
+def graphique_vl():
+    # Normalisation à 100
+    vl_series["VL Normalisée"] = vl_series["Valeur Liquidative"] / vl_series["Valeur Liquidative"].iloc[0] * 100
+    benchmark["Benchmark Normalisé"] = benchmark["Prix"] / benchmark["Prix"].iloc[0] * 100
+
+    df_plot = pd.merge(
+        vl_series[["Date", "VL Normalisée"]],
+        benchmark[["Date", "Benchmark Normalisé"]],
+        on="Date",
+        how="inner"
+    )
+    return line_chart(df_plot, x="Date", y=["VL Normalisée", "Benchmark Normalisé"],
+                      labels={"value": "Valeur $ (base 100)", "Date": "Date"})
+
+
+# Figure sous-échantillonnée, construite une fois par version des données
+with stage("graphique VL vs benchmark"):
+    fig = cached_figure(cle_resultats + ("vl_benchmark",), graphique_vl)
+    st.plotly_chart(fig, use_container_width=True)
+
+# --- Indicateurs roulants (20 / 60 / 252 jours) vs benchmark ---
+st.markdown("### 📉 Indicateurs roulants vs S&P500 exFinancials & Real Estate")
+libelle = st.selectbox("Indicateur", list(INDICATEURS_ROULANTS))
+indicateur = INDICATEURS_ROULANTS[libelle]
+if results.rolling.empty:
+    st.info("Pas assez de données pour les indicateurs roulants.")
+else:
+    with stage("graphique roulant"):
+        fig_rolling = cached_figure(
+            cle_resultats + ("roulant", indicateur),
+            lambda: line_chart(results.rolling, x="Date", y=indicateur, color="Fenetre",
+                               labels={indicateur: libelle, "Fenetre": "Fenêtre"}))
+        st.plotly_chart(fig_rolling, use_container_width=True)
+
+profiling_panel()
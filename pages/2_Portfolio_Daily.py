@@ -1,36 +1,32 @@
 import streamlit as st
 import pandas as pd
-from src.data_loader import load_data
-from src.compute_engine import compute_daily_report
+from src.covariance import get_covariance
+from src.profiling import stage
+from src.st_adapter import load_results, profiling_panel, profiling_start
 
+profiling_start("Vue quotidienne")
 st.title("📆 Vue Quotidienne du Portefeuille")
 
-data = load_data()
-report = compute_daily_report(
-    transactions=data["transactions"],
-    prices=data["prices"],
-    jours_marche=data["jours_marche"],
-    capital_initial=100_000,
-    taux_cash=0.03
-)
+data, results = load_results(capital_initial=100_000, taux_cash=0.03)
+report, positions, calendrier = results.report, results.positions, results.calendrier
 
 # Sélecteur de date
-dates_disponibles = report["Date"].dt.strftime("%d/%m/%Y").tolist()
-selected_str = st.selectbox("📅 Choisissez une date", dates_disponibles[::-1])  # ordre décroissant
-selected_date = pd.to_datetime(selected_str, format="%d/%m/%Y")
+selected_str = st.selectbox("📅 Choisissez une date", calendrier.libelles[::-1])  # ordre décroissant
+selected_date = calendrier.from_label(selected_str)
 
-# Données du jour sélectionné
-row = report[report["Date"] == selected_date].iloc[0]
+# Données du jour sélectionné (ligne du rapport = position dans le calendrier)
+i_jour = calendrier.position(selected_date)
+row = report.iloc[i_jour]
 vl_initiale = report.iloc[0]["Valeur Liquidative"]
 vl_actuelle = row["Valeur Liquidative"]
 perf_cumulee = (vl_actuelle / vl_initiale) - 1
-# Cherche le jour de marché précédent 
-veille = data["jours_marche"][data["jours_marche"]["Date"] < selected_date]["Date"].max()
+# Jour de marché précédent
+veille = calendrier.previous(selected_date)
 
-if pd.isna(veille):
+if veille is None:
     perf_jour = None
 else:
-    vl_veille = report[report["Date"] == veille]["Valeur Liquidative"].values[0]
+    vl_veille = report["Valeur Liquidative"].iloc[i_jour - 1]
     perf_jour = (vl_actuelle / vl_veille) - 1
 
 def format_perf(perf):
@@ -65,26 +61,21 @@ def get_variation_colors(col):
 
 
 # Composition du portefeuille
-def get_portfolio_compo(report, prices, jours_marche, date):
-    row = report[report["Date"] == date]
-    if row.empty:
+def get_portfolio_compo(positions, prices, calendrier, date):
+    net_position = positions.at(date)
+    if net_position is None or net_position.empty:
         return pd.DataFrame()
 
-    positions = row.iloc[0]["Positions"]
-    if not positions:
-        return pd.DataFrame()
-
-    net_position = pd.Series(positions)
-    prix_date = prices[prices["Date"] == date].set_index("Ticker")["Prix"]
+    prix_date = prices.prices_at(date)
     df = net_position.to_frame("Nombre de Titres").join(prix_date, how="left")
     df["Valeur"] = df["Nombre de Titres"] * df["Prix"]
 
     # Variation par rapport à la veille
-    veille = jours_marche[jours_marche["Date"] < date]["Date"].max()
-    if pd.isna(veille):
+    veille = calendrier.previous(date)
+    if veille is None:
         df["Variation vs veille"] = "N/A"
     else:
-        prix_veille = prices[prices["Date"] == veille].set_index("Ticker")["Prix"]
+        prix_veille = prices.prices_at(veille)
         df["Variation vs veille"] = (
             (df["Prix"] - prix_veille) / prix_veille * 100
         ).round(2).fillna("N/A")
@@ -96,20 +87,55 @@ def get_portfolio_compo(report, prices, jours_marche, date):
     return df[df["Nombre de Titres"] != 0]
 
 
+# Titres détenus valorisés avec une cotation reportée d'un jour précédent
+def get_stale_tickers(compo, prices, date):
+    if compo.empty:
+        return []
+    perimes = prices.stale_at(date)
+    return [ticker for ticker in compo["Ticker"] if perimes.get(ticker, False)]
+
+
 st.markdown("### 🧾 Composition du portefeuille")
-compo = get_portfolio_compo(
-    report=report,
-    prices=data["prices"],
-    jours_marche=data["jours_marche"],
-    date=selected_date
-)
-st.dataframe(
-    compo.style
-        .format({
-            "Prix": "{:.2f}",
-            "Valeur": "{:.2f}",
-            "Variation vs veille": lambda x: f"{x}%" if isinstance(x, float) else x
-        })
-        .apply(get_variation_colors, subset=["Variation vs veille"]),
+with stage("composition du jour"):
+    compo = get_portfolio_compo(
+        positions=positions,
+        prices=results.prix,
+        calendrier=calendrier,
+        date=selected_date
+    )
+tickers_perimes = get_stale_tickers(compo, results.prix, selected_date)
+if tickers_perimes:
+    st.warning("⚠️ Prix reportés (dernière cotation antérieure) : " + ", ".join(tickers_perimes))
+with stage("tableau composition"):
+    st.dataframe(
+        compo.style
+            .format({
+                "Prix": "{:.2f}",
+                "Valeur": "{:.2f}",
+                "Variation vs veille": lambda x: f"{x}%" if isinstance(x, float) else x
+            })
+            .apply(get_variation_colors, subset=["Variation vs veille"]),
+            hide_index=True
+    )
+
+# Décomposition de la volatilité (covariance EWMA des rendements, maintenue jour par jour)
+st.markdown("### 🎯 Contribution au risque")
+with stage("contribution au risque"):
+    valeurs = compo.set_index("Ticker")["Valeur"] if not compo.empty else pd.Series(dtype=float)
+    risque = get_covariance(results).contributions(selected_date, valeurs, vl_actuelle)
+if risque is None or risque.empty:
+    st.info("Pas assez d'historique pour estimer la contribution au risque.")
+else:
+    st.markdown(f"- 📐 **Volatilité annualisée du portefeuille (EWMA)** : {risque['Contribution totale'].sum():.2%}")
+    st.dataframe(
+        risque.sort_values("Part du risque", ascending=False).style.format({
+            "Poids": "{:.2%}",
+            "Volatilité": "{:.2%}",
+            "Contribution marginale": "{:.2%}",
+            "Contribution totale": "{:.2%}",
+            "Part du risque": "{:.2%}"
+        }, na_rep="N/A"),
         hide_index=True
-)
+    )
+
+profiling_panel()
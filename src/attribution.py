@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from src.utils import FENETRE_CREATION
+
+NON_CLASSE = "Non classé"
+# Ligne complémentaire des contributions sectorielles : rémunération du cash, frais, effet intrajournalier des opérations
+LIGNE_RESIDU = "Cash & opérations"
+COLONNES_ATTRIBUTION = ["Poids début", "Poids fin", "Rendement", "Contribution"]
+
+
+def sector_matrix(tickers, secteurs):
+    # Matrice indicatrice (tickers x secteurs) : 1 si le ticker appartient au secteur
+    libelles = pd.Series(secteurs).reindex(pd.Index(tickers, dtype=object)).fillna(NON_CLASSE)
+    codes, noms = pd.factorize(libelles, sort=True)
+    indicatrice = np.zeros((len(libelles), len(noms)))
+    indicatrice[np.arange(len(libelles)), codes] = 1.0
+    return indicatrice, pd.Index(noms, name="Secteur")
+
+
+def brinson(poids_ptf, rendements_ptf, poids_bench, rendements_bench):
+    # Effets d'allocation, de sélection et d'interaction par secteur (Brinson-Fachler) ;
+    # Series indexées par secteur, secteurs absents d'un côté comptés à poids et rendement nuls
+    secteurs = poids_ptf.index.union(poids_bench.index)
+    wp, rp = poids_ptf.reindex(secteurs).fillna(0), rendements_ptf.reindex(secteurs).fillna(0)
+    wb, rb = poids_bench.reindex(secteurs).fillna(0), rendements_bench.reindex(secteurs).fillna(0)
+    rendement_bench = (wb * rb).sum()
+    return pd.DataFrame({
+        "Allocation": (wp - wb) * (rb - rendement_bench),
+        "Sélection": wb * (rp - rb),
+        "Interaction": (wp - wb) * (rp - rb),
+    })
+
+
+class SectorAttribution:
+    # Poids et contributions sectoriels sur tout l'historique, calculés en une passe matricielle
+    # (valeurs des positions x indicatrice des secteurs), agrégés par mois ("2024-01") et depuis création
+
+    def __init__(self, positions, prix, secteurs, valeur_liquidative, capital_initial):
+        # positions : PositionHistory ; prix : ResolvedPrices sur les mêmes jours de marché ;
+        # secteurs : Series ticker -> secteur GICS ; valeur_liquidative : VL de chaque jour de marché
+        self.dates = prix.dates
+        indicatrice, self.secteurs = sector_matrix(prix.tickers, secteurs)
+        quantites = positions.reindex_tickers(prix.tickers).astype(float)
+
+        valeurs = (quantites * np.nan_to_num(prix.values, nan=0.0)) @ indicatrice
+        # P&L de prix des positions de la veille, q(t-1) x (p(t) - p(t-1)) ; nul sans deux cotations
+        pnl = np.zeros_like(valeurs)
+        if len(self.dates) > 1:
+            variations = np.nan_to_num(np.diff(prix.values, axis=0), nan=0.0)
+            pnl[1:] = (quantites[:-1] * variations) @ indicatrice
+
+        total = valeurs.sum(axis=1, keepdims=True)
+        self.poids = np.divide(valeurs, total, out=np.full_like(valeurs, np.nan), where=total != 0)
+        valeurs_veille = np.vstack([np.zeros((1, valeurs.shape[1])), valeurs[:-1]])
+        rendements = np.divide(pnl, valeurs_veille, out=np.zeros_like(pnl), where=valeurs_veille != 0)
+        vl = np.asarray(valeur_liquidative, dtype=float)
+        vl_veille = np.r_[capital_initial, vl[:-1]]
+        residu = (vl - vl_veille) - pnl.sum(axis=1)
+
+        mois = self.dates.strftime("%Y-%m")
+        debuts = np.flatnonzero(np.r_[True, mois[1:] != mois[:-1]]) if len(mois) else np.zeros(0, dtype=int)
+        fenetres = list(mois[debuts]) + [FENETRE_CREATION]
+        debuts_fenetres = np.r_[debuts, 0].astype(int)
+        fins_fenetres = np.r_[np.r_[debuts[1:], len(mois)] - 1, len(mois) - 1].astype(int)
+        self.table = self._agreger(fenetres, debuts_fenetres, fins_fenetres, pnl, rendements, residu, vl_veille)
+
+    def _agreger(self, fenetres, debuts, fins, pnl, rendements, residu, vl_veille):
+        # Sommes par fenêtre via les sommes préfixes : contribution = P&L / VL de la veille du premier jour,
+        # rendement sectoriel chaîné = exp(somme des log(1 + r)) - 1
+        def cumul(valeurs):
+            return np.concatenate([np.zeros((1,) + valeurs.shape[1:]), np.cumsum(valeurs, axis=0)])
+
+        colonnes = ["Secteur"] + COLONNES_ATTRIBUTION
+        if not len(self.dates):
+            return pd.DataFrame(columns=colonnes, index=pd.Index([], name="Fenetre"))
+        cumul_pnl, cumul_log, cumul_residu = cumul(pnl), cumul(np.log1p(rendements)), cumul(residu)
+        base = vl_veille[debuts]
+        contribution = (cumul_pnl[fins + 1] - cumul_pnl[debuts]) / base[:, None]
+        rendement = np.expm1(cumul_log[fins + 1] - cumul_log[debuts])
+        poids_debut = np.where(debuts[:, None] > 0, self.poids[np.maximum(debuts - 1, 0)], np.nan)
+
+        # Une ligne par (fenêtre, secteur) puis la ligne résiduelle de la fenêtre
+        def avec_residu(valeurs, residu_fenetre=np.nan):
+            return np.column_stack([valeurs, np.broadcast_to(residu_fenetre, len(fenetres))]).ravel()
+
+        nb_lignes = len(self.secteurs) + 1
+        return pd.DataFrame({
+            "Secteur": np.tile(np.append(self.secteurs.to_numpy(), LIGNE_RESIDU), len(fenetres)),
+            "Poids début": avec_residu(poids_debut),
+            "Poids fin": avec_residu(self.poids[fins]),
+            "Rendement": avec_residu(rendement),
+            "Contribution": avec_residu(contribution, (cumul_residu[fins + 1] - cumul_residu[debuts]) / base),
+        }, index=pd.Index(np.repeat(fenetres, nb_lignes), name="Fenetre"))
+
+    def window(self, fenetre):
+        # Attribution d'un mois ("2024-01" ou Period) ou depuis création : lecture dans la table précalculée ;
+        # seuls les secteurs détenus sur la fenêtre (poids ou contribution non nuls) sont conservés
+        fenetre = str(fenetre)
+        if fenetre not in self.table.index:
+            return None
+        table = self.table.loc[[fenetre]].set_index("Secteur")
+        actifs = (table["Poids fin"].fillna(0) != 0) | (table["Poids début"].fillna(0) != 0) \
+            | (table["Contribution"] != 0) | (table.index == LIGNE_RESIDU)
+        return table[actifs]
+
+    def weights_at(self, date):
+        # Poids sectoriels du jour (part de la valeur des titres), secteurs non détenus exclus
+        i = self.dates.get_indexer([pd.Timestamp(date)])[0]
+        if i < 0:
+            return None
+        poids = pd.Series(self.poids[i], index=self.secteurs, name="Poids")
+        return poids[poids.fillna(0) != 0]
+
+    def brinson(self, fenetre, poids_bench, rendements_bench):
+        # Effets de Brinson de la fenêtre face aux poids / rendements sectoriels du benchmark (Series par
+        # secteur), à fournir : le classeur ne contient que le niveau global du benchmark
+        table = self.window(fenetre)
+        if table is None:
+            return None
+        table = table.drop(index=LIGNE_RESIDU)
+        poids = table["Poids début"].fillna(table["Poids fin"]).fillna(0)
+        return brinson(poids, table["Rendement"], poids_bench, rendements_bench)
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import profiling
+
+# Cache persistant (Parquet) des feuilles du classeur Excel : un sous-dossier par
+# version du classeur (hash du contenu) et format du lecteur, un fichier .parquet par feuille.
+CACHE_DIR = "data/.cache/workbook"
+TAILLE_MAX_CACHE = 256 * 1024 ** 2  # octets, toutes versions confondues
+INDEX_FILE = "index.json"
+
+
+def _hash_fichier(filepath, taille_bloc=1 << 20):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _lire_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remplacer(chemin, ecrire):
+    # Écriture atomique via un fichier temporaire propre à l'écrivain (chargements concurrents)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(chemin) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        ecrire(tmp_path)
+        os.replace(tmp_path, chemin)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _ecrire_index(cache_dir, index):
+    def ecrire(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+    _remplacer(os.path.join(cache_dir, INDEX_FILE), ecrire)
+
+
+def workbook_version(filepath, cache_dir=CACHE_DIR):
+    # Version = hash du contenu ; (mtime, taille) évite de re-hasher un fichier inchangé
+    stat = os.stat(filepath)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    cle = os.path.abspath(filepath)
+
+    index = _lire_index(cache_dir)
+    entree = index.get(cle)
+    if entree and entree["signature"] == signature:
+        return entree["version"]
+
+    version = _hash_fichier(filepath)[:16]
+    index[cle] = {"signature": signature, "version": version}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _ecrire_index(cache_dir, index)
+    except OSError:
+        pass
+    return version
+
+
+def _dossier_version(version, format_lecteur):
+    # Les frames écrites par un lecteur d'un autre format (schémas, construction) ne sont pas resservies
+    return f"{version}-f{format_lecteur}"
+
+
+def _chemin_feuille(cache_dir, dossier, sheet_name):
+    return os.path.join(cache_dir, dossier, f"{sheet_name}.parquet")
+
+
+def _lire_feuille(chemin):
+    # Lecture en mémoire mappée : pas de re-parsing du XML du classeur
+    return pq.read_table(chemin, memory_map=True).to_pandas()
+
+
+def _ecrire_feuille(chemin, df):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _remplacer(chemin, lambda tmp_path: pq.write_table(table, tmp_path))
+
+
+def _taille_dossier(chemin):
+    return sum(entry.stat().st_size for entry in os.scandir(chemin) if entry.is_file())
+
+
+def evict(cache_dir=CACHE_DIR, taille_max=TAILLE_MAX_CACHE, version_courante=None):
+    # Supprime les versions les moins récemment utilisées au-delà de `taille_max` ;
+    # un dossier supprimé entre-temps par un autre processus est simplement ignoré
+    try:
+        entrees = [entry for entry in os.scandir(cache_dir) if entry.is_dir()]
+    except OSError:
+        return
+    versions = []
+    for entry in entrees:
+        try:
+            versions.append((entry.stat().st_mtime, entry))
+        except OSError:
+            continue
+    versions.sort(key=lambda version: version[0], reverse=True)
+
+    total = 0
+    for _, entry in versions:
+        try:
+            taille = _taille_dossier(entry.path)
+        except OSError:
+            continue
+        if entry.name != version_courante and total + taille > taille_max:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            total += taille
+
+
+def load_sheets(filepath, sheet_names, reader, cache_dir=CACHE_DIR, taille_max=TAILLE_MAX_CACHE, format_lecteur=0):
+    # `reader(filepath, feuilles)` n'est appelé que pour les feuilles absentes du cache ;
+    # `format_lecteur` est à incrémenter par l'appelant quand les frames produites par `reader` changent
+    version = workbook_version(filepath, cache_dir)
+    dossier = _dossier_version(version, format_lecteur)
+
+    frames = {}
+    manquantes = []
+    for sheet_name in sheet_names:
+        chemin = _chemin_feuille(cache_dir, dossier, sheet_name)
+        try:
+            frames[sheet_name] = _lire_feuille(chemin)
+        except (OSError, pa.ArrowException):
+            manquantes.append(sheet_name)
+
+    profiling.record_cache("classeur (Parquet)", not manquantes)
+    if manquantes:
+        frames.update(reader(filepath, manquantes))
+        try:
+            for sheet_name in manquantes:
+                _ecrire_feuille(_chemin_feuille(cache_dir, dossier, sheet_name), frames[sheet_name])
+        except (OSError, pa.ArrowException):
+            pass
+
+    # La date de modification du dossier sert de date de dernier accès pour l'éviction
+    try:
+        os.utime(os.path.join(cache_dir, dossier), (time.time(), time.time()))
+    except OSError:
+        pass
+    evict(cache_dir, taille_max, version_courante=dossier)
+    return {sheet_name: frames[sheet_name] for sheet_name in sheet_names}
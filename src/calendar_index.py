@@ -0,0 +1,39 @@
+import pandas as pd
+
+FORMAT_DATE = "%d/%m/%Y"
+
+
+class MarketCalendar:
+    # Jours de marché triés ; la position d'une date est aussi sa ligne dans le rapport journalier
+
+    def __init__(self, dates):
+        # Pas de dédoublonnage ici : il décalerait les positions par rapport aux lignes du rapport
+        # (les jours de marché sont dédoublonnés au chargement, src.data_loader)
+        self.dates = pd.DatetimeIndex(dates).sort_values()
+        if self.dates.has_duplicates:
+            doublons = self.dates[self.dates.duplicated()].unique().strftime(FORMAT_DATE)
+            raise ValueError(f"Jours de marché en double : {', '.join(doublons)}")
+        self.position_par_date = {date: i for i, date in enumerate(self.dates)}
+        # Libellés du sélecteur de date, calculés une fois
+        self.libelles = list(self.dates.strftime(FORMAT_DATE))
+        self.position_par_libelle = {libelle: i for i, libelle in enumerate(self.libelles)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def position(self, date):
+        # Position O(1) d'un jour de marché, None si la date n'en est pas un
+        return self.position_par_date.get(pd.Timestamp(date))
+
+    def from_label(self, libelle):
+        return self.dates[self.position_par_libelle[libelle]]
+
+    def previous(self, date):
+        # Jour de marché strictement antérieur (recherche dichotomique), None s'il n'y en a pas
+        i = int(self.dates.searchsorted(pd.Timestamp(date), side="left")) - 1
+        return self.dates[i] if i >= 0 else None
+
+    def next(self, date):
+        # Jour de marché strictement postérieur, None s'il n'y en a pas
+        i = int(self.dates.searchsorted(pd.Timestamp(date), side="right"))
+        return self.dates[i] if i < len(self.dates) else None
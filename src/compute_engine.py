@@ -1,11 +1,285 @@
+import hashlib
+import json
+import os
+import tempfile
+
 import pandas as pd
 import numpy as np
 
-def compute_daily_report(transactions, prices, jours_marche, capital_initial, taux_cash=0.03):
-    jours_marche = jours_marche.sort_values("Date").reset_index(drop=True)
-    prices_pivot = prices.pivot(index="Date", columns="Ticker", values="Prix")
+from src import profiling
+from src.positions import PositionHistory
+from src.price_store import AGE_MAX_PRIX, as_price_store
+
+# Sens de chaque type d'opération sur la position (+1 achat/rachat, -1 vente/short)
+SENS_OPERATIONS = {"achat": 1, "rachat": 1, "vente": -1, "short": -1}
+
+# Colonne de comptage associée à chaque type d'opération
+COMPTEURS_OPERATIONS = {
+    "achat": "Nombre d'Achats",
+    "vente": "Nombre de Ventes",
+    "short": "Nombre de Shorts",
+    "rachat": "Nombre de Rachats",
+}
+
+
+@profiling.timed("compute_daily_report")
+def compute_daily_report(transactions, prices, jours_marche, capital_initial, taux_cash=0.03, mode="vectorise",
+                         with_positions=False, age_max_prix=AGE_MAX_PRIX):
+    # mode="boucle" conserve le moteur historique jour par jour (référence, colonne "Positions")
+    # with_positions=True renvoie aussi l'historique des positions (PositionHistory)
+    # age_max_prix : ancienneté maximale (jours de marché) d'un prix reporté (src.price_store)
+    if mode == "vectorise":
+        df_report, positions = _compute_daily_report_vectorise(
+            transactions, prices, jours_marche, capital_initial, taux_cash, age_max_prix)
+    elif mode == "boucle":
+        df_report = _compute_daily_report_boucle(transactions, prices, jours_marche, capital_initial, taux_cash,
+                                                 age_max_prix)
+        if not with_positions:
+            return df_report
+        positions = PositionHistory.from_records(df_report["Date"], df_report.pop("Positions").tolist())
+    else:
+        raise ValueError(f"Mode de calcul inconnu : {mode!r}")
+    return (df_report, positions) if with_positions else df_report
+
+
+def _compute_daily_report_vectorise(transactions, prices, jours_marche, capital_initial, taux_cash, age_max_prix):
+    dates = pd.DatetimeIndex(jours_marche["Date"]).sort_values()
+    tickers = transactions["Ticker"].unique()
+    positions_initiales = np.zeros(len(tickers), dtype=transactions["Nb actions"].dtype)
+    return _moteur_vectorise(transactions, as_price_store(prices), dates, tickers,
+                             positions_initiales, capital_initial, taux_cash, age_max_prix=age_max_prix)
+
+
+def _mouvements_journaliers(transactions, dates, tickers, positions_initiales):
+    # Agrège les transactions par jour de marché : positions, flux de cash, compteurs
+    nb_jours, nb_tickers = len(dates), len(tickers)
+
+    # Seules les transactions d'un jour de marché sont comptabilisées (comme dans la boucle)
+    tx = transactions[transactions["Date"].isin(dates)]
+    i_jour = dates.get_indexer(tx["Date"])
+    j_ticker = pd.Index(tickers).get_indexer(tx["Ticker"])
+
+    type_op = tx["Type"].str.lower()
+    sens = type_op.map(SENS_OPERATIONS).fillna(0).to_numpy()
+    nb = tx["Nb actions"].to_numpy()
+    brut = tx["Prix local unitaire"].to_numpy(dtype=float) * nb
+    frais = tx["Frais"].to_numpy(dtype=float)
+
+    entree = sens > 0
+    sortie = sens < 0
+    flux_cash = np.where(entree, -(brut + frais), np.where(sortie, brut - frais, 0.0))
+
+    # Matrice (jour x ticker) des quantités signées, puis positions par somme cumulée
+    mouvements = np.zeros((nb_jours, nb_tickers), dtype=np.result_type(nb, positions_initiales, np.int64))
+    np.add.at(mouvements, (i_jour, j_ticker), (sens * nb).astype(mouvements.dtype))
+
+    def par_jour(poids):
+        return np.bincount(i_jour, weights=poids, minlength=nb_jours)
+
+    return {
+        "positions": positions_initiales + np.cumsum(mouvements, axis=0),
+        "flux_cash": par_jour(flux_cash),
+        "compteurs": {colonne: par_jour((type_op == type_op_nom).to_numpy()).astype(int)
+                      for type_op_nom, colonne in COMPTEURS_OPERATIONS.items()},
+        "frais": par_jour(frais),
+        "investi": par_jour(np.where(entree, brut + frais, 0.0)),
+        "recupere": par_jour(np.where(sortie, brut, 0.0)),
+    }
+
+
+def _cash_remunere(flux_cash, cash_initial, taux_cash):
+    # Cash rémunéré (252 jours ouvrés/an) : cash_t = g^t * (C0 + somme des flux_s * g^-s).
+    # cash_initial / taux_cash scalaires, ou vecteurs de même taille (un scénario par ligne)
+    taux_cash = np.asarray(taux_cash, dtype=float)
+    cash_initial = np.asarray(cash_initial, dtype=float)
+    if taux_cash.ndim or cash_initial.ndim:
+        taux_cash, cash_initial = taux_cash[..., None], cash_initial[..., None]
+    t = np.arange(1, len(flux_cash) + 1)
+    croissance = (1 + taux_cash / 252) ** t
+    return croissance * (cash_initial + np.cumsum(flux_cash / croissance, axis=-1))
+
+
+def _valeur_titres(positions, prix):
+    # Valorisation sans branchement sur la matrice dense des prix résolus (src.price_store.ResolvedPrices) :
+    # produit ligne à ligne positions x prix ; seules les lignes sans cotation exploitable valent 0,
+    # les lignes détenues concernées sont comptées plutôt qu'ignorées silencieusement
+    valeur = np.einsum("ij,ij->i", positions, np.nan_to_num(prix.values, nan=0.0))
+    detenues = positions != 0
+    return valeur, {
+        "Titres_Prix_Perimes": np.count_nonzero(detenues & prix.stale, axis=1),
+        "Titres_Non_Valorises": np.count_nonzero(detenues & prix.missing, axis=1),
+    }
+
+
+def _moteur_vectorise(transactions, price_store, dates, tickers, positions_initiales, cash_initial, taux_cash,
+                      jours=None, age_max_prix=AGE_MAX_PRIX):
+    # Déroule le portefeuille sur `dates` à partir de l'état de la veille (positions, cash) ;
+    # `jours` : calendrier complet, pour reporter les cotations antérieures à `dates`
+    mouvements = _mouvements_journaliers(transactions, dates, tickers, positions_initiales)
+    cash = _cash_remunere(mouvements["flux_cash"], cash_initial, taux_cash)
+    prix = price_store.resolve(dates if jours is None else jours, tickers, age_max_prix, dates=dates)
+    valeur_titres, alertes_prix = _valeur_titres(mouvements["positions"], prix)
+
+    df_report = pd.DataFrame({"Date": dates})
+    for colonne, compteur in mouvements["compteurs"].items():
+        df_report[colonne] = compteur
+    df_report["Frais"] = mouvements["frais"]
+    df_report["Montant_Investi"] = mouvements["investi"]
+    df_report["Montant_Recupere"] = mouvements["recupere"]
+    df_report["Valeur_Titres"] = valeur_titres
+    df_report["Cash"] = cash
+    df_report["Valeur Liquidative"] = valeur_titres + cash
+    for colonne, compteur in alertes_prix.items():
+        df_report[colonne] = compteur
+    return df_report, PositionHistory.from_array(dates, tickers, mouvements["positions"])
+
 
+def compute_nav_stack(transactions, prices, jours_marche, capitaux_initiaux, taux_cash, age_max_prix=AGE_MAX_PRIX):
+    # Variantes (capital, taux de cash) d'un même jeu de transactions empilées sur un axe :
+    # positions et valorisation calculées une fois, cash de chaque variante en une opération.
+    # Renvoie (dates, valeur_titres[jours], cash[variantes, jours])
+    dates = pd.DatetimeIndex(jours_marche["Date"]).sort_values()
     tickers = transactions["Ticker"].unique()
+    positions_initiales = np.zeros(len(tickers), dtype=transactions["Nb actions"].dtype)
+    mouvements = _mouvements_journaliers(transactions, dates, tickers, positions_initiales)
+    capitaux_initiaux, taux_cash = np.broadcast_arrays(np.atleast_1d(capitaux_initiaux), np.atleast_1d(taux_cash))
+    cash = _cash_remunere(mouvements["flux_cash"], capitaux_initiaux, taux_cash)
+    prix = as_price_store(prices).resolve(dates, tickers, age_max_prix)
+    valeur_titres, _ = _valeur_titres(mouvements["positions"], prix)
+    return dates, valeur_titres, cash
+
+
+# ---------------------------------------------------------------------------
+# Calcul incrémental avec point de reprise (checkpoint) sur disque
+# ---------------------------------------------------------------------------
+
+CHECKPOINT_PATH = "data/.cache/report_checkpoint.pkl"
+CHECKPOINT_FORMAT = 3  # à incrémenter si le contenu du checkpoint change
+
+
+def _empreintes_journalieres(transactions, price_store, dates):
+    # Empreinte par jour de marché des transactions et des prix du jour :
+    # toute correction rétroactive modifie l'empreinte du jour concerné
+    hash_tx = pd.util.hash_pandas_object(transactions, index=False)
+    hash_tx = hash_tx.groupby(transactions["Date"].to_numpy()).sum()
+    prix = pd.DataFrame(price_store.reindex(dates, price_store.tickers))
+    hash_prix = pd.util.hash_pandas_object(prix, index=False)
+    empreintes = hash_prix.to_numpy() ^ hash_tx.reindex(dates, fill_value=0).to_numpy()
+    return pd.Series(empreintes, index=dates)
+
+
+def _premiere_date_modifiee(anciennes, nouvelles):
+    dates = anciennes.index.union(nouvelles.index)
+    a = anciennes.reindex(dates)
+    n = nouvelles.reindex(dates)
+    differences = (a != n) | a.isna() | n.isna()
+    return dates[differences.to_numpy()].min() if differences.any() else None
+
+
+def _chemin_checkpoint(path, parametres):
+    # Un checkpoint par jeu de paramètres : pages et export (--capital, --taux-cash) ne s'évincent pas
+    empreinte = hashlib.sha256(json.dumps(parametres, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    racine, extension = os.path.splitext(path)
+    return f"{racine}-{empreinte}{extension}"
+
+
+def _lire_checkpoint(path):
+    # Toute lecture impossible est un miss : fichier absent ou tronqué, mais aussi checkpoint
+    # picklé par une version antérieure des classes (AttributeError, ModuleNotFoundError...)
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def _ecrire_checkpoint(path, checkpoint):
+    # Écriture atomique via un fichier temporaire propre à l'écrivain : un rafraîchissement interrompu
+    # ne corrompt pas le checkpoint et deux écritures simultanées ne se mélangent pas
+    try:
+        dossier = os.path.dirname(path) or "."
+        os.makedirs(dossier, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dossier, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pd.to_pickle(checkpoint, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+@profiling.timed("compute_daily_report_incremental")
+def compute_daily_report_incremental(transactions, prices, jours_marche, capital_initial, taux_cash=0.03,
+                                     checkpoint_path=CHECKPOINT_PATH, with_positions=False,
+                                     age_max_prix=AGE_MAX_PRIX):
+    # Ne rejoue que les jours postérieurs au checkpoint, ou depuis la première date
+    # modifiée en cas de transaction antidatée / correction de prix
+    dates = pd.DatetimeIndex(jours_marche["Date"]).sort_values()
+    tickers = transactions["Ticker"].unique()
+    price_store = as_price_store(prices)
+    empreintes = _empreintes_journalieres(transactions, price_store, dates)
+    parametres = {"capital_initial": capital_initial, "taux_cash": taux_cash, "age_max_prix": age_max_prix,
+                  "format": CHECKPOINT_FORMAT}
+
+    checkpoint_path = _chemin_checkpoint(checkpoint_path, parametres)
+    checkpoint = _lire_checkpoint(checkpoint_path)
+    if checkpoint is None or checkpoint.get("parametres") != parametres:
+        profiling.record_cache("checkpoint du rapport", False)
+        reprise = dates.min() if len(dates) else None
+        report_conserve = None
+    else:
+        reprise = _premiere_date_modifiee(checkpoint["empreintes"], empreintes)
+        profiling.record_cache("checkpoint du rapport", reprise is None)
+        if reprise is None:
+            df_report = checkpoint["report"].copy()
+            return (df_report, checkpoint["positions"]) if with_positions else df_report
+        report_conserve = checkpoint["report"][checkpoint["report"]["Date"] < reprise]
+        positions_conservees = checkpoint["positions"].truncate(reprise)
+
+    # État de fin de journée de la veille du point de reprise
+    if report_conserve is None or report_conserve.empty:
+        report_conserve = None
+        positions_initiales = np.zeros(len(tickers), dtype=transactions["Nb actions"].dtype)
+        cash_veille = capital_initial
+    else:
+        positions_initiales = positions_conservees.row_reindexed(positions_conservees.dates[-1], tickers)
+        cash_veille = report_conserve["Cash"].iloc[-1]
+
+    dates_a_calculer = dates[dates >= reprise] if reprise is not None else dates[:0]
+    nouveau, nouvelles_positions = _moteur_vectorise(transactions, price_store, dates_a_calculer, tickers,
+                                                     positions_initiales, cash_veille, taux_cash,
+                                                     jours=dates, age_max_prix=age_max_prix)
+    if report_conserve is None:
+        df_report, positions = nouveau, nouvelles_positions
+    else:
+        df_report = pd.concat([report_conserve, nouveau], ignore_index=True)
+        positions = positions_conservees.append(nouvelles_positions)
+
+    dernier = len(df_report) - 1
+    _ecrire_checkpoint(checkpoint_path, {
+        "parametres": parametres,
+        "empreintes": empreintes,
+        "report": df_report,
+        "positions": positions,
+        "etat": {
+            "date": df_report["Date"].iloc[dernier] if dernier >= 0 else None,
+            "positions": positions.row(df_report["Date"].iloc[dernier]) if dernier >= 0 else None,
+            "cash": df_report["Cash"].iloc[dernier] if dernier >= 0 else capital_initial,
+        },
+    })
+    return (df_report, positions) if with_positions else df_report
+
+
+def _compute_daily_report_boucle(transactions, prices, jours_marche, capital_initial, taux_cash=0.03,
+                                 age_max_prix=AGE_MAX_PRIX):
+    jours_marche = jours_marche.sort_values("Date").reset_index(drop=True)
+    tickers = transactions["Ticker"].unique()
+    prix_resolus = as_price_store(prices).resolve(jours_marche["Date"], tickers, age_max_prix)
+    prices_pivot = pd.DataFrame(prix_resolus.values, index=prix_resolus.dates, columns=tickers)
+    perimes = pd.DataFrame(prix_resolus.stale, index=prix_resolus.dates, columns=tickers)
+
     positions = {ticker: 0 for ticker in tickers}
     cash = capital_initial
 
@@ -25,6 +299,8 @@ def compute_daily_report(transactions, prices, jours_marche, capital_initial, ta
             "Valeur_Titres": 0.0,
             "Cash": 0.0,
             "Valeur Liquidative": 0.0,
+            "Titres_Prix_Perimes": 0,
+            "Titres_Non_Valorises": 0,
             "Positions": {}  # snapshot des positions du jour
         }
 
@@ -66,13 +342,17 @@ def compute_daily_report(transactions, prices, jours_marche, capital_initial, ta
 
             daily_data["Frais"] += frais
 
-        # Valorisation des titres
-        prix_jour = prices_pivot.loc[date] if date in prices_pivot.index else {}
+        # Valorisation des titres (prix résolus : dernière cotation dans la limite d'ancienneté)
+        prix_jour = prices_pivot.loc[date]
         valeur_titres = 0.0
         for ticker, nb_actions in positions.items():
-            prix = prix_jour.get(ticker, np.nan)
+            prix = prix_jour[ticker]
             if not np.isnan(prix):
                 valeur_titres += nb_actions * prix
+                if nb_actions != 0 and perimes.at[date, ticker]:
+                    daily_data["Titres_Prix_Perimes"] += 1
+            elif nb_actions != 0:
+                daily_data["Titres_Non_Valorises"] += 1
 
         daily_data["Valeur_Titres"] = valeur_titres
         daily_data["Cash"] = cash
@@ -0,0 +1,145 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.utils import JOURS_PAR_AN
+
+METHODES_COVARIANCE = ("ewma", "glissante")
+LAMBDA_EWMA = 0.94          # RiskMetrics, rendements journaliers
+FENETRE_GLISSANTE = 60      # jours de marché
+# Mémoire maximale des états conservés (triangle supérieur en float32) ; au-delà, un état tous les
+# `pas` jours et les jours intermédiaires sont rejoués à la demande (au plus pas - 1 mises à jour)
+MEMOIRE_MAX = 256 * 1024 ** 2
+NB_HISTORIQUES_MAX = 4
+
+_historiques = OrderedDict()
+_verrous = {}
+_verrou = threading.Lock()
+
+
+class CovarianceHistory:
+    # Covariance des rendements journaliers des titres, mise à jour jour par jour (EWMA ou fenêtre glissante).
+    # État conservé : moments d'ordre 2 (triangle supérieur, float32) et somme des rendements
+
+    def __init__(self, prix, methode="ewma", lambda_ewma=LAMBDA_EWMA, fenetre=FENETRE_GLISSANTE,
+                 memoire_max=MEMOIRE_MAX):
+        # prix : ResolvedPrices (jours de marché x tickers) ; un prix manquant compte pour une variation nulle
+        if methode not in METHODES_COVARIANCE:
+            raise ValueError(f"Méthode de covariance inconnue : {methode!r}")
+        self.methode, self.lambda_ewma, self.fenetre = methode, lambda_ewma, fenetre
+        self.dates, self.tickers = prix.dates, prix.tickers
+        self.ligne_par_date = {date: i for i, date in enumerate(self.dates)}
+        nb_tickers = len(self.tickers)
+        self.i_triangle, self.j_triangle = np.triu_indices(nb_tickers)
+
+        rendements = np.zeros(prix.values.shape)
+        if len(self.dates) > 1:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rendements[1:] = prix.values[1:] / prix.values[:-1] - 1
+        self.rendements = np.nan_to_num(rendements, nan=0.0, posinf=0.0, neginf=0.0)
+
+        taille_etat = max(len(self.i_triangle), 1) * 4
+        self.pas = max(1, math.ceil(len(self.dates) * taille_etat / memoire_max))
+        nb_etats = math.ceil(len(self.dates) / self.pas)
+        self.moments = np.empty((nb_etats, len(self.i_triangle)), dtype=np.float32)
+        self.sommes = np.empty((nb_etats, nb_tickers))
+
+        moment, somme = np.zeros(len(self.i_triangle)), np.zeros(nb_tickers)
+        for t in range(len(self.dates)):
+            moment, somme = self._avancer(moment, somme, t)
+            if t % self.pas == 0:
+                self.moments[t // self.pas], self.sommes[t // self.pas] = moment, somme
+
+    def _produit(self, t):
+        r = self.rendements[t]
+        return r[self.i_triangle] * r[self.j_triangle]
+
+    def _avancer(self, moment, somme, t):
+        # État du jour t à partir de celui de la veille
+        if self.methode == "ewma":
+            return self.lambda_ewma * moment + (1 - self.lambda_ewma) * self._produit(t), somme
+        moment = moment + self._produit(t)
+        somme = somme + self.rendements[t]
+        if t >= self.fenetre:
+            moment = moment - self._produit(t - self.fenetre)
+            somme = somme - self.rendements[t - self.fenetre]
+        return moment, somme
+
+    def nb_observations(self, i_jour):
+        # Rendements pris en compte au jour i_jour (le premier jour n'a pas de rendement)
+        return i_jour if self.methode == "ewma" else min(i_jour, self.fenetre)
+
+    def covariance(self, date):
+        # Matrice de covariance dense (tickers x tickers) au jour `date`, None si ce n'est pas un jour de marché
+        i = self.ligne_par_date.get(pd.Timestamp(date))
+        if i is None:
+            return None
+        k = i // self.pas
+        moment, somme = self.moments[k].astype(float), self.sommes[k]
+        for t in range(k * self.pas + 1, i + 1):
+            moment, somme = self._avancer(moment, somme, t)
+
+        if self.methode == "glissante":
+            n = max(self.nb_observations(i), 1)
+            moyenne = somme / n
+            moment = moment / n - moyenne[self.i_triangle] * moyenne[self.j_triangle]
+        matrice = np.zeros((len(self.tickers), len(self.tickers)))
+        matrice[self.i_triangle, self.j_triangle] = moment
+        matrice[self.j_triangle, self.i_triangle] = moment
+        return matrice
+
+    def contributions(self, date, valeurs, valeur_liquidative):
+        # Décomposition de la volatilité du portefeuille au jour `date` : `valeurs` = valeur de chaque ligne
+        # (Series par ticker), poids = valeur / VL. Contribution marginale = (Σw)_i / σ, totale = w_i x marginale
+        # (somme des totales = σ). Volatilités annualisées ; None si le jour n'a pas assez d'historique
+        i = self.ligne_par_date.get(pd.Timestamp(date))
+        if i is None or self.nb_observations(i) < 2:
+            return None
+        valeurs = valeurs.reindex(self.tickers).fillna(0.0)
+        detenus = (valeurs != 0).to_numpy()
+        poids = valeurs.to_numpy(dtype=float)[detenus] / valeur_liquidative
+        covariance = self.covariance(date)[np.ix_(detenus, detenus)] * JOURS_PAR_AN
+        exposition = covariance @ poids
+        volatilite = float(np.sqrt(max(poids @ exposition, 0.0)))
+        marginale = exposition / volatilite if volatilite > 0 else np.zeros_like(poids)
+        return pd.DataFrame({
+            "Ticker": self.tickers[detenus],
+            "Poids": poids,
+            "Volatilité": np.sqrt(np.diag(covariance)),
+            "Contribution marginale": marginale,
+            "Contribution totale": poids * marginale,
+            "Part du risque": poids * marginale / volatilite if volatilite > 0 else np.nan,
+        })
+
+
+def get_covariance(results, methode="ewma"):
+    # Historique de covariance construit une fois par jeu de résultats partagés (PortfolioResults) ;
+    # un verrou par clé : deux sessions qui demandent le même historique ne le construisent qu'une fois
+    cle = (results.version, results.capital_initial, results.taux_cash, methode)
+    with _verrou:
+        if cle in _historiques:
+            _historiques.move_to_end(cle)
+            return _historiques[cle]
+        verrou = _verrous.setdefault(cle, threading.Lock())
+
+    with verrou:
+        with _verrou:
+            if cle in _historiques:
+                return _historiques[cle]
+        historique = CovarianceHistory(results.prix, methode)
+        with _verrou:
+            _historiques[cle] = historique
+            while len(_historiques) > NB_HISTORIQUES_MAX:
+                ancienne_cle, _ = _historiques.popitem(last=False)
+                _verrous.pop(ancienne_cle, None)
+            _verrous.pop(cle, None)
+    return historique
+
+
+def clear_covariance():
+    with _verrou:
+        _historiques.clear()
+        _verrous.clear()
@@ -1,34 +1,109 @@
+import time
+import zipfile
+from functools import partial
+
+import numpy as np
 import pandas as pd
-import streamlit as st
 
-@st.cache_data
-def load_data(filepath: str = "data/data.xlsx") -> dict:
+from src import profiling, sqlite_store
+from src.cache import CACHE_DIR, load_sheets, workbook_version
+from src.exceptions import WorkbookFormatError, WorkbookNotFoundError
+from src.price_store import PriceStore
+
+SHEETS = ["Transactions", "Benchmark", "Prix_Titres", "Jour_Marche"]
+# Format des frames produites par la lecture du classeur, clé du cache Parquet (src.cache) :
+# à incrémenter dès que SCHEMAS ou _build_frame changent
+FORMAT_LECTURE = 1
+
+# Types déclarés à la lecture (les colonnes non listées sont inférées).
+# "*" s'applique à toutes les autres colonnes de la feuille.
+SCHEMAS = {
+    "Transactions": {
+        "Date": "datetime64[ns]",
+        "Ticker": "category",
+        "Prix local unitaire": "float64",
+        "Montant total": "float64",
+    },
+    "Benchmark": {"Date": "datetime64[ns]", "Prix": "float64"},
+    "Prix_Titres": {"Date": "datetime64[ns]", "*": "float64"},
+    "Jour_Marche": {"Date": "datetime64[ns]"},
+}
+
+
+def _build_frame(rows, schema):
+    header, *lignes = rows
+    colonnes = [(i, nom) for i, nom in enumerate(header) if nom is not None]
+    lignes = [ligne for ligne in lignes if any(valeur is not None for valeur in ligne)]
+
+    data = {}
+    for i, nom in colonnes:
+        valeurs = [ligne[i] if i < len(ligne) else None for ligne in lignes]
+        dtype = schema.get(nom, schema.get("*"))
+        if dtype == "category":
+            data[nom] = pd.Categorical(valeurs)
+        elif dtype is not None:
+            data[nom] = np.array(valeurs, dtype=dtype)
+        else:
+            data[nom] = pd.Series(valeurs).infer_objects()
+    return pd.DataFrame(data, columns=[nom for _, nom in colonnes])
+
+
+@profiling.timed("lecture Excel")
+def _read_excel_sheets(filepath, sheet_names, timings=None):
+    # Une seule ouverture du classeur, en lecture seule (streaming), pour toutes les feuilles ;
+    # openpyxl n'est importé qu'ici : le cache Parquet sert les lectures suivantes sans lui
+    import openpyxl
+
+    debut = time.perf_counter()
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
     try:
-        # Chargement des feuilles
-        transactions = pd.read_excel(filepath, sheet_name="Transactions")
-        benchmark = pd.read_excel(filepath, sheet_name="Benchmark")
-        prices = pd.read_excel(filepath, sheet_name="Prix_Titres")
-        jours_marche = pd.read_excel(filepath, sheet_name="Jour_Marche")
+        manquantes = [sheet_name for sheet_name in sheet_names if sheet_name not in workbook.sheetnames]
+        if manquantes:
+            raise WorkbookFormatError(f"Feuille(s) absente(s) du classeur : {', '.join(manquantes)}")
+        if timings is not None:
+            timings["Ouverture"] = time.perf_counter() - debut
 
-        # Nettoyage de base
-        transactions["Date"] = pd.to_datetime(transactions["Date"])
-        benchmark["Date"] = pd.to_datetime(benchmark["Date"])
-        prices["Date"] = pd.to_datetime(prices["Date"])
-        jours_marche["Date"] = pd.to_datetime(jours_marche["Date"])
+        frames = {}
+        for sheet_name in sheet_names:
+            debut = time.perf_counter()
+            rows = list(workbook[sheet_name].iter_rows(values_only=True))
+            frames[sheet_name] = _build_frame(rows, SCHEMAS.get(sheet_name, {}))
+            if timings is not None:
+                timings[sheet_name] = time.perf_counter() - debut
+        return frames
+    finally:
+        workbook.close()
+
+
+@profiling.timed("load_data")
+def load_data(filepath: str = "data/data.xlsx", prices_dtype: str = "float64", cache_dir: str = CACHE_DIR) -> dict:
+    # Sans dépendance à Streamlit : utilisable depuis les workers, scripts et benchmarks.
+    # Lève WorkbookNotFoundError / WorkbookFormatError (voir src.exceptions).
+    # Une base SQLite (.sqlite, .db) est servie par src.sqlite_store, avec le même contrat
+    if str(filepath).endswith(sqlite_store.EXTENSIONS):
+        return sqlite_store.load_data(filepath, prices_dtype)
+    try:
+        # Chargement des feuilles (cache Parquet sur disque, lecture Excel si le classeur a changé)
+        timings = {}
+        sheets = load_sheets(filepath, SHEETS, reader=partial(_read_excel_sheets, timings=timings), cache_dir=cache_dir,
+                             format_lecteur=FORMAT_LECTURE)
 
-        # Format long pour les prix
-        prices_long = prices.melt(id_vars=["Date"], var_name="Ticker", value_name="Prix")
+        # Prix conservés au format large (matrice dates x tickers), float32 possible
+        prices = PriceStore.from_wide(sheets["Prix_Titres"], dtype=prices_dtype)
 
         return {
-            "transactions": transactions,
-            "benchmark": benchmark,
-            "prices": prices_long,
-            "jours_marche": jours_marche
+            "transactions": sheets["Transactions"],
+            "benchmark": sheets["Benchmark"],
+            "prices": prices,
+            # Un jour de marché saisi deux fois ne compte qu'une fois (une ligne du rapport par jour)
+            "jours_marche": sheets["Jour_Marche"].drop_duplicates("Date", ignore_index=True),
+            "timings": timings,  # secondes par feuille (vide si servi par le cache)
+            "version": workbook_version(filepath, cache_dir)  # hash du classeur, clé des résultats partagés
         }
 
-    except FileNotFoundError:
-        st.error("Fichier `data.xlsx` non trouvé dans le dossier `data/`.")
-        st.stop()
-    except ValueError as e:
-        st.error(f"Erreur lors du chargement des feuilles Excel : {e}")
-        st.stop()
+    except WorkbookFormatError:
+        raise
+    except FileNotFoundError as e:
+        raise WorkbookNotFoundError(f"Fichier de données introuvable : {filepath}") from e
+    except (ValueError, KeyError, OSError, zipfile.BadZipFile) as e:
+        raise WorkbookFormatError(f"Erreur lors du chargement des feuilles Excel : {e}") from e
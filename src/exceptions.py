@@ -0,0 +1,23 @@
+class DataLoadError(Exception):
+    # Erreur de chargement des données du fonds
+    pass
+
+
+class WorkbookNotFoundError(DataLoadError, FileNotFoundError):
+    # Classeur de données introuvable
+    pass
+
+
+class WorkbookFormatError(DataLoadError, ValueError):
+    # Classeur illisible ou feuille / colonne attendue absente
+    pass
+
+
+class StoreNotFoundError(DataLoadError, FileNotFoundError):
+    # Base SQLite introuvable (voir src.sqlite_store)
+    pass
+
+
+class StoreFormatError(DataLoadError, ValueError):
+    # Base SQLite illisible ou incomplète
+    pass
@@ -0,0 +1,297 @@
+import argparse
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+
+from src.data_loader import load_data
+from src.exceptions import DataLoadError
+from src.reporting import KPIS_MENSUELS, mois_disponibles, rapport_mensuel, tickers_gics
+from src.results import get_portfolio_results
+
+EXPORT_DIR = "exports/reporting"
+MANIFEST_FILE = "manifest.json"
+FORMATS = ("xlsx", "html")
+# À incrémenter quand la mise en forme change : force la régénération de tous les mois
+FORMAT_EXPORT = 3
+
+TITRE_GRAPHIQUE = "Évolution comparée VL vs Benchmark"
+# Couleurs par défaut des traces plotly, pour rester fidèle à la page Reporting
+COULEURS = {"VL normalisée": (99, 110, 250), "Benchmark normalisé": (239, 85, 59)}
+
+
+# --- Empreinte d'un mois et manifeste des exports ---
+
+def _empreinte(rapport, formats):
+    # Hash du contenu du reporting : un mois dont les entrées n'ont pas changé n'est pas réécrit
+    h = hashlib.sha256(f"{FORMAT_EXPORT}|{','.join(sorted(formats))}|{rapport.dernier_jour}".encode())
+    for df in (rapport.positions, rapport.repartition_gics, rapport.evolution, rapport.pnl,
+               rapport.attribution):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(rapport.kpis.to_json(date_format="iso").encode())
+    return h.hexdigest()
+
+
+def _chemin(dossier, mois, fmt):
+    return os.path.join(dossier, f"reporting_{mois}.{fmt}")
+
+
+def _lire_manifest(dossier):
+    try:
+        with open(os.path.join(dossier, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ecrire_manifest(dossier, manifest):
+    contenu = json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+    _ecrire_atomique(os.path.join(dossier, MANIFEST_FILE), contenu)
+
+
+# --- Rendu ---
+
+def _police(taille=12):
+    # Police système avec accents si disponible, sinon police intégrée de Pillow
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", taille)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _graphique_png(evolution, largeur=900, hauteur=420):
+    # Graphique statique VL vs benchmark (base 100), rendu sans navigateur ni kaleido
+    image = Image.new("RGB", (largeur, hauteur), "white")
+    dessin = ImageDraw.Draw(image)
+    police = _police()
+    gauche, droite, haut, bas = 60, largeur - 20, 40, hauteur - 50
+    dessin.text((gauche, 12), TITRE_GRAPHIQUE, fill="black", font=police)
+    if evolution.empty:
+        dessin.text((gauche, hauteur // 2), "Pas assez de données pour tracer les courbes.", fill="gray", font=police)
+        return _png(image)
+
+    series = evolution[list(COULEURS)].to_numpy(dtype=float)
+    y_min, y_max = float(series.min()), float(series.max())
+    if y_max - y_min < 1e-9:
+        y_min, y_max = y_min - 1, y_max + 1
+    n = len(evolution)
+
+    def x_pixel(i):
+        return gauche + (droite - gauche) * (i / (n - 1) if n > 1 else 0.5)
+
+    def y_pixel(valeur):
+        return bas - (bas - haut) * (valeur - y_min) / (y_max - y_min)
+
+    # Grille horizontale et axe des valeurs
+    for k in range(5):
+        valeur = y_min + (y_max - y_min) * k / 4
+        y = y_pixel(valeur)
+        dessin.line([(gauche, y), (droite, y)], fill=(230, 230, 230))
+        dessin.text((6, y - 6), f"{valeur:.1f}", fill="black", font=police)
+    dessin.rectangle([gauche, haut, droite, bas], outline=(180, 180, 180))
+
+    # Dates : premier, milieu et dernier jour
+    dates = pd.DatetimeIndex(evolution["Date"])
+    for i in sorted({0, (n - 1) // 2, n - 1}):
+        libelle = dates[i].strftime("%d/%m/%Y")
+        largeur_texte = dessin.textlength(libelle, font=police)
+        x = min(max(x_pixel(i) - largeur_texte / 2, gauche), droite - largeur_texte)
+        dessin.text((x, bas + 8), libelle, fill="black", font=police)
+
+    for (nom, couleur), valeurs in zip(COULEURS.items(), series.T):
+        points = [(x_pixel(i), y_pixel(v)) for i, v in enumerate(valeurs)]
+        if len(points) > 1:
+            dessin.line(points, fill=couleur, width=2)
+        else:
+            x, y = points[0]
+            dessin.ellipse([x - 3, y - 3, x + 3, y + 3], fill=couleur)
+
+    # Légende
+    x_legende = gauche
+    for nom, couleur in COULEURS.items():
+        dessin.line([(x_legende, bas + 32), (x_legende + 20, bas + 32)], fill=couleur, width=3)
+        dessin.text((x_legende + 26, bas + 26), nom, fill="black", font=police)
+        x_legende += 200
+    return _png(image)
+
+
+def _png(image):
+    tampon = io.BytesIO()
+    image.save(tampon, format="PNG")
+    return tampon.getvalue()
+
+
+def _table_kpis(rapport):
+    return pd.DataFrame(
+        [(libelle, fmt.format(rapport.kpis[cle])) for libelle, (cle, fmt) in KPIS_MENSUELS.items()],
+        columns=["Indicateur", "Valeur"]
+    )
+
+
+def _ecrire_excel(rapport, chemin, png):
+    from openpyxl.drawing.image import Image as ImageExcel
+
+    tampon = io.BytesIO()
+    with pd.ExcelWriter(tampon, engine="openpyxl") as writer:
+        entete = pd.DataFrame({
+            "Mois": [rapport.mois.strftime("%B %Y")],
+            "Dernier jour de marché": [rapport.dernier_jour.strftime("%d/%m/%Y")],
+        })
+        entete.to_excel(writer, sheet_name="KPIs", index=False)
+        _table_kpis(rapport).to_excel(writer, sheet_name="KPIs", index=False, startrow=3)
+        rapport.positions.to_excel(writer, sheet_name="Positions", index=False)
+        rapport.repartition_gics.to_excel(writer, sheet_name="GICS", index=False)
+        rapport.pnl.to_excel(writer, sheet_name="P&L", index=False)
+        rapport.attribution.to_excel(writer, sheet_name="Attribution", index=False)
+        rapport.evolution.to_excel(writer, sheet_name="Evolution", index=False)
+        writer.book["Evolution"].add_image(ImageExcel(io.BytesIO(png)), "E2")
+    _ecrire_atomique(chemin, tampon.getvalue())
+
+
+def _ecrire_html(rapport, chemin, png):
+    formats_positions = {"Prix": "{:.2f}".format, "Valeur": "{:.2f}".format, "Poids %": "{:.2f}%".format}
+    formats_pnl = {"Coût de revient": "{:.2f}".format, "P&L réalisé": "{:.2f}".format,
+                   "P&L latent": "{:.2f}".format, "Contribution %": "{:.2f}%".format}
+    titre = f"Reporting mensuel - {rapport.mois.strftime('%B %Y')}"
+    contenu = f"""<!DOCTYPE html>
+<html lang="fr">
+<head><meta charset="utf-8"><title>{html.escape(titre)}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;margin-bottom:1.5em}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:right}}</style></head>
+<body>
+<h1>{html.escape(titre)}</h1>
+<p>Dernier jour de marché du mois : <b>{rapport.dernier_jour.strftime('%d/%m/%Y')}</b></p>
+<h2>Position du portefeuille à la fin du mois</h2>
+{rapport.positions.to_html(index=False, formatters=formats_positions)}
+<h2>P&amp;L par ligne sur le mois</h2>
+{rapport.pnl.to_html(index=False, formatters=formats_pnl, na_rep="N/A")}
+<h2>Répartition par GICS</h2>
+{rapport.repartition_gics.to_html(index=False, float_format="{:.2f}%".format)}
+<h2>Attribution sectorielle</h2>
+{rapport.attribution.to_html(index=False, float_format="{:.2f}%".format, na_rep="")}
+<h2>Indicateurs de performance</h2>
+{_table_kpis(rapport).to_html(index=False)}
+<h2>{html.escape(TITRE_GRAPHIQUE)}</h2>
+<img alt="{html.escape(TITRE_GRAPHIQUE)}" src="data:image/png;base64,{base64.b64encode(png).decode()}">
+</body>
+</html>
+"""
+    _ecrire_atomique(chemin, contenu.encode("utf-8"))
+
+
+def _ecrire_atomique(chemin, contenu):
+    # Un export interrompu ne laisse pas de fichier tronqué sous le nom final ; fichier temporaire
+    # propre à l'écrivain : deux exports simultanés ne s'écrasent pas
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(chemin) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contenu)
+        os.replace(tmp_path, chemin)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _exporter_mois(rapport, dossier, formats):
+    # Exécuté dans un processus de rendu : le rapport ne contient que les données du mois
+    png = _graphique_png(rapport.evolution)
+    chemins = []
+    for fmt in formats:
+        chemin = _chemin(dossier, rapport.mois, fmt)
+        if fmt == "xlsx":
+            _ecrire_excel(rapport, chemin, png)
+        elif fmt == "html":
+            _ecrire_html(rapport, chemin, png)
+        chemins.append(chemin)
+    return str(rapport.mois), chemins
+
+
+# --- Export de tous les mois ---
+
+def export_monthly_reports(data, dossier=EXPORT_DIR, formats=FORMATS, capital_initial=100_000, taux_cash=0.03,
+                           max_workers=None, force=False):
+    # Génère le reporting de chaque mois disponible. Le rapport journalier et les KPIs sont
+    # calculés une fois ; seuls les mois dont l'empreinte a changé sont rendus, en parallèle.
+    formats = tuple(formats)
+    inconnus = set(formats) - set(FORMATS)
+    if inconnus:
+        raise ValueError(f"Formats d'export non pris en charge : {', '.join(sorted(inconnus))}")
+    os.makedirs(dossier, exist_ok=True)
+
+    results = get_portfolio_results(data, capital_initial=capital_initial, taux_cash=taux_cash)
+    gics = tickers_gics(data["transactions"])
+    manifest = {} if force else _lire_manifest(dossier)
+
+    a_rendre, inchanges, empreintes = [], [], {}
+    for mois in mois_disponibles(results):
+        rapport = rapport_mensuel(results, gics, mois)
+        if rapport is None:
+            continue
+        cle = str(mois)
+        empreintes[cle] = _empreinte(rapport, formats)
+        fichiers_presents = all(os.path.exists(_chemin(dossier, mois, fmt)) for fmt in formats)
+        if manifest.get(cle) == empreintes[cle] and fichiers_presents:
+            inchanges.append(cle)
+        else:
+            a_rendre.append(rapport)
+
+    exportes = {}
+    max_workers = min(max_workers or os.cpu_count() or 1, len(a_rendre))
+    try:
+        if max_workers <= 1:
+            for rapport in a_rendre:
+                cle, chemins = _exporter_mois(rapport, dossier, formats)
+                exportes[cle] = chemins
+                manifest[cle] = empreintes[cle]
+        else:
+            with ProcessPoolExecutor(max_workers) as pool:
+                futures = [pool.submit(_exporter_mois, rapport, dossier, formats) for rapport in a_rendre]
+                for future in as_completed(futures):
+                    cle, chemins = future.result()
+                    exportes[cle] = chemins
+                    manifest[cle] = empreintes[cle]
+    finally:
+        # Les mois déjà rendus restent acquis même si un rendu échoue
+        _ecrire_manifest(dossier, manifest)
+
+    return {"exportes": dict(sorted(exportes.items())), "inchanges": sorted(inchanges)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export hors ligne de tous les reportings mensuels.")
+    parser.add_argument("--fichier", default="data/data.xlsx", help="classeur source")
+    parser.add_argument("--dossier", default=EXPORT_DIR, help="dossier de sortie")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--capital", type=float, default=100_000, help="capital initial")
+    parser.add_argument("--taux-cash", type=float, default=0.03, help="rémunération annuelle du cash")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus de rendu")
+    parser.add_argument("--force", action="store_true", help="régénère aussi les mois inchangés")
+    args = parser.parse_args(argv)
+
+    try:
+        data = load_data(args.fichier)
+    except DataLoadError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    resultat = export_monthly_reports(
+        data, dossier=args.dossier, formats=args.formats, capital_initial=args.capital,
+        taux_cash=args.taux_cash, max_workers=args.workers, force=args.force
+    )
+    for mois, chemins in resultat["exportes"].items():
+        print(f"{mois} : {', '.join(chemins)}")
+    print(f"{len(resultat['exportes'])} mois exporté(s), {len(resultat['inchanges'])} inchangé(s) "
+          f"dans {args.dossier}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+MOIS_ORDRE = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# Colonne des totaux annuels (pour l'année en cours : performance YTD)
+COLONNE_TOTAL = "Total"
+SERIE_PTF = "Ptf"
+SERIE_BENCH = "Bench"
+
+
+def _perf_par_mois(df, colonne, series, niveau_initial=None):
+    # Performance de chaque (série, mois) depuis la dernière clôture du mois précédent : les mois composés
+    # couvrent toute la période, sans trou aux changements de mois. Premier mois d'une série : depuis
+    # `niveau_initial` (capital de départ) s'il est connu, sinon depuis son premier niveau
+    mois = df["Mois"] if "Mois" in df.columns else df["Date"].dt.to_period("M")
+    niveaux = df.assign(Serie=series, Mois=mois).sort_values(["Serie", "Date"], kind="stable")
+    bornes = niveaux.groupby(["Serie", "Mois"], sort=False)[colonne].agg(["first", "last"])
+    base = bornes["last"].groupby(level="Serie", sort=False).shift(1)
+    if niveau_initial is not None:
+        premier_mois = base.groupby(level="Serie", sort=False).cumcount() == 0
+        base = base.where(~premier_mois, niveau_initial)
+    base = base.fillna(bornes["first"])
+    return (bornes["last"] / base - 1).rename("Perf")
+
+
+def compute_monthly_calendar(report, benchmark, totaux=False, serie="Scenario", capital_initial=None):
+    # Tableau calendrier des performances mensuelles : une ligne "<année> - Ptf" et
+    # "<année> - Bench" par année, une colonne par mois (NaN si le mois est absent).
+    # Si `report` contient la colonne `serie` (ex. panel de src.scenarios), une ligne par fonds / scénario.
+    # totaux=True ajoute la colonne "Total" : mois de l'année composés, soit la performance depuis la clôture
+    # de l'année précédente (YTD pour l'année en cours), comme la table des KPIs (src.utils).
+    # capital_initial : niveau du fonds avant son premier jour (première année mesurée depuis le capital)
+    series = report[serie].astype(str) if serie in report.columns else SERIE_PTF
+    perf_ptf = _perf_par_mois(report, "Valeur Liquidative", series, niveau_initial=capital_initial)
+    perf_bench = _perf_par_mois(benchmark, "Prix", SERIE_BENCH)
+
+    # Mois communs au fonds et au benchmark, comme la fusion des deux performances
+    mois_bench = perf_bench.index.get_level_values("Mois")
+    perf_ptf = perf_ptf[perf_ptf.index.get_level_values("Mois").isin(mois_bench)]
+    perf_bench = perf_bench[mois_bench.isin(perf_ptf.index.get_level_values("Mois"))]
+    perf = pd.concat([perf_ptf, perf_bench]).reset_index()
+    perf = perf[perf["Perf"].notna()]
+    if perf.empty:
+        return pd.DataFrame(columns=MOIS_ORDRE + ([COLONNE_TOTAL] if totaux else []),
+                            index=pd.Index([], name="Année"), dtype=float)
+
+    perf["Année"] = perf["Mois"].dt.year
+    perf["Mois_Num"] = perf["Mois"].dt.month
+    ordre_series = {nom: k for k, nom in enumerate(pd.unique(perf["Serie"]))}
+    perf["Ordre"] = perf["Serie"].map(ordre_series)
+
+    # Un seul pivot (année, série) x mois
+    table = perf.pivot_table(index=["Année", "Ordre", "Serie"], columns="Mois_Num", values="Perf", aggfunc="first")
+    table = table.reindex(columns=range(1, 13))
+    table.columns = MOIS_ORDRE
+    if totaux:
+        table[COLONNE_TOTAL] = np.expm1(np.log1p(table[MOIS_ORDRE]).sum(axis=1, min_count=1))
+
+    annees = table.index.get_level_values("Année")
+    noms = table.index.get_level_values("Serie")
+    table.index = pd.Index([f"{annee} - {nom}" for annee, nom in zip(annees, noms)], name="Année")
+    return table.round(4)
+
+
+def style_calendar(table):
+    # Mise en forme : pourcentages, vert si positif, rouge sinon (une passe sur tout le tableau)
+    valeurs = table.to_numpy(dtype=float)
+    couleurs = np.where(valeurs > 0, "color: green", np.where(np.isnan(valeurs), "", "color: red"))
+    return (table.style
+            .format("{:.2%}", na_rep="")
+            .apply(lambda _: pd.DataFrame(couleurs, index=table.index, columns=table.columns), axis=None))
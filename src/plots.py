@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Budget de points par trace : deux points par pixel d'un graphique pleine largeur suffisent
+# au rendu ; au-delà, le navigateur reçoit des points qu'il ne peut pas afficher
+LARGEUR_PX = 1200
+POINTS_MAX = 2 * LARGEUR_PX
+# Au-delà de ce nombre de points d'origine, traces WebGL (Scattergl) plutôt que SVG
+SEUIL_WEBGL = 1000
+NB_FIGURES_MAX = 32
+
+_figures = OrderedDict()
+_verrou = threading.Lock()
+
+
+def lttb(x, y, seuil):
+    # Largest-Triangle-Three-Buckets : indices des `seuil` points qui préservent la forme de la courbe
+    n = len(y)
+    if seuil >= n or seuil < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bornes = np.linspace(1, n - 1, seuil - 1).astype(np.int64)
+    bornes = np.append(bornes, n)
+    indices = np.empty(seuil, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for k in range(seuil - 2):
+        debut, fin = bornes[k], bornes[k + 1]
+        # Sommet fixe : moyenne du seau suivant
+        mx, my = x[fin:bornes[k + 2]].mean(), y[fin:bornes[k + 2]].mean()
+        aires = np.abs((x[a] - mx) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (my - y[a]))
+        a = debut + int(np.argmax(aires))
+        indices[k + 1] = a
+    return indices
+
+
+def minmax(y, seuil):
+    # Min et max de chaque seau (seuil / 2 seaux) : conserve les extrêmes, entièrement vectorisé
+    n = len(y)
+    if seuil >= n or seuil < 4:
+        return np.arange(n)
+    nb_seaux = seuil // 2
+    bornes = np.linspace(0, n, nb_seaux + 1).astype(np.int64)
+    seau = np.repeat(np.arange(nb_seaux), np.diff(bornes))
+    ordre = np.lexsort((np.asarray(y, dtype=float), seau))
+    return np.unique(np.concatenate([[0], ordre[bornes[:-1]], ordre[bornes[1:] - 1], [n - 1]]))
+
+
+def downsample(x, y, points_max=POINTS_MAX, methode="lttb"):
+    # Sous-échantillonne une série (x trié) au budget de points ; les NaN sont écartés
+    x = pd.Series(x).reset_index(drop=True)
+    y = pd.Series(y, dtype=float).reset_index(drop=True)
+    valides = y.notna().to_numpy()
+    x, y = x[valides], y[valides]
+    if len(y) <= points_max:
+        return x.to_numpy(), y.to_numpy()
+    x_num = x.to_numpy().astype("datetime64[ns]").astype(np.int64) if pd.api.types.is_datetime64_any_dtype(x) \
+        else x.to_numpy(dtype=float)
+    indices = lttb(x_num, y.to_numpy(), points_max) if methode == "lttb" else minmax(y.to_numpy(), points_max)
+    return x.to_numpy()[indices], y.to_numpy()[indices]
+
+
+def _go():
+    # Import différé : plotly n'est chargé qu'à la construction du premier graphique
+    import plotly.graph_objects as go
+    return go
+
+
+def _trace(x, y, nom, nb_points):
+    go = _go()
+    classe = go.Scattergl if nb_points > SEUIL_WEBGL else go.Scatter
+    return classe(x=x, y=y, name=nom, mode="lines")
+
+
+def line_chart(df, x, y, color=None, labels=None, title=None, points_max=POINTS_MAX, methode="lttb"):
+    # Équivalent de px.line (y : colonne ou liste de colonnes, color : colonne de regroupement)
+    # avec une trace sous-échantillonnée par série et WebGL pour les séries longues
+    labels = labels or {}
+    df = df.sort_values(x)
+    if color is not None:
+        series = [(str(nom), groupe[x], groupe[y]) for nom, groupe in df.groupby(color, sort=False)]
+        titre_y, titre_legende = labels.get(y, y), labels.get(color, color)
+    else:
+        colonnes = [y] if isinstance(y, str) else list(y)
+        series = [(colonne, df[x], df[colonne]) for colonne in colonnes]
+        titre_y = labels.get(y, y) if isinstance(y, str) else labels.get("value", "value")
+        titre_legende = labels.get("variable", "variable")
+
+    fig = _go().Figure([_trace(*downsample(xs, ys, points_max, methode), nom, len(ys)) for nom, xs, ys in series])
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=titre_y,
+        legend_title_text=titre_legende,
+    )
+    return fig
+
+
+def pie_chart(df, names, values, hole=0.3):
+    # Équivalent de px.pie, sans charger plotly.express
+    go = _go()
+    return go.Figure(go.Pie(labels=df[names], values=df[values], hole=hole))
+
+
+def cached_figure(cle, construire):
+    # Figure construite une fois par clé (version des données + paramètres du graphique) ;
+    # partagée entre sessions, à traiter en lecture seule
+    with _verrou:
+        if cle in _figures:
+            _figures.move_to_end(cle)
+            return _figures[cle]
+    fig = construire()
+    with _verrou:
+        _figures[cle] = fig
+        while len(_figures) > NB_FIGURES_MAX:
+            _figures.popitem(last=False)
+    return fig
+
+
+def clear_figures():
+    with _verrou:
+        _figures.clear()
@@ -0,0 +1,196 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.compute_engine import SENS_OPERATIONS
+
+# Méthodes de coût de revient : prix moyen pondéré, ou premier entré premier sorti
+METHODES_PNL = ("pmp", "fifo")
+METHODE_PNL = "pmp"
+# Amplitude maximale (en log) du produit des coefficients dans un bloc de _recurrence_lineaire
+LOG_ECHELLE_MAX = 300.0
+
+
+class PnLPanel(NamedTuple):
+    # P&L par ligne, en colonnes (jours de marché x tickers) :
+    # coût de revient des lots ouverts (signé : négatif pour un short), P&L réalisé cumulé, P&L latent
+    dates: pd.DatetimeIndex
+    tickers: pd.Index
+    methode: str
+    cout_revient: np.ndarray
+    pnl_realise: np.ndarray
+    pnl_latent: np.ndarray      # NaN si la ligne détenue n'a pas de prix exploitable
+
+    @property
+    def pnl_total(self):
+        return self.pnl_realise + self.pnl_latent
+
+    def position(self, date):
+        # Ligne du jour de marché `date`, None si la date n'en est pas un
+        i = self.dates.get_indexer([pd.Timestamp(date)])[0]
+        return None if i < 0 else int(i)
+
+    def at(self, date):
+        # P&L du jour indexé par ticker
+        i = self.position(date)
+        if i is None:
+            return None
+        return pd.DataFrame({
+            "Coût de revient": self.cout_revient[i],
+            "P&L réalisé": self.pnl_realise[i],
+            "P&L latent": self.pnl_latent[i],
+        }, index=self.tickers)
+
+    def to_frame(self):
+        # Format long : une ligne par (jour, ticker)
+        return pd.DataFrame({
+            "Date": np.repeat(self.dates, len(self.tickers)),
+            "Ticker": np.tile(self.tickers.to_numpy(), len(self.dates)),
+            "Coût de revient": self.cout_revient.ravel(),
+            "P&L réalisé": self.pnl_realise.ravel(),
+            "P&L latent": self.pnl_latent.ravel(),
+        })
+
+
+def _cumsum_par_groupe(valeurs, debut):
+    # Somme cumulée relancée à chaque ligne où `debut` est vrai (par groupe : pas de soustraction
+    # d'un cumul global, qui perdrait la précision des petits groupes après de grandes valeurs)
+    return pd.Series(valeurs).groupby(np.cumsum(debut)).cumsum().to_numpy()
+
+
+def _recurrence_lineaire(a, b):
+    # y_t = a_t * y_{t-1} + b_t (y_{-1} = 0) sans boucle par ligne : y_t = A_t * somme_s b_s / A_s, avec
+    # A le produit cumulé des a, relancé à chaque a_t = 0. Le produit est recalé par blocs d'amplitude
+    # LOG_ECHELLE_MAX pour rester représentable ; les blocs successifs se raccordent par une boucle
+    # sur les seuls changements de bloc (rares : il faut un facteur e^-300 dans un même segment)
+    n = len(a)
+    if not n:
+        return np.zeros(0)
+    reprise = a == 0
+    reprise[0] = True
+    with np.errstate(divide="ignore"):
+        log_a = np.where(reprise, 0.0, np.log(a))
+    log_cumul = _cumsum_par_groupe(log_a, reprise)
+    segment = np.cumsum(reprise)
+    bloc = np.floor(-log_cumul / LOG_ECHELLE_MAX).astype(np.int64)
+    debut_bloc = reprise | (bloc != np.roll(bloc, 1)) | (segment != np.roll(segment, 1))
+
+    depart = np.flatnonzero(debut_bloc)
+    taille = np.diff(np.append(depart, n))
+    relatif = log_cumul - np.repeat(log_cumul[depart], taille)
+    y = np.exp(relatif) * _cumsum_par_groupe(b * np.exp(-relatif), debut_bloc)
+
+    # Raccord des blocs qui prolongent un segment : report de la fin du bloc précédent
+    for k in np.flatnonzero(~reprise[depart]):
+        debut, fin = depart[k], depart[k] + taille[k]
+        precedent = debut - 1
+        y[debut:fin] += y[precedent] * np.exp(log_cumul[debut:fin] - log_cumul[precedent])
+    return y
+
+
+def _operations(transactions, dates, tickers):
+    # Opérations des jours de marché triées par (ticker, jour, ordre de saisie), quantités signées
+    tx = transactions[transactions["Date"].isin(dates)]
+    sens = tx["Type"].str.lower().map(SENS_OPERATIONS).fillna(0).to_numpy()
+    quantite = sens * tx["Nb actions"].to_numpy(dtype=float)
+    garder = quantite != 0
+    i_jour = dates.get_indexer(tx["Date"])[garder]
+    j_ticker = pd.Index(tickers).get_indexer(tx["Ticker"])[garder]
+    quantite = quantite[garder]
+    prix = tx["Prix local unitaire"].to_numpy(dtype=float)[garder]
+    frais = tx["Frais"].to_numpy(dtype=float)[garder]
+
+    ordre = np.lexsort((np.arange(len(quantite)), i_jour, j_ticker))
+    return i_jour[ordre], j_ticker[ordre], quantite[ordre], prix[ordre], frais[ordre]
+
+
+def _scinder_retournements(j_ticker, quantite, frais, *colonnes):
+    # Une opération qui fait passer la position de long à short (ou l'inverse) devient deux lignes :
+    # clôture jusqu'à zéro puis ouverture du reliquat, les frais répartis au prorata des quantités
+    debut_ticker = np.r_[True, j_ticker[1:] != j_ticker[:-1]][:len(j_ticker)]
+    apres = _cumsum_par_groupe(quantite, debut_ticker)
+    avant = apres - quantite
+    retournement = avant * apres < 0
+
+    repetitions = 1 + retournement
+    lignes = np.repeat(np.arange(len(quantite)), repetitions)
+    seconde = np.zeros(len(lignes), dtype=bool)
+    seconde[np.cumsum(repetitions)[retournement] - 1] = True
+    premiere = np.repeat(retournement, repetitions) & ~seconde
+
+    avant, apres = avant[lignes], apres[lignes]
+    nouvelle_quantite = quantite[lignes]
+    nouvelle_quantite[premiere] = -avant[premiere]
+    nouvelle_quantite[seconde] = apres[seconde]
+    avant[seconde] = 0.0
+    nouveaux_frais = frais[lignes] * np.abs(nouvelle_quantite) / np.abs(quantite[lignes])
+    return (j_ticker[lignes], nouvelle_quantite, nouveaux_frais, avant, avant + nouvelle_quantite,
+            *(colonne[lignes] for colonne in colonnes))
+
+
+def _cout_libere_fifo(ouverture, quantite, cout, episode):
+    # Coût des lots consommés par chaque clôture, les plus anciens d'abord. Les quantités ouvertes,
+    # mises bout à bout, forment un axe sur lequel le coût cumulé est linéaire par morceaux (un
+    # morceau par lot) : une clôture couvre l'intervalle suivant les quantités déjà clôturées de l'épisode
+    ouvert = np.where(ouverture, np.abs(quantite), 0.0)
+    axe = np.cumsum(ouvert)
+    axe_lots = np.r_[0.0, axe[ouverture]]
+    cout_lots = np.r_[0.0, np.cumsum(np.where(ouverture, cout, 0.0))[ouverture]]
+
+    depart = np.flatnonzero(episode)
+    origine = np.repeat((axe - ouvert)[depart], np.diff(np.append(depart, len(quantite))))
+    ferme = np.where(ouverture, 0.0, np.abs(quantite))
+    cloture_apres = origine + _cumsum_par_groupe(ferme, episode)
+    libere = np.interp(cloture_apres, axe_lots, cout_lots) - np.interp(cloture_apres - ferme, axe_lots, cout_lots)
+    return np.where(ouverture, 0.0, libere)
+
+
+def compute_pnl(transactions, prix, methode=METHODE_PNL):
+    # P&L par ligne et par jour de marché, sur les axes des prix résolus `prix` (src.price_store.ResolvedPrices,
+    # ex. PortfolioResults.prix). Les frais d'une ouverture entrent dans le coût de revient, ceux d'une
+    # clôture viennent en déduction du réalisé : réalisé + latent = valeur des titres + flux de cash des opérations
+    if methode not in METHODES_PNL:
+        raise ValueError(f"Méthode de coût de revient inconnue : {methode!r}")
+    dates, tickers = prix.dates, prix.tickers
+    i_jour, j_ticker, quantite, prix_unitaire, frais = _operations(transactions, dates, tickers)
+    j_ticker, quantite, frais, avant, apres, i_jour, prix_unitaire = _scinder_retournements(
+        j_ticker, quantite, frais, i_jour, prix_unitaire)
+
+    ouverture = np.abs(apres) > np.abs(avant)
+    # Montant décaissé par l'opération (encaissé si négatif)
+    decaisse = quantite * prix_unitaire + frais
+    debut_ticker = np.r_[True, j_ticker[1:] != j_ticker[:-1]][:len(j_ticker)]
+    # Épisode : suite d'opérations d'un ticker entre deux positions nulles (sens constant)
+    episode = debut_ticker | (np.roll(apres, 1) == 0)
+
+    if methode == "fifo":
+        libere = _cout_libere_fifo(ouverture, quantite, decaisse, episode)
+        cout_revient = _cumsum_par_groupe(np.where(ouverture, decaisse, -libere), episode)
+    else:
+        # Coût moyen : une clôture libère la fraction clôturée du coût de revient, une ouverture l'augmente
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(ouverture, 1.0, np.abs(apres) / np.abs(avant))
+        a[episode] = 0.0
+        b = np.where(ouverture, decaisse, 0.0)
+        cout_revient = _recurrence_lineaire(a, b)
+        precedent = np.where(episode, 0.0, np.roll(cout_revient, 1))
+        libere = np.where(ouverture, 0.0, precedent - cout_revient)
+    realise = np.where(ouverture, 0.0, -decaisse - libere)
+
+    # Passage aux matrices journalières : dernier état du jour, report sur les jours sans opération
+    nb_jours, nb_tickers = len(dates), len(tickers)
+    dernier = np.r_[(j_ticker[1:] != j_ticker[:-1]) | (i_jour[1:] != i_jour[:-1]), True][:len(i_jour)]
+    lignes = np.full((nb_jours, nb_tickers), -1, dtype=np.int64)
+    lignes[i_jour[dernier], j_ticker[dernier]] = np.flatnonzero(dernier)
+    lignes = np.maximum.accumulate(lignes, axis=0)
+    connu = lignes >= 0
+    quantite_jour = np.where(connu, np.r_[apres, 0.0][lignes], 0.0)
+    # Position soldée : coût de revient nul (sans le résidu d'arrondi des lots consommés)
+    cout_jour = np.where(connu & (quantite_jour != 0), np.r_[cout_revient, 0.0][lignes], 0.0)
+
+    realise_jour = np.zeros((nb_jours, nb_tickers))
+    np.add.at(realise_jour, (i_jour, j_ticker), realise)
+    with np.errstate(invalid="ignore"):
+        latent = np.where(quantite_jour == 0, 0.0, quantite_jour * prix.values - cout_jour)
+    return PnLPanel(dates, tickers, methode, cout_jour, np.cumsum(realise_jour, axis=0), latent)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# Au-delà de ce nombre de tickers, une matrice creuse est utilisée si peu de lignes sont détenues
+SEUIL_TICKERS_CREUX = 500
+DENSITE_MAX_CREUX = 0.1
+
+
+def _compacter(quantites):
+    # Entiers sur 32 bits quand les quantités le permettent
+    if np.issubdtype(quantites.dtype, np.integer) and quantites.size:
+        if np.abs(quantites).max() < np.iinfo(np.int32).max:
+            return quantites.astype(np.int32)
+    return quantites
+
+
+class PositionHistory:
+    # Historique des positions : matrice (jours x tickers) dense ou creuse (CSR)
+
+    def __init__(self, dates, tickers, quantites):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = pd.Index(tickers, dtype=object)
+        self.quantites = quantites
+        self.ligne_par_date = {date: i for i, date in enumerate(self.dates)}
+
+    @classmethod
+    def from_array(cls, dates, tickers, quantites, sparse=None):
+        quantites = _compacter(np.asarray(quantites))
+        if sparse is None:
+            densite = np.count_nonzero(quantites) / quantites.size if quantites.size else 1.0
+            sparse = quantites.shape[1] > SEUIL_TICKERS_CREUX and densite < DENSITE_MAX_CREUX
+        if sparse:
+            from scipy.sparse import csr_array
+            quantites = csr_array(quantites)
+        return cls(dates, tickers, quantites)
+
+    @classmethod
+    def from_records(cls, dates, records):
+        # Conversion depuis l'ancienne colonne "Positions" (un dict par jour)
+        tickers = list(dict.fromkeys(ticker for record in records for ticker in record))
+        quantites = np.array([[record.get(ticker, 0) for ticker in tickers] for record in records])
+        return cls.from_array(dates, tickers, quantites.reshape(len(records), len(tickers)))
+
+    @property
+    def is_sparse(self):
+        return not isinstance(self.quantites, np.ndarray)
+
+    @property
+    def nbytes(self):
+        if self.is_sparse:
+            return self.quantites.data.nbytes + self.quantites.indices.nbytes + self.quantites.indptr.nbytes
+        return self.quantites.nbytes
+
+    def __len__(self):
+        return len(self.dates)
+
+    def to_dense(self):
+        return self.quantites.toarray() if self.is_sparse else self.quantites
+
+    def row(self, date):
+        # Quantités du jour (vue sur la matrice dense), None si la date est absente
+        i = self.ligne_par_date.get(pd.Timestamp(date))
+        if i is None:
+            return None
+        if self.is_sparse:
+            return self.quantites[[i], :].toarray()[0]
+        return self.quantites[i]
+
+    def at(self, date):
+        # Composition du jour indexée par ticker (positions nulles comprises)
+        ligne = self.row(date)
+        return None if ligne is None else pd.Series(ligne, index=self.tickers)
+
+    def holdings(self, date):
+        # Uniquement les lignes détenues (quantité non nulle)
+        composition = self.at(date)
+        return None if composition is None else composition[composition != 0]
+
+    def row_reindexed(self, date, tickers):
+        # Quantités du jour alignées sur une autre liste de tickers (0 pour les tickers inconnus),
+        # sans densifier l'historique ; None si la date est absente
+        ligne = self.row(date)
+        if ligne is None:
+            return None
+        j = self.tickers.get_indexer(pd.Index(tickers, dtype=object))
+        quantites = np.zeros(len(j), dtype=ligne.dtype)
+        quantites[j >= 0] = ligne[j[j >= 0]]
+        return quantites
+
+    def _reindex_sparse(self, tickers):
+        # Matrice CSR sur une liste de tickers contenant ceux de l'historique : renumérotation des colonnes
+        from scipy.sparse import csr_array
+        quantites = self.quantites if self.is_sparse else csr_array(self.quantites)
+        colonnes = pd.Index(tickers, dtype=object).get_indexer(self.tickers)
+        remappee = csr_array((quantites.data.copy(), colonnes[quantites.indices], quantites.indptr.copy()),
+                             shape=(len(self.dates), len(tickers)))
+        remappee.sort_indices()
+        return remappee
+
+    def reindex_tickers(self, tickers):
+        # Quantités alignées sur une autre liste de tickers (0 pour les tickers inconnus)
+        j = self.tickers.get_indexer(pd.Index(tickers, dtype=object))
+        dense = self.to_dense()
+        quantites = np.zeros((len(self.dates), len(j)), dtype=dense.dtype)
+        connus = j >= 0
+        quantites[:, connus] = dense[:, j[connus]]
+        return quantites
+
+    def truncate(self, avant):
+        # Jours strictement antérieurs à `avant`
+        n = int(self.dates.searchsorted(pd.Timestamp(avant), side="left"))
+        return PositionHistory(self.dates[:n], self.tickers, self.quantites[:n])
+
+    def append(self, other):
+        # Concatène deux historiques successifs sur l'union des tickers ; un historique creux reste
+        # creux (blocs CSR empilés) sans passer par la matrice dense
+        tickers = self.tickers.append(other.tickers[~other.tickers.isin(self.tickers)])
+        if self.is_sparse:
+            from scipy.sparse import vstack
+            quantites = vstack([self._reindex_sparse(tickers), other._reindex_sparse(tickers)], format="csr")
+            return PositionHistory(self.dates.append(other.dates), tickers, quantites)
+        quantites = np.vstack([self.reindex_tickers(tickers), other.reindex_tickers(tickers)])
+        return PositionHistory.from_array(self.dates.append(other.dates), tickers, quantites)
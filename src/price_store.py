@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+# Ancienneté maximale (en jours de marché) d'une cotation reportée sur les jours suivants ;
+# au-delà, le titre n'est plus valorisé. None : pas de limite
+AGE_MAX_PRIX = 5
+
+
+class PriceStore:
+    # Prix au format large : matrice (dates x tickers) contiguë, indexée par date et par ticker
+
+    def __init__(self, dates, tickers, values, dtype=np.float64):
+        dates = pd.DatetimeIndex(dates)
+        values = np.asarray(values, dtype=dtype)
+        if not dates.is_monotonic_increasing:
+            ordre = np.argsort(dates.to_numpy(), kind="stable")
+            dates, values = dates[ordre], values[ordre]
+        self.dates = dates
+        self.tickers = pd.Index(tickers, dtype=object)
+        # Pas de copie si la matrice fournie est déjà triée et contiguë (ex. mémoire partagée)
+        self.values = np.ascontiguousarray(values)
+        # Accès O(1) : date -> ligne, ticker -> colonne
+        self.ligne_par_date = {date: i for i, date in enumerate(self.dates)}
+        self.colonne_par_ticker = {ticker: j for j, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_wide(cls, df, date_col="Date", dtype=np.float64):
+        tickers = [col for col in df.columns if col != date_col]
+        return cls(df[date_col], tickers, df[tickers].to_numpy(dtype=dtype), dtype=dtype)
+
+    @classmethod
+    def from_long(cls, df, dtype=np.float64):
+        wide = df.pivot(index="Date", columns="Ticker", values="Prix")
+        return cls(wide.index, wide.columns, wide.to_numpy(dtype=dtype), dtype=dtype)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def row(self, date):
+        # Ligne de prix du jour (vue sur la matrice), None si la date est absente
+        i = self.ligne_par_date.get(pd.Timestamp(date))
+        return None if i is None else self.values[i]
+
+    def asof_index(self, date):
+        # Dernière ligne dont la date est <= `date` (recherche dichotomique), -1 si aucune
+        return int(self.dates.searchsorted(pd.Timestamp(date), side="right")) - 1
+
+    def asof_row(self, date):
+        i = self.asof_index(date)
+        return None if i < 0 else self.values[i]
+
+    def prices_at(self, date):
+        # Prix du jour indexés par ticker (NaN si la date est absente)
+        ligne = self.row(date)
+        if ligne is None:
+            ligne = np.full(len(self.tickers), np.nan, dtype=self.values.dtype)
+        return pd.Series(ligne, index=self.tickers, name="Prix")
+
+    def prices_asof(self, date):
+        ligne = self.asof_row(date)
+        if ligne is None:
+            ligne = np.full(len(self.tickers), np.nan, dtype=self.values.dtype)
+        return pd.Series(ligne, index=self.tickers, name="Prix")
+
+    def column(self, ticker):
+        return self.values[:, self.colonne_par_ticker[ticker]]
+
+    def reindex(self, dates, tickers):
+        # Matrice alignée sur (dates, tickers) demandés ; NaN pour les couples absents
+        i = self.dates.get_indexer(pd.DatetimeIndex(dates))
+        j = self.tickers.get_indexer(pd.Index(tickers, dtype=object))
+        matrice = self.values[np.ix_(np.maximum(i, 0), np.maximum(j, 0))].astype(float)
+        matrice[i < 0, :] = np.nan
+        matrice[:, j < 0] = np.nan
+        return matrice
+
+    def resolve(self, jours, tickers, age_max=AGE_MAX_PRIX, dates=None):
+        # Prix de valorisation (jours de marché x tickers) : dernière cotation connue à chaque jour de
+        # `jours`, en une passe (report vers l'avant le long des jours de marché). `dates` : sous-ensemble
+        # contigu de `jours` à résoudre (défaut : tous) ; seuls `age_max` jours de marché antérieurs sont relus
+        jours = pd.DatetimeIndex(jours)
+        dates = jours if dates is None else pd.DatetimeIndex(dates)
+        if not len(dates):
+            vide = np.empty((0, len(tickers)))
+            return ResolvedPrices(dates, tickers, vide, vide.astype(np.int32))
+        position = jours.get_indexer(dates)
+        debut = 0 if age_max is None else max(int(position.min()) - age_max, 0)
+        fenetre = jours[debut:int(position.max()) + 1]
+
+        prix = self.reindex(fenetre, tickers)
+        lignes = np.arange(len(fenetre), dtype=np.int32)[:, None]
+        # Ligne de la dernière cotation disponible (-1 si aucune) puis ancienneté en jours de marché
+        derniere = np.maximum.accumulate(np.where(np.isnan(prix), np.int32(-1), lignes), axis=0)
+        age = np.where(derniere >= 0, lignes - derniere, -1).astype(np.int32)
+        prix = np.take_along_axis(prix, np.maximum(derniere, 0), axis=0)
+        if age_max is not None:
+            trop_ancien = age > age_max
+            prix[trop_ancien] = np.nan
+            age[trop_ancien] = -1
+        lignes_dates = position - debut
+        return ResolvedPrices(dates, tickers, prix[lignes_dates], age[lignes_dates])
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.dates.rename("Date"), columns=self.tickers.rename("Ticker"))
+
+    def to_long(self):
+        return self.to_frame().reset_index().melt(id_vars=["Date"], var_name="Ticker", value_name="Prix")
+
+
+class ResolvedPrices:
+    # Matrice dense des prix de valorisation (jours de marché x tickers) issue de PriceStore.resolve :
+    # NaN et `age` = -1 sans cotation exploitable, sinon `age` = jours de marché depuis la cotation
+
+    def __init__(self, dates, tickers, values, age):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = pd.Index(tickers, dtype=object)
+        self.values = values
+        self.age = age
+        self.ligne_par_date = {date: i for i, date in enumerate(self.dates)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def stale(self):
+        # Masque des cellules valorisées avec une cotation reportée d'un jour précédent
+        return (self.age > 0) & ~np.isnan(self.values)
+
+    @property
+    def missing(self):
+        return np.isnan(self.values)
+
+    def _ligne(self, matrice, date, vide):
+        i = self.ligne_par_date.get(pd.Timestamp(date))
+        return np.full(len(self.tickers), vide, dtype=matrice.dtype) if i is None else matrice[i]
+
+    def prices_at(self, date):
+        # Même interface que PriceStore.prices_at
+        return pd.Series(self._ligne(self.values, date, np.nan), index=self.tickers, name="Prix")
+
+    def stale_at(self, date):
+        return pd.Series(self._ligne(self.stale, date, False), index=self.tickers, name="Prix périmé")
+
+    def stale_cells(self, positions=None):
+        # Cellules reportées (Date, Ticker, Age), restreintes aux lignes détenues si `positions` est fourni
+        masque = self.stale if positions is None else self.stale & (positions != 0)
+        i, j = np.nonzero(masque)
+        return pd.DataFrame({"Date": self.dates[i], "Ticker": self.tickers[j], "Age": self.age[i, j]})
+
+
+def as_price_store(prices):
+    # Accepte un PriceStore ou l'ancien format long (Date, Ticker, Prix)
+    if isinstance(prices, PriceStore):
+        return prices
+    return PriceStore.from_long(prices)
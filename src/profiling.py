@@ -0,0 +1,177 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Mesure des étapes critiques (lecture, moteur, KPIs, rendus). Désactivée par défaut :
+# stage() renvoie alors un gestionnaire vide partagé et timed() un simple test de booléen.
+# L'activation vaut pour le thread courant (un rerun Streamlit), le défaut pour tout le processus.
+PROFILING_ENV = "SBR_PROFILING"
+TRACE_PATH = "data/.cache/profiling_trace.json"
+NB_TRACES_MAX = 50
+
+ACTIF_PAR_DEFAUT = os.environ.get(PROFILING_ENV, "") not in ("", "0")
+
+_local = threading.local()
+_traces = deque(maxlen=NB_TRACES_MAX)
+_verrou = threading.Lock()
+
+
+class _Inactif:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_INACTIF = _Inactif()
+
+
+def memoire_rss():
+    # Mémoire résidente du processus en octets (/proc sous Linux, pic RSS ailleurs)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Trace:
+    # Étapes mesurées pendant une exécution de page (un rerun Streamlit) ou un script
+    def __init__(self, nom):
+        self.nom = nom
+        self.horodatage = time.time()
+        self.debut = time.perf_counter()
+        self.fin = None
+        self.thread = threading.get_ident()
+        self.etapes = []   # (nom, début relatif, durée, profondeur), en secondes
+        self.caches = []   # (nom, hit)
+        self.memoire_debut = memoire_rss()
+        self.memoire_fin = None
+        self.profondeur = 0
+
+    @property
+    def duree(self):
+        return (self.fin or time.perf_counter()) - self.debut
+
+    def to_events(self, pid=0):
+        # Format « Trace Event » (chrome://tracing, Perfetto) : durées en microsecondes
+        base = self.horodatage * 1e6
+        events = [{"name": self.nom, "ph": "X", "ts": base, "dur": self.duree * 1e6, "pid": pid, "tid": self.thread,
+                   "args": {"memoire_debut": self.memoire_debut, "memoire_fin": self.memoire_fin}}]
+        events += [{"name": nom, "ph": "X", "ts": base + debut * 1e6, "dur": duree * 1e6, "pid": pid,
+                    "tid": self.thread, "args": {"profondeur": profondeur}}
+                   for nom, debut, duree, profondeur in self.etapes]
+        events += [{"name": f"cache {nom}", "ph": "i", "s": "t", "ts": base + self.duree * 1e6, "pid": pid,
+                    "tid": self.thread, "args": {"hit": hit}}
+                   for nom, hit in self.caches]
+        return events
+
+
+class _Etape:
+    __slots__ = ("trace", "nom", "debut", "profondeur")
+
+    def __init__(self, trace, nom):
+        self.trace, self.nom = trace, nom
+
+    def __enter__(self):
+        self.profondeur = self.trace.profondeur
+        self.trace.profondeur += 1
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duree = time.perf_counter() - self.debut
+        self.trace.profondeur -= 1
+        self.trace.etapes.append((self.nom, self.debut - self.trace.debut, duree, self.profondeur))
+        return False
+
+
+def enable(actif=True):
+    # Active (ou désactive) le profilage du thread courant : sans effet sur les autres sessions
+    _local.actif = actif
+
+
+def is_enabled():
+    return getattr(_local, "actif", ACTIF_PAR_DEFAUT)
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def start_trace(nom):
+    # Démarre la trace du thread courant (remplace une trace inachevée)
+    _local.trace = Trace(nom)
+    return _local.trace
+
+
+def end_trace():
+    # Clôt la trace du thread courant et la conserve parmi les NB_TRACES_MAX dernières
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.fin = time.perf_counter()
+    trace.memoire_fin = memoire_rss()
+    with _verrou:
+        _traces.append(trace)
+    return trace
+
+
+def clear_trace():
+    _local.trace = None
+
+
+def stage(nom):
+    # with stage("nom"): ... — mesuré seulement si le profilage est actif et une trace ouverte
+    if not is_enabled():
+        return _INACTIF
+    trace = current_trace()
+    return _INACTIF if trace is None else _Etape(trace, nom)
+
+
+def timed(nom=None):
+    # Décorateur : mesure chaque appel de la fonction comme une étape
+    def decorateur(fonction):
+        libelle = nom or fonction.__name__
+
+        @functools.wraps(fonction)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fonction(*args, **kwargs)
+            with stage(libelle):
+                return fonction(*args, **kwargs)
+        return wrapper
+    return decorateur
+
+
+def record_cache(nom, hit):
+    if not is_enabled():
+        return
+    trace = current_trace()
+    if trace is not None:
+        trace.caches.append((nom, bool(hit)))
+
+
+def recent_traces():
+    with _verrou:
+        return list(_traces)
+
+
+def dump_traces(path=TRACE_PATH, traces=None):
+    # Écrit les traces conservées (ou `traces`) au format Trace Event, pour analyse hors ligne
+    traces = recent_traces() if traces is None else traces
+    events = [event for trace in traces for event in trace.to_events(pid=os.getpid())]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp_path, path)
+    return path
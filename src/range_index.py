@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+
+def _sparse_table(valeurs, fonction):
+    # niveaux[k][i] = fonction(valeurs[i : i + 2^k]) ; requête O(1) pour min / max
+    niveaux = [valeurs]
+    k = 1
+    while (1 << k) <= len(valeurs):
+        precedent = niveaux[-1]
+        moitie = 1 << (k - 1)
+        niveaux.append(fonction(precedent[:-moitie], precedent[moitie:]))
+        k += 1
+    return niveaux
+
+
+def _drawdown_blocs(valeurs, maxima, minima):
+    # dd[k][i] = pire drawdown (pic avant creux) à l'intérieur du bloc [i, i + 2^k)
+    niveaux = [np.zeros(len(valeurs))]
+    k = 1
+    while (1 << k) <= len(valeurs):
+        moitie = 1 << (k - 1)
+        gauche, droite = niveaux[-1][:-moitie], niveaux[-1][moitie:]
+        traversant = minima[k - 1][moitie:] / maxima[k - 1][:-moitie] - 1
+        niveaux.append(np.minimum(np.minimum(gauche, droite), traversant))
+        k += 1
+    return niveaux
+
+
+class SeriesRangeIndex:
+    # Index sur une série de niveaux (VL ou prix) pour des requêtes sur [début, fin]
+
+    def __init__(self, dates, valeurs):
+        ordre = np.argsort(pd.DatetimeIndex(dates).to_numpy(), kind="stable")
+        self.dates = pd.DatetimeIndex(dates)[ordre]
+        self.valeurs = np.asarray(valeurs, dtype=float)[ordre]
+        # Somme préfixe des log-rendements = log des niveaux
+        self.log_cumul = np.log(self.valeurs)
+        self.maxima = _sparse_table(self.valeurs, np.maximum)
+        self.minima = _sparse_table(self.valeurs, np.minimum)
+        self.drawdowns = _drawdown_blocs(self.valeurs, self.maxima, self.minima)
+
+    def bornes(self, debut, fin):
+        # Indices [i, j] des dates comprises dans [debut, fin] (recherche dichotomique)
+        i = int(self.dates.searchsorted(pd.Timestamp(debut), side="left"))
+        j = int(self.dates.searchsorted(pd.Timestamp(fin), side="right")) - 1
+        return (i, j) if i <= j else (None, None)
+
+    def _requete(self, niveaux, i, j, fonction):
+        k = int(j - i + 1).bit_length() - 1
+        return fonction(niveaux[k][i], niveaux[k][j - (1 << k) + 1])
+
+    def range_max(self, i, j):
+        return self._requete(self.maxima, i, j, max)
+
+    def range_min(self, i, j):
+        return self._requete(self.minima, i, j, min)
+
+    def performance(self, i, j):
+        return float(np.exp(self.log_cumul[j] - self.log_cumul[i]) - 1)
+
+    def max_drawdown(self, i, j):
+        # Combinaison gauche -> droite de blocs disjoints de taille 2^k : O(log n)
+        dd, pic = 0.0, None
+        while i <= j:
+            k = int(j - i + 1).bit_length() - 1
+            dd = min(dd, self.drawdowns[k][i])
+            if pic is not None:
+                dd = min(dd, self.minima[k][i] / pic - 1)
+            pic = self.maxima[k][i] if pic is None else max(pic, self.maxima[k][i])
+            i += 1 << k
+        return float(dd)
+
+
+class PerformanceRangeIndex:
+    # Performance, surperformance et max drawdown du portefeuille et du benchmark sur toute période
+
+    def __init__(self, report, benchmark):
+        self.ptf = SeriesRangeIndex(report["Date"], report["Valeur Liquidative"])
+        self.bench = SeriesRangeIndex(benchmark["Date"], benchmark["Prix"])
+
+    def query(self, debut, fin):
+        i, j = self.ptf.bornes(debut, fin)
+        if i is None:
+            return None
+        resultat = {
+            "Debut": self.ptf.dates[i],
+            "Fin": self.ptf.dates[j],
+            "Nb_Jours": j - i + 1,
+            "Perf_Ptf": self.ptf.performance(i, j),
+            "Max_Drawdown": self.ptf.max_drawdown(i, j),
+            "Perf_Bench": np.nan,
+            "Max_Drawdown_Bench": np.nan,
+        }
+        bi, bj = self.bench.bornes(debut, fin)
+        if bi is not None:
+            resultat["Perf_Bench"] = self.bench.performance(bi, bj)
+            resultat["Max_Drawdown_Bench"] = self.bench.max_drawdown(bi, bj)
+        resultat["Exces"] = resultat["Perf_Ptf"] - resultat["Perf_Bench"]
+        return resultat
@@ -0,0 +1,131 @@
+from typing import NamedTuple
+
+import pandas as pd
+
+# Indicateurs du bloc KPI mensuel (libellé -> colonne de la table des KPIs, format) ;
+# Sharpe, Sortino et Treynor sont annualisés arithmétiquement (src.utils.compute_kpi_table)
+KPIS_MENSUELS = {
+    "Perf. Portefeuille": ("Perf_Ptf", "{:.2%}"),
+    "Volatilité Ptf": ("Vol_Ptf", "{:.2%}"),
+    "Sharpe (annualisé)": ("Sharpe", "{:.2f}"),
+    "Sortino (annualisé)": ("Sortino", "{:.2f}"),
+    "Max Drawdown": ("Max_Drawdown", "{:.2%}"),
+    "Perf. Benchmark": ("Perf_Bench", "{:.2%}"),
+    "Volatilité Bench": ("Vol_Bench", "{:.2%}"),
+    "Bêta": ("Beta", "{:.2f}"),
+    "Corrélation": ("Correlation", "{:.2f}"),
+    "R²": ("R2", "{:.2f}"),
+    "Treynor (annualisé)": ("Treynor", "{:.2f}"),
+    "Info Ratio": ("Info_Ratio", "{:.2f}"),
+}
+
+
+class RapportMensuel(NamedTuple):
+    # Contenu d'un reporting mensuel, partagé par la page Reporting et l'export hors ligne
+    mois: pd.Period
+    dernier_jour: pd.Timestamp
+    positions: pd.DataFrame         # Ticker, Nombre de Titres, Prix, Valeur, Poids %, GICS
+    repartition_gics: pd.DataFrame  # GICS, Poids %
+    kpis: pd.Series                 # ligne du mois de la table des KPIs (src.utils)
+    evolution: pd.DataFrame         # Date, VL normalisée, Benchmark normalisé (base 100)
+    pnl: pd.DataFrame               # Ticker, Coût de revient, P&L réalisé, P&L latent, Contribution %
+    attribution: pd.DataFrame       # Secteur, Poids début %, Poids fin %, Rendement %, Contribution %
+
+
+def tickers_gics(transactions):
+    # Classe GICS de chaque ticker (première occurrence dans les transactions)
+    return transactions.drop_duplicates(subset=["Ticker"]).set_index("Ticker")["GICS Class"]
+
+
+def position_a_date(positions, prices, date):
+    net_position = positions.at(date)
+    if net_position is None or net_position.empty:
+        return pd.DataFrame(columns=["Ticker", "Nombre de Titres", "Prix", "Valeur", "Poids %"])
+
+    prix_date = prices.prices_at(date)
+    df = net_position.to_frame("Nombre de Titres").join(prix_date, how="left")
+    df["Valeur"] = df["Nombre de Titres"] * df["Prix"]
+
+    valeur_totale = df["Valeur"].sum()
+    df["Poids %"] = (df["Valeur"] / valeur_totale * 100).round(2)
+
+    df = df.reset_index().rename(columns={"index": "Ticker"})
+    df = df[["Ticker", "Nombre de Titres", "Prix", "Valeur", "Poids %"]]
+    return df[df["Nombre de Titres"] != 0]
+
+
+def evolution_normalisee(report_mois, benchmark_mois):
+    # VL et benchmark du mois en base 100 au premier jour, sur les jours communs
+    vl_norm = report_mois[["Date", "Valeur Liquidative"]].sort_values("Date")
+    benchmark_norm = benchmark_mois[["Date", "Prix"]].sort_values("Date")
+    if vl_norm.empty or benchmark_norm.empty:
+        return pd.DataFrame(columns=["Date", "VL normalisée", "Benchmark normalisé"])
+
+    vl_norm = vl_norm.assign(**{
+        "VL normalisée": vl_norm["Valeur Liquidative"] / vl_norm["Valeur Liquidative"].iloc[0] * 100
+    })
+    benchmark_norm = benchmark_norm.assign(**{
+        "Benchmark normalisé": benchmark_norm["Prix"] / benchmark_norm["Prix"].iloc[0] * 100
+    })
+    return pd.merge(
+        vl_norm[["Date", "VL normalisée"]],
+        benchmark_norm[["Date", "Benchmark normalisé"]],
+        on="Date",
+        how="inner"
+    )
+
+
+def pnl_mensuel(results, report_mois):
+    # P&L de chaque ligne sur le mois : réalisé pendant le mois, latent et coût de revient en fin de mois,
+    # contribution = variation du P&L total / VL de fin du mois précédent (capital initial le premier mois)
+    pnl = results.pnl
+    i_fin = pnl.position(report_mois["Date"].max())
+    i_veille = pnl.position(report_mois["Date"].min()) - 1
+    if i_veille >= 0:
+        total_veille, realise_veille = pnl.pnl_total[i_veille], pnl.pnl_realise[i_veille]
+        base = results.report["Valeur Liquidative"].iloc[i_veille]
+    else:
+        total_veille, realise_veille, base = 0.0, 0.0, results.capital_initial
+
+    df = pd.DataFrame({
+        "Ticker": pnl.tickers,
+        "Coût de revient": pnl.cout_revient[i_fin],
+        "P&L réalisé": pnl.pnl_realise[i_fin] - realise_veille,
+        "P&L latent": pnl.pnl_latent[i_fin],
+        "Contribution %": (pnl.pnl_total[i_fin] - total_veille) / base * 100,
+    })
+    actives = (df["Coût de revient"] != 0) | (df["P&L réalisé"] != 0)
+    return df[actives.to_numpy()].sort_values("Contribution %", ascending=False).reset_index(drop=True)
+
+
+def mois_disponibles(results):
+    return sorted(results.report["Mois"].unique(), reverse=True)
+
+
+def rapport_mensuel(results, gics, mois):
+    # Assemble le reporting d'un mois à partir des résultats partagés ; None si le mois est vide
+    mois = pd.Period(mois, freq="M")
+    report_mois = results.report[results.report["Mois"] == mois]
+    if report_mois.empty:
+        return None
+    dernier_jour = report_mois["Date"].max()
+
+    # Prix résolus : mêmes cotations (éventuellement reportées) que la valorisation du rapport
+    positions = position_a_date(results.positions, results.prix, dernier_jour)
+    positions["GICS"] = positions["Ticker"].map(gics)
+    # Poids sectoriels et attribution lus dans les tables précalculées sur tout l'historique
+    poids_gics = results.attribution.weights_at(dernier_jour)
+    repartition_gics = pd.DataFrame({"GICS": poids_gics.index, "Poids %": (poids_gics.to_numpy() * 100).round(2)})
+    attribution = (results.attribution.window(mois) * 100).add_suffix(" %").reset_index()
+
+    benchmark_mois = results.benchmark[results.benchmark["Mois"] == mois]
+    return RapportMensuel(
+        mois=mois,
+        dernier_jour=dernier_jour,
+        positions=positions,
+        repartition_gics=repartition_gics,
+        kpis=results.kpis.loc[str(mois)],
+        evolution=evolution_normalisee(report_mois, benchmark_mois),
+        pnl=pnl_mensuel(results, report_mois),
+        attribution=attribution,
+    )
@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+
+from src import profiling
+from src.attribution import SectorAttribution
+from src.calendar_index import MarketCalendar
+from src.compute_engine import compute_daily_report_incremental
+from src.monthly_performance import compute_monthly_calendar
+from src.pnl import PnLPanel, compute_pnl
+from src.price_store import ResolvedPrices, as_price_store
+from src.range_index import PerformanceRangeIndex
+from src.reporting import tickers_gics
+from src.rolling import compute_rolling_metrics
+from src.utils import compute_kpi_table
+
+# Nombre de jeux de résultats conservés (versions de données x paramètres)
+NB_RESULTATS_MAX = 4
+
+
+class PortfolioResults(NamedTuple):
+    # Résultats partagés entre pages et sessions : à traiter en lecture seule
+    version: str
+    capital_initial: float
+    taux_cash: float
+    report: pd.DataFrame        # rapport journalier + colonne "Mois"
+    positions: object           # PositionHistory
+    benchmark: pd.DataFrame     # Date, Prix, Mois, Rendement_Benchmark
+    rendements: pd.DataFrame    # Date, Rendement_Ptf, Rendement_Benchmark (jours communs)
+    kpis: pd.DataFrame          # KPIs par mois, année, YTD et depuis création (src.utils)
+    periodes: PerformanceRangeIndex  # requêtes de performance / drawdown sur toute période
+    rolling: pd.DataFrame       # indicateurs roulants 20/60/252 jours (src.rolling)
+    calendrier: MarketCalendar  # jours de marché, alignés sur les lignes du rapport
+    calendrier_mensuel: pd.DataFrame  # performances mensuelles Ptf / Bench + totaux annuels (src.monthly_performance)
+    prix: ResolvedPrices        # prix de valorisation (jours de marché x tickers) et masque des prix reportés
+    pnl: PnLPanel               # coût de revient, P&L réalisé / latent par ticker et par jour (src.pnl)
+    attribution: SectorAttribution  # poids et contributions GICS par jour, par mois et depuis création
+
+
+_resultats = OrderedDict()
+_verrous = {}
+_verrou_global = threading.Lock()
+
+
+def _version_donnees(data):
+    # Empreinte des données quand load_data ne fournit pas de version (usage hors classeur)
+    return "-".join(
+        str(pd.util.hash_pandas_object(data[cle], index=False).sum())
+        for cle in ("transactions", "benchmark", "jours_marche")
+    ) + f"-{hash(data['prices'].values.tobytes())}"
+
+
+@profiling.timed("calcul des résultats")
+def _calculer(version, data, capital_initial, taux_cash):
+    report, positions = compute_daily_report_incremental(
+        transactions=data["transactions"],
+        prices=data["prices"],
+        jours_marche=data["jours_marche"],
+        capital_initial=capital_initial,
+        taux_cash=taux_cash,
+        with_positions=True
+    )
+    report = report.sort_values("Date").reset_index(drop=True)
+    report["Mois"] = report["Date"].dt.to_period("M")
+    report["Rendement_Ptf"] = report["Valeur Liquidative"].pct_change()
+
+    benchmark = data["benchmark"].sort_values("Date").reset_index(drop=True)
+    benchmark["Mois"] = benchmark["Date"].dt.to_period("M")
+    benchmark["Rendement_Benchmark"] = benchmark["Prix"].pct_change()
+
+    rendements = pd.merge(
+        report[["Date", "Rendement_Ptf"]],
+        benchmark[["Date", "Rendement_Benchmark"]],
+        on="Date",
+        how="inner"
+    ).dropna()
+
+    with profiling.stage("KPIs"):
+        kpis = compute_kpi_table(report, benchmark, capital_initial=capital_initial)
+    with profiling.stage("index des périodes"):
+        periodes = PerformanceRangeIndex(report, benchmark)
+    with profiling.stage("indicateurs roulants"):
+        rolling = compute_rolling_metrics(rendements)
+    calendrier = MarketCalendar(report["Date"])
+    with profiling.stage("résolution des prix"):
+        prix = as_price_store(data["prices"]).resolve(calendrier.dates, positions.tickers)
+    with profiling.stage("P&L par ligne"):
+        pnl = compute_pnl(data["transactions"], prix)
+    with profiling.stage("attribution sectorielle"):
+        attribution = SectorAttribution(positions, prix, tickers_gics(data["transactions"]),
+                                        report["Valeur Liquidative"], capital_initial)
+    with profiling.stage("calendrier mensuel"):
+        calendrier_mensuel = compute_monthly_calendar(report, benchmark, totaux=True,
+                                                      capital_initial=capital_initial)
+
+    return PortfolioResults(version, capital_initial, taux_cash, report, positions, benchmark, rendements, kpis,
+                            periodes, rolling, calendrier, calendrier_mensuel, prix, pnl,
+                            attribution)
+
+
+def get_portfolio_results(data, capital_initial=100_000, taux_cash=0.03):
+    # Calculé une seule fois par (version des données, paramètres) pour tout le processus ;
+    # un verrou par clé évite que des premières requêtes simultanées calculent en double
+    version = data.get("version") or _version_donnees(data)
+    cle = (version, capital_initial, taux_cash)
+
+    with _verrou_global:
+        if cle in _resultats:
+            _resultats.move_to_end(cle)
+            profiling.record_cache("résultats partagés", True)
+            return _resultats[cle]
+        verrou = _verrous.setdefault(cle, threading.Lock())
+
+    with verrou:
+        with _verrou_global:
+            if cle in _resultats:
+                profiling.record_cache("résultats partagés", True)
+                return _resultats[cle]
+        profiling.record_cache("résultats partagés", False)
+        resultats = _calculer(version, data, capital_initial, taux_cash)
+        with _verrou_global:
+            _resultats[cle] = resultats
+            while len(_resultats) > NB_RESULTATS_MAX:
+                ancienne_cle, _ = _resultats.popitem(last=False)
+                _verrous.pop(ancienne_cle, None)
+            _verrous.pop(cle, None)
+    return resultats
+
+
+def clear_results():
+    with _verrou_global:
+        _resultats.clear()
+        _verrous.clear()
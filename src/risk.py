@@ -0,0 +1,186 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+HORIZONS = (1, 10)             # jours de marché
+CONFIANCES = (0.95, 0.99)
+METHODES_VAR = ("historique", "bootstrap")
+# Simulation : nombre de chemins, taille des lots (mémoire bornée à lot x titres), graine fixe
+NB_CHEMINS = 20_000
+TAILLE_LOT = 5_000
+GRAINE = 42
+# À partir de ce nombre de chemins, les lots sont répartis sur un pool de processus
+SEUIL_POOL = 100_000
+NB_RESULTATS_MAX = 256
+
+
+class VaR(NamedTuple):
+    # Pertes exprimées en fraction de la VL (positives)
+    methode: str
+    date: pd.Timestamp
+    horizon: int
+    confiance: float
+    var: float
+    cvar: float
+    nb_observations: int       # rendements historiques ou chemins simulés
+
+
+_resultats = OrderedDict()
+_verrou = threading.Lock()
+
+
+def var_cvar(rendements, confiance):
+    # VaR = opposé du quantile (1 - confiance) des rendements ; CVaR = perte moyenne au-delà de la VaR
+    rendements = np.asarray(rendements, dtype=float)
+    rendements = rendements[~np.isnan(rendements)]
+    if not len(rendements):
+        return np.nan, np.nan
+    seuil = np.quantile(rendements, 1 - confiance)
+    return -float(seuil), -float(rendements[rendements <= seuil].mean())
+
+
+def historical_returns(valeur_liquidative, horizon):
+    # Rendements sur `horizon` jours de marché, fenêtres glissantes qui se chevauchent
+    vl = np.asarray(valeur_liquidative, dtype=float)
+    if len(vl) <= horizon:
+        return np.empty(0)
+    return vl[horizon:] / vl[:-horizon] - 1
+
+
+def _simuler_lot(rendements, poids, horizon, nb_chemins, graine):
+    # Bootstrap d'un lot : `horizon` jours tirés avec remise parmi les jours historiques (les titres d'un
+    # même jour restent ensemble, corrélations conservées), rendements composés par titre puis pondérés
+    generateur = np.random.default_rng(graine)
+    croissance = np.ones((nb_chemins, rendements.shape[1]))
+    for _ in range(horizon):
+        croissance *= 1 + rendements[generateur.integers(0, len(rendements), size=nb_chemins)]
+    return (croissance - 1) @ poids
+
+
+# --- Processus de simulation : matrice des rendements attachée une fois en mémoire partagée ---
+
+_shm_worker = None
+_rendements_worker = None
+
+
+def _init_worker(nom_shm, shape, dtype):
+    global _shm_worker, _rendements_worker
+    _shm_worker = shared_memory.SharedMemory(name=nom_shm)
+    _rendements_worker = np.ndarray(shape, dtype=dtype, buffer=_shm_worker.buf)
+
+
+def _simuler_lot_worker(poids, horizon, nb_chemins, graine):
+    return _simuler_lot(_rendements_worker, poids, horizon, nb_chemins, graine)
+
+
+def simulate_returns(rendements, poids, horizon, nb_chemins=NB_CHEMINS, graine=GRAINE, taille_lot=TAILLE_LOT,
+                     max_workers=None):
+    # Rendements du portefeuille sur `horizon` jours pour `nb_chemins` chemins, par lots de `taille_lot`.
+    # Chaque lot a sa propre graine dérivée de `graine` : résultat identique en série ou en parallèle
+    rendements = np.ascontiguousarray(rendements, dtype=float)
+    poids = np.asarray(poids, dtype=float)
+    tailles = [min(taille_lot, nb_chemins - debut) for debut in range(0, nb_chemins, taille_lot)]
+    graines = np.random.SeedSequence([graine, horizon]).spawn(len(tailles))
+    if not len(rendements) or not tailles:
+        return np.zeros(nb_chemins)
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tailles))
+    if nb_chemins < SEUIL_POOL or max_workers <= 1:
+        lots = [_simuler_lot(rendements, poids, horizon, taille, g) for taille, g in zip(tailles, graines)]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(rendements.nbytes, 1))
+        try:
+            np.ndarray(rendements.shape, dtype=rendements.dtype, buffer=shm.buf)[:] = rendements
+            init_args = (shm.name, rendements.shape, rendements.dtype)
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as pool:
+                futures = [pool.submit(_simuler_lot_worker, poids, horizon, taille, g)
+                           for taille, g in zip(tailles, graines)]
+                lots = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+    return np.concatenate(lots)
+
+
+def _exposition(results, i_jour):
+    # Rendements journaliers des titres détenus au jour `i_jour` (jusqu'à ce jour) et leur poids dans la VL ;
+    # un prix manquant compte pour une variation nulle, le cash est supposé sans risque sur l'horizon
+    # Une seule ligne lue (sans densifier l'historique), alignée sur les tickers des prix
+    quantites = results.positions.row_reindexed(results.calendrier.dates[i_jour], results.prix.tickers)
+    quantites = quantites.astype(float)
+    cours = results.prix.values[i_jour]
+    detenus = (quantites != 0) & ~np.isnan(cours)
+    poids = quantites[detenus] * cours[detenus] / results.report["Valeur Liquidative"].iloc[i_jour]
+    prix = results.prix.values[:i_jour + 1, detenus]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rendements = np.nan_to_num(prix[1:] / prix[:-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+    return rendements, poids
+
+
+def _calculer(results, methode, i_jour, horizon, confiances, nb_chemins, graine, max_workers):
+    if methode == "historique":
+        rendements = historical_returns(results.report["Valeur Liquidative"].iloc[:i_jour + 1], horizon)
+    else:
+        rendements_titres, poids = _exposition(results, i_jour)
+        rendements = simulate_returns(rendements_titres, poids, horizon, nb_chemins, graine,
+                                      max_workers=max_workers) if len(rendements_titres) else np.empty(0)
+    date = results.calendrier.dates[i_jour]
+    return [VaR(methode, date, horizon, confiance, *var_cvar(rendements, confiance), len(rendements))
+            for confiance in confiances]
+
+
+def compute_var(results, date=None, methode="historique", horizons=HORIZONS, confiances=CONFIANCES,
+                nb_chemins=NB_CHEMINS, graine=GRAINE, max_workers=None):
+    # VaR / CVaR du portefeuille (PortfolioResults) au jour `date` (défaut : dernier jour de marché).
+    # Résultats conservés par (données, date, méthode, horizon, confiance) : une simulation sert
+    # toutes les confiances d'un horizon, puis chaque valeur est une lecture
+    if methode not in METHODES_VAR:
+        raise ValueError(f"Méthode de VaR inconnue : {methode!r}")
+    calendrier = results.calendrier
+    i_jour = len(calendrier) - 1 if date is None else calendrier.position(date)
+    if i_jour is None or i_jour < 0:
+        return []
+    base = (results.version, results.capital_initial, results.taux_cash, i_jour, methode, nb_chemins, graine)
+
+    valeurs = []
+    for horizon in horizons:
+        cles = {confiance: base + (horizon, confiance) for confiance in confiances}
+        with _verrou:
+            connues = {}
+            for confiance, cle in cles.items():
+                if cle in _resultats:
+                    _resultats.move_to_end(cle)
+                    connues[confiance] = _resultats[cle]
+        manquantes = [confiance for confiance in confiances if confiance not in connues]
+        if manquantes:
+            calculees = _calculer(results, methode, i_jour, horizon, manquantes, nb_chemins, graine, max_workers)
+            with _verrou:
+                for resultat in calculees:
+                    _resultats[cles[resultat.confiance]] = resultat
+                    connues[resultat.confiance] = resultat
+                while len(_resultats) > NB_RESULTATS_MAX:
+                    _resultats.popitem(last=False)
+        valeurs += [connues[confiance] for confiance in confiances]
+    return valeurs
+
+
+def var_table(results, date=None, methodes=METHODES_VAR, **kwargs):
+    # Tableau (Horizon, Confiance) x méthode des VaR / CVaR, pour l'affichage
+    lignes = [resultat for methode in methodes for resultat in compute_var(results, date, methode, **kwargs)]
+    df = pd.DataFrame(lignes, columns=VaR._fields)
+    if df.empty:
+        return df
+    table = df.pivot(index=["horizon", "confiance"], columns="methode", values=["var", "cvar"])
+    table.columns = [f"{'VaR' if mesure == 'var' else 'CVaR'} {methode}" for mesure, methode in table.columns]
+    return table.reset_index().rename(columns={"horizon": "Horizon (jours)", "confiance": "Confiance"})
+
+
+def clear_var():
+    with _verrou:
+        _resultats.clear()
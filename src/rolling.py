@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from src.utils import JOURS_PAR_AN, RF_ANNUEL
+
+FENETRES_ROULANTES = (20, 60, 252)
+
+# Indicateurs roulants (nom affiché -> colonne)
+INDICATEURS_ROULANTS = {
+    "Bêta": "Beta",
+    "Volatilité Ptf": "Vol_Ptf",
+    "Volatilité Bench": "Vol_Bench",
+    "Sharpe (annualisé)": "Sharpe",
+    "Corrélation": "Correlation",
+    "Tracking Error": "Tracking_Error",
+}
+
+
+def _sommes_glissantes(valeurs, fenetre):
+    # Somme sur les `fenetre` derniers points via somme préfixe : O(n) pour toute la série
+    cumul = np.concatenate([[0.0], np.cumsum(valeurs)])
+    return cumul[fenetre:] - cumul[:-fenetre]
+
+
+def compute_rolling_metrics(rendements, fenetres=FENETRES_ROULANTES, rf_annuel=RF_ANNUEL):
+    # Indicateurs roulants ptf / benchmark pour plusieurs fenêtres en un appel.
+    # `rendements` : Date, Rendement_Ptf, Rendement_Benchmark (jours communs, triés)
+    rendements = rendements.sort_values("Date")
+    dates = rendements["Date"].to_numpy()
+    x = rendements["Rendement_Ptf"].to_numpy(dtype=float)
+    y = rendements["Rendement_Benchmark"].to_numpy(dtype=float)
+    # Centrage global : variances et covariances inchangées, sommes de carrés mieux conditionnées
+    moyenne_x, moyenne_y = (x.mean(), y.mean()) if len(x) else (0.0, 0.0)
+    xc, yc = x - moyenne_x, y - moyenne_y
+
+    blocs = []
+    for fenetre in fenetres:
+        if fenetre < 2 or fenetre > len(x):
+            continue
+        n = fenetre
+        sx, sy = _sommes_glissantes(xc, n), _sommes_glissantes(yc, n)
+        sxx, syy = _sommes_glissantes(xc * xc, n), _sommes_glissantes(yc * yc, n)
+        sxy = _sommes_glissantes(xc * yc, n)
+
+        var_x = np.clip((sxx - sx ** 2 / n) / (n - 1), 0, None)
+        var_y = np.clip((syy - sy ** 2 / n) / (n - 1), 0, None)
+        cov_xy = (sxy - sx * sy / n) / (n - 1)
+        var_ecart = np.clip(var_x + var_y - 2 * cov_xy, 0, None)
+        moyenne_ptf = sx / n + moyenne_x
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ptf = np.sqrt(var_x * JOURS_PAR_AN)
+            bloc = pd.DataFrame({
+                "Date": dates[n - 1:],
+                "Fenetre": f"{n}j",
+                "Beta": cov_xy / var_y,
+                "Vol_Ptf": vol_ptf,
+                "Vol_Bench": np.sqrt(var_y * JOURS_PAR_AN),
+                # Convention commune avec la table des KPIs (src.utils.compute_kpi_table) : rendement journalier
+                # moyen x 252 (annualisation arithmétique), net du taux sans risque, / volatilité annualisée
+                "Sharpe": (moyenne_ptf * JOURS_PAR_AN - rf_annuel) / vol_ptf,
+                "Correlation": cov_xy / np.sqrt(var_x * var_y),
+                "Tracking_Error": np.sqrt(var_ecart * JOURS_PAR_AN),
+            })
+        blocs.append(bloc)
+
+    if not blocs:
+        return pd.DataFrame(columns=["Date", "Fenetre", *INDICATEURS_ROULANTS.values()])
+    return pd.concat(blocs, ignore_index=True).replace([np.inf, -np.inf], np.nan)
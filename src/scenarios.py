@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.compute_engine import compute_nav_stack
+from src.price_store import PriceStore, as_price_store
+
+
+class Scenario(NamedTuple):
+    # Variante à évaluer ; transactions=None reprend les transactions de référence
+    nom: str
+    capital_initial: float = 100_000
+    taux_cash: float = 0.03
+    transactions: Optional[pd.DataFrame] = None
+
+
+def _as_scenario(spec):
+    return spec if isinstance(spec, Scenario) else Scenario(**spec)
+
+
+def _panel(scenarios, dates, valeur_titres, cash):
+    # Format long : une ligne par (scénario, jour)
+    blocs = [
+        pd.DataFrame({
+            "Scenario": scenario.nom,
+            "Date": dates,
+            "Valeur_Titres": valeur_titres,
+            "Cash": cash[k],
+            "Valeur Liquidative": valeur_titres + cash[k],
+        })
+        for k, scenario in enumerate(scenarios)
+    ]
+    return pd.concat(blocs, ignore_index=True)
+
+
+def _run_stack(scenarios, transactions, price_store, jours_marche):
+    # Scénarios partageant les mêmes transactions : un seul passage du moteur (axe scénario)
+    dates, valeur_titres, cash = compute_nav_stack(
+        transactions, price_store, jours_marche,
+        [scenario.capital_initial for scenario in scenarios],
+        [scenario.taux_cash for scenario in scenarios],
+    )
+    return _panel(scenarios, dates, valeur_titres, cash)
+
+
+# --- Processus de calcul : matrice de prix attachée une fois, sans copie, en mémoire partagée ---
+
+_shm_worker = None
+_store_worker = None
+
+
+def _init_worker(nom_shm, shape, dtype, dates, tickers):
+    global _shm_worker, _store_worker
+    _shm_worker = shared_memory.SharedMemory(name=nom_shm)
+    valeurs = np.ndarray(shape, dtype=dtype, buffer=_shm_worker.buf)
+    _store_worker = PriceStore(dates, tickers, valeurs, dtype=dtype)
+
+
+def _run_stack_worker(scenarios, transactions, jours_marche):
+    return _run_stack(scenarios, transactions, _store_worker, jours_marche)
+
+
+def run_scenarios(scenarios, transactions, prices, jours_marche, max_workers=None):
+    # Évalue une liste de scénarios et renvoie le panel des VL (Scenario, Date, ...).
+    # Les scénarios sont regroupés par jeu de transactions ; chaque groupe est empilé
+    # dans le moteur vectorisé, les groupes sont répartis sur un pool de processus.
+    scenarios = [_as_scenario(spec) for spec in scenarios]
+    if not scenarios:
+        return pd.DataFrame(columns=["Scenario", "Date", "Valeur_Titres", "Cash", "Valeur Liquidative"])
+    price_store = as_price_store(prices)
+
+    groupes = {}
+    for scenario in scenarios:
+        tx = transactions if scenario.transactions is None else scenario.transactions
+        groupes.setdefault(id(tx), (tx, []))[1].append(scenario)
+    groupes = list(groupes.values())
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(groupes))
+    if max_workers <= 1:
+        panels = [_run_stack(groupe, tx, price_store, jours_marche) for tx, groupe in groupes]
+    else:
+        valeurs = price_store.values
+        shm = shared_memory.SharedMemory(create=True, size=max(valeurs.nbytes, 1))
+        try:
+            np.ndarray(valeurs.shape, dtype=valeurs.dtype, buffer=shm.buf)[:] = valeurs
+            init_args = (shm.name, valeurs.shape, valeurs.dtype, price_store.dates, price_store.tickers)
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as pool:
+                futures = [pool.submit(_run_stack_worker, groupe, tx, jours_marche) for tx, groupe in groupes]
+                panels = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # Ordre des scénarios de la liste d'entrée
+    panel = pd.concat(panels, ignore_index=True)
+    ordre = {scenario.nom: k for k, scenario in enumerate(scenarios)}
+    return panel.sort_values(["Scenario", "Date"], key=lambda col: col.map(ordre) if col.name == "Scenario" else col,
+                             kind="stable").reset_index(drop=True)
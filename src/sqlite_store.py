@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import uuid
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from src import profiling
+from src.exceptions import DataLoadError, StoreFormatError, StoreNotFoundError
+from src.price_store import PriceStore, as_price_store
+
+# Base locale alternative au classeur : tables indexées sur (Date, Ticker), mises à jour
+# par upsert (seuls les jours fournis sont réécrits) et lectures limitées à une fenêtre de dates.
+DB_PATH = "data/portfolio.sqlite"
+EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# Colonnes de la feuille Transactions (data.xlsx), dans l'ordre
+COLONNES_TRANSACTIONS = [
+    "Date", "Type", "Ticker", "Nom", "ISIN", "GICS Class", "Nb actions",
+    "Prix local unitaire", "Devise", "Frais", "Montant total",
+]
+# Types par défaut à la lecture ; ceux des colonnes numériques importées sont conservés dans `meta`
+# (ex. Frais entiers dans le classeur) pour que la lecture rende les mêmes types que le classeur
+TYPES_TRANSACTIONS = {
+    "Date": "datetime64[ns]",
+    "Ticker": "category",
+    "Nb actions": "int64",
+    "Prix local unitaire": "float64",
+    "Frais": "float64",
+    "Montant total": "float64",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS tickers (id INTEGER PRIMARY KEY, ticker TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS prix (
+    date TEXT NOT NULL,
+    ticker_id INTEGER NOT NULL REFERENCES tickers (id),
+    prix REAL NOT NULL,
+    PRIMARY KEY (date, ticker_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS benchmark (date TEXT PRIMARY KEY, prix REAL NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS jours_marche (date TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    "Date" TEXT NOT NULL,
+    "Type" TEXT,
+    "Ticker" TEXT NOT NULL,
+    "Nom" TEXT,
+    "ISIN" TEXT,
+    "GICS Class" TEXT,
+    "Nb actions" INTEGER,
+    "Prix local unitaire" REAL,
+    "Devise" TEXT,
+    "Frais" REAL,
+    "Montant total" REAL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date_ticker ON transactions ("Date", "Ticker");
+"""
+
+
+def _date_texte(date):
+    return None if date is None else pd.Timestamp(date).strftime("%Y-%m-%d")
+
+
+def _dates_texte(dates):
+    return pd.DatetimeIndex(dates).strftime("%Y-%m-%d").tolist()
+
+
+def connect(db_path=DB_PATH):
+    # Connexion (création du schéma si besoin) ; WAL : lectures des pages pendant une mise à jour
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(SCHEMA)
+    con.execute("INSERT OR IGNORE INTO meta VALUES ('identifiant', ?)", (uuid.uuid4().hex,))
+    con.execute("INSERT OR IGNORE INTO meta VALUES ('revision', '0')")
+    con.commit()
+    return con
+
+
+@contextmanager
+def _lecture(db_path):
+    if not os.path.exists(db_path):
+        raise StoreNotFoundError(f"Base de données introuvable : {db_path}")
+    try:
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as con:
+            yield con
+    except sqlite3.DatabaseError as e:
+        raise StoreFormatError(f"Erreur de lecture de la base {db_path} : {e}") from e
+
+
+def _fenetre(colonne, debut, fin):
+    # Clause WHERE sur [debut, fin] (bornes optionnelles) : dates ISO, comparables comme du texte
+    clauses, parametres = [], []
+    if debut is not None:
+        clauses.append(f"{colonne} >= ?")
+        parametres.append(_date_texte(debut))
+    if fin is not None:
+        clauses.append(f"{colonne} <= ?")
+        parametres.append(_date_texte(fin))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", parametres
+
+
+def version(db_path=DB_PATH):
+    # Clé des résultats partagés : identifiant de la base + révision incrémentée à chaque écriture
+    with _lecture(db_path) as con:
+        meta = dict(con.execute("SELECT cle, valeur FROM meta"))
+    return f"sqlite-{meta['identifiant'][:12]}-{meta['revision']}"
+
+
+# --- Écriture ---
+
+def _ids_tickers(con, tickers):
+    con.executemany("INSERT OR IGNORE INTO tickers (ticker) VALUES (?)", [(str(t),) for t in tickers])
+    ids = dict(con.execute("SELECT ticker, id FROM tickers"))
+    return np.array([ids[str(t)] for t in tickers], dtype=np.int64)
+
+
+def _upsert_prix(con, prices):
+    store = as_price_store(prices)
+    ids = _ids_tickers(con, store.tickers)
+    valeurs = np.asarray(store.values, dtype=float)
+    # Format long sans les cellules vides : les NaN sont reconstitués à la lecture
+    i, j = np.nonzero(~np.isnan(valeurs))
+    dates = np.array(_dates_texte(store.dates), dtype=object)
+    con.executemany(
+        "INSERT INTO prix VALUES (?, ?, ?) ON CONFLICT (date, ticker_id) DO UPDATE SET prix = excluded.prix",
+        zip(dates[i].tolist(), ids[j].tolist(), valeurs[i, j].tolist()),
+    )
+    # Une cellule vidée dans la mise à jour supprime le prix stocké
+    i, j = np.nonzero(np.isnan(valeurs))
+    con.executemany("DELETE FROM prix WHERE date = ? AND ticker_id = ?", zip(dates[i].tolist(), ids[j].tolist()))
+    return len(store.dates)
+
+
+def _upsert_transactions(con, transactions):
+    # Les transactions n'ont pas de clé naturelle : celles des jours fournis sont remplacées
+    jours = sorted(set(_dates_texte(transactions["Date"])))
+    con.executemany('DELETE FROM transactions WHERE "Date" = ?', [(jour,) for jour in jours])
+    tx = transactions.reindex(columns=COLONNES_TRANSACTIONS)
+    lignes = zip(_dates_texte(tx["Date"]), *(tx[col].astype(object).where(tx[col].notna(), None).tolist()
+                                             for col in COLONNES_TRANSACTIONS[1:]))
+    colonnes = ", ".join(f'"{col}"' for col in COLONNES_TRANSACTIONS)
+    con.executemany(f"INSERT INTO transactions ({colonnes}) VALUES ({', '.join('?' * len(COLONNES_TRANSACTIONS))})",
+                    lignes)
+    types = {col: str(transactions[col].dtype) for col in TYPES_TRANSACTIONS
+             if col in transactions and pd.api.types.is_numeric_dtype(transactions[col])}
+    con.execute("INSERT INTO meta VALUES ('types_transactions', ?) "
+                "ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur", (json.dumps(types),))
+    return len(tx)
+
+
+def _types_transactions(con, df):
+    # Types enregistrés à l'écriture, TYPES_TRANSACTIONS à défaut ; une colonne entière avec des
+    # valeurs manquantes reste en flottants
+    ligne = con.execute("SELECT valeur FROM meta WHERE cle = 'types_transactions'").fetchone()
+    types = {**TYPES_TRANSACTIONS, **(json.loads(ligne[0]) if ligne else {})}
+    return {col: "float64" if pd.api.types.is_integer_dtype(dtype) and df[col].isna().any() else dtype
+            for col, dtype in types.items()}
+
+
+def upsert(db_path=DB_PATH, transactions=None, prices=None, benchmark=None, jours_marche=None, remplacer=False):
+    # Ajoute ou remplace les jours fournis, en une transaction ; renvoie la nouvelle révision.
+    # remplacer=True vide d'abord les tables dans la même transaction : un lecteur voit l'ancien
+    # contenu ou le nouveau, jamais une base vide
+    with closing(connect(db_path)) as con, con:
+        if remplacer:
+            for table in ("transactions", "prix", "benchmark", "jours_marche"):
+                con.execute(f"DELETE FROM {table}")
+        if jours_marche is not None:
+            con.executemany("INSERT OR IGNORE INTO jours_marche VALUES (?)",
+                            [(jour,) for jour in _dates_texte(jours_marche["Date"])])
+        if benchmark is not None:
+            con.executemany(
+                "INSERT INTO benchmark VALUES (?, ?) ON CONFLICT (date) DO UPDATE SET prix = excluded.prix",
+                zip(_dates_texte(benchmark["Date"]), benchmark["Prix"].astype(float).tolist()),
+            )
+        if prices is not None:
+            _upsert_prix(con, prices)
+        if transactions is not None:
+            _upsert_transactions(con, transactions)
+        con.execute("UPDATE meta SET valeur = CAST(valeur AS INTEGER) + 1 WHERE cle = 'revision'")
+        return int(con.execute("SELECT valeur FROM meta WHERE cle = 'revision'").fetchone()[0])
+
+
+def import_workbook(filepath="data/data.xlsx", db_path=DB_PATH):
+    # Import initial (ou ré-import complet) depuis le classeur Excel
+    from src.data_loader import load_data as load_workbook
+
+    data = load_workbook(filepath)
+    revision = upsert(db_path, data["transactions"], data["prices"], data["benchmark"], data["jours_marche"],
+                      remplacer=True)
+    with closing(sqlite3.connect(db_path)) as con:
+        con.execute("VACUUM")
+    return revision
+
+
+# --- Lectures par fenêtre de dates ---
+
+def read_market_days(db_path=DB_PATH, debut=None, fin=None):
+    where, parametres = _fenetre("date", debut, fin)
+    with _lecture(db_path) as con:
+        df = pd.read_sql_query(f"SELECT date AS Date FROM jours_marche{where} ORDER BY date", con, params=parametres)
+    return df.astype({"Date": "datetime64[ns]"})
+
+
+def read_benchmark(db_path=DB_PATH, debut=None, fin=None):
+    where, parametres = _fenetre("date", debut, fin)
+    with _lecture(db_path) as con:
+        df = pd.read_sql_query(f"SELECT date AS Date, prix AS Prix FROM benchmark{where} ORDER BY date", con,
+                               params=parametres)
+    return df.astype({"Date": "datetime64[ns]", "Prix": "float64"})
+
+
+def read_transactions(db_path=DB_PATH, debut=None, fin=None, tickers=None):
+    where, parametres = _fenetre('"Date"', debut, fin)
+    if tickers is not None:
+        tickers = [str(t) for t in tickers]
+        where += (" AND " if where else " WHERE ") + f'"Ticker" IN ({", ".join("?" * len(tickers))})'
+        parametres += tickers
+    colonnes = ", ".join(f'"{col}"' for col in COLONNES_TRANSACTIONS)
+    with _lecture(db_path) as con:
+        if tickers is not None and not tickers:
+            df = pd.DataFrame({col: pd.Series([], dtype=object) for col in COLONNES_TRANSACTIONS})
+        else:
+            df = pd.read_sql_query(f'SELECT {colonnes} FROM transactions{where} ORDER BY "Date", id', con,
+                                   params=parametres)
+        types = _types_transactions(con, df)
+    return df.astype(types)
+
+
+def read_prices(db_path=DB_PATH, debut=None, fin=None, tickers=None, dtype=np.float64):
+    # PriceStore limité à la fenêtre (et aux tickers) demandés ; NaN pour les prix absents
+    where, parametres = _fenetre("p.date", debut, fin)
+    with _lecture(db_path) as con:
+        if tickers is None:
+            colonnes = pd.read_sql_query("SELECT id, ticker FROM tickers ORDER BY id", con)
+        else:
+            tickers = [str(t) for t in tickers]
+            colonnes = pd.read_sql_query(
+                f"SELECT id, ticker FROM tickers WHERE ticker IN ({', '.join('?' * len(tickers))}) ORDER BY id",
+                con, params=tickers)
+            where += (" AND " if where else " WHERE ") + f"p.ticker_id IN ({', '.join('?' * len(colonnes))})"
+            parametres += colonnes["id"].tolist()
+        if tickers is not None and colonnes.empty:
+            # Aucun ticker demandé (ou connu) : pas de prix à lire, seulement les jours de marché
+            long = pd.DataFrame({"date": pd.Series([], dtype=object), "ticker_id": pd.Series([], dtype=np.int64),
+                                 "prix": pd.Series([], dtype=float)})
+        else:
+            long = pd.read_sql_query(f"SELECT p.date, p.ticker_id, p.prix FROM prix p{where} ORDER BY p.date",
+                                     con, params=parametres)
+        jours = read_market_days(db_path, debut, fin)["Date"]
+
+    dates = pd.DatetimeIndex(pd.to_datetime(long["date"]).unique()).union(pd.DatetimeIndex(jours))
+    valeurs = np.full((len(dates), len(colonnes)), np.nan, dtype=dtype)
+    i = dates.get_indexer(pd.to_datetime(long["date"]))
+    j = pd.Index(colonnes["id"]).get_indexer(long["ticker_id"])
+    valeurs[i, j] = long["prix"].to_numpy()
+    return PriceStore(dates, colonnes["ticker"].tolist(), valeurs, dtype=dtype)
+
+
+@profiling.timed("load_data (SQLite)")
+def load_data(db_path=DB_PATH, prices_dtype="float64", debut=None, fin=None):
+    # Même contrat que src.data_loader.load_data. Sans fenêtre, tout l'historique est chargé :
+    # le moteur a besoin des transactions depuis la création (positions et cash cumulés).
+    # Une fenêtre [debut, fin] sert les vues qui n'ont besoin que de cette période.
+    try:
+        return {
+            "transactions": read_transactions(db_path, debut, fin),
+            "benchmark": read_benchmark(db_path, debut, fin),
+            "prices": read_prices(db_path, debut, fin, dtype=prices_dtype),
+            "jours_marche": read_market_days(db_path, debut, fin),
+            "timings": {},
+            "version": version(db_path) + (f"-{_date_texte(debut)}-{_date_texte(fin)}" if debut or fin else ""),
+        }
+    except DataLoadError:
+        raise
+    except (ValueError, KeyError) as e:
+        raise StoreFormatError(f"Erreur de lecture de la base {db_path} : {e}") from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Base SQLite locale des données du fonds.")
+    parser.add_argument("--db", default=DB_PATH, help="chemin de la base")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    importer = commandes.add_parser("import", help="importe (ou ré-importe) le classeur Excel")
+    importer.add_argument("classeur", nargs="?", default="data/data.xlsx")
+    commandes.add_parser("info", help="résumé du contenu de la base")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.commande == "import":
+            revision = import_workbook(args.classeur, args.db)
+            print(f"{args.classeur} importé dans {args.db} (révision {revision})")
+        with _lecture(args.db) as con:
+            for table in ("transactions", "prix", "benchmark", "jours_marche", "tickers"):
+                nb = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                print(f"{table:<13} {nb:>10} lignes")
+            premier, dernier = con.execute("SELECT MIN(date), MAX(date) FROM jours_marche").fetchone()
+        print(f"jours de marché du {premier} au {dernier} · version {version(args.db)}")
+    except DataLoadError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
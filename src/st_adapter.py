@@ -0,0 +1,82 @@
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from src import data_loader, profiling
+from src.exceptions import WorkbookNotFoundError, DataLoadError
+from src.results import get_portfolio_results
+from src.startup import DATA_PATH, take_data
+
+# Adaptateur Streamlit : seul module de src/ qui importe Streamlit (hors lanceur src.startup).
+# Les pages passent par ici ; le reste de src/ reste utilisable hors serveur.
+
+# Paramètre d'URL activant le panneau de performance pour la session (?profiling=1)
+PARAM_PROFILING = "profiling"
+
+# Positionné par le corps de la fonction mise en cache : il ne s'exécute qu'en cas de miss
+_appel = threading.local()
+
+
+@st.cache_data
+def _load_data(filepath, prices_dtype):
+    _appel.miss = True
+    # Données déjà chargées par le préchauffage du serveur (src.startup), sinon lecture
+    data = take_data(filepath, prices_dtype)
+    if data is not None:
+        return data
+    try:
+        return data_loader.load_data(filepath, prices_dtype)
+    except WorkbookNotFoundError:
+        st.error("Fichier `data.xlsx` non trouvé dans le dossier `data/`.")
+        st.stop()
+    except DataLoadError as e:
+        st.error(str(e))
+        st.stop()
+
+
+def load_data(filepath: str = DATA_PATH, prices_dtype: str = "float64") -> dict:
+    _appel.miss = False
+    data = _load_data(filepath, prices_dtype)
+    profiling.record_cache("st.cache_data load_data", not _appel.miss)
+    return data
+
+
+def load_results(capital_initial=100_000, taux_cash=0.03):
+    # Données (cache Streamlit de la session) + résultats partagés entre sessions
+    data = load_data()
+    return data, get_portfolio_results(data, capital_initial=capital_initial, taux_cash=taux_cash)
+
+
+def profiling_start(page):
+    # Ouvre la trace du rerun si le profilage est demandé (SBR_PROFILING=1 ou ?profiling=1)
+    # Activation propre au thread du rerun : le ?profiling=1 d'un visiteur ne ralentit pas les autres sessions
+    actif = profiling.ACTIF_PAR_DEFAUT or st.query_params.get(PARAM_PROFILING) == "1"
+    profiling.enable(actif)
+    if actif:
+        profiling.start_trace(page)
+    else:
+        profiling.clear_trace()
+
+
+def profiling_panel():
+    # Panneau de la barre latérale : temps par étape, caches et mémoire du rerun
+    trace = profiling.end_trace()
+    if trace is None:
+        return
+    mo = 2 ** 20
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.caption(f"{trace.nom} : {trace.duree * 1000:.0f} ms · mémoire {trace.memoire_fin / mo:.0f} Mo "
+                   f"({(trace.memoire_fin - trace.memoire_debut) / mo:+.1f} Mo)")
+        etapes = pd.DataFrame(
+            [("  " * (profondeur - 1) + "↳ " * (profondeur > 0) + nom, duree * 1000)
+             for nom, debut, duree, profondeur in sorted(trace.etapes, key=lambda etape: etape[1])],
+            columns=["Étape", "ms"]
+        )
+        st.dataframe(etapes.style.format({"ms": "{:.1f}"}), hide_index=True, use_container_width=True)
+        if trace.caches:
+            caches = pd.DataFrame([(nom, "hit" if hit else "miss") for nom, hit in trace.caches],
+                                  columns=["Cache", "Résultat"])
+            st.dataframe(caches, hide_index=True, use_container_width=True)
+        if st.button("Exporter les traces"):
+            st.caption(f"Traces écrites dans `{profiling.dump_traces()}`")
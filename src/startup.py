@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+import threading
+
+# Démarrage du serveur : préchauffage en arrière-plan (données, résultats partagés, caches dérivés) pour que
+# la première page servie trouve tout en mémoire. Module volontairement léger : pandas, le moteur et plotly
+# ne sont importés que dans le thread de préchauffage.
+#   SBR_DATA=... python -m src.startup [--sans-prechauffage] [options de `streamlit run`]
+
+# Source des données : classeur Excel ou base SQLite (src.sqlite_store), ex. SBR_DATA=data/portfolio.sqlite
+DATA_PATH = os.environ.get("SBR_DATA", "data/data.xlsx")
+MAIN_SCRIPT = "main.py"
+# Paramètres des pages (src.st_adapter.load_results)
+CAPITAL_INITIAL = 100_000
+TAUX_CASH = 0.03
+# Attente maximale (secondes) des données du préchauffage par une page, avant de les lire elle-même
+ATTENTE_MAX = 120
+
+_donnees = {}        # (fichier, dtype des prix) -> données chargées par le préchauffage, remises une fois
+_en_cours = {}       # (fichier, dtype des prix) -> Event levé à la fin du chargement
+_thread = None
+_verrou = threading.Lock()
+
+
+def warm_up(filepath=DATA_PATH, capital_initial=CAPITAL_INITIAL, taux_cash=TAUX_CASH, prices_dtype="float64"):
+    # Charge les données puis remplit les caches partagés du processus : résultats (src.results),
+    # VaR (src.risk), historique de covariance (src.covariance) et modules de graphiques (plotly)
+    cle = (filepath, prices_dtype)
+    with _verrou:
+        fin_chargement = _en_cours.setdefault(cle, threading.Event())
+    trace = None
+    try:
+        from src import profiling
+        from src.data_loader import load_data
+        from src.exceptions import DataLoadError
+
+        if profiling.ACTIF_PAR_DEFAUT:
+            trace = profiling.start_trace("Préchauffage")
+        try:
+            data = load_data(filepath, prices_dtype)
+        except DataLoadError:
+            # La page affichera l'erreur à son propre chargement
+            return None
+        with _verrou:
+            _donnees[cle] = data
+        fin_chargement.set()
+
+        import pandas as pd
+
+        from src.covariance import get_covariance
+        from src.plots import line_chart
+        from src.results import get_portfolio_results
+        from src.risk import var_table
+
+        results = get_portfolio_results(data, capital_initial=capital_initial, taux_cash=taux_cash)
+        with profiling.stage("VaR / CVaR"):
+            var_table(results)
+        with profiling.stage("covariance"):
+            get_covariance(results)
+        with profiling.stage("plotly"):
+            line_chart(pd.DataFrame({"x": [0, 1], "y": [0.0, 1.0]}), x="x", y="y").to_json()
+        return results
+    finally:
+        # Quelle que soit l'issue (import, chargement, calcul), les pages en attente sont libérées
+        fin_chargement.set()
+        if trace is not None:
+            profiling.end_trace()
+
+
+def start_warm_up(filepath=DATA_PATH, **kwargs):
+    # Lance le préchauffage dans un thread démon, une seule fois par processus
+    global _thread
+    with _verrou:
+        if _thread is not None:
+            return _thread
+        _en_cours.setdefault((filepath, kwargs.get("prices_dtype", "float64")), threading.Event())
+        _thread = threading.Thread(target=warm_up, args=(filepath,), kwargs=kwargs, name="prechauffage",
+                                   daemon=True)
+    _thread.start()
+    return _thread
+
+
+def take_data(filepath=DATA_PATH, prices_dtype="float64", attente_max=ATTENTE_MAX):
+    # Données chargées par le préchauffage (attend la fin du chargement s'il est en cours, au plus
+    # `attente_max` secondes) ; remises une seule fois, le cache de l'appelant prend le relais.
+    # None sans préchauffage, en cas d'échec ou d'attente trop longue : l'appelant lit lui-même
+    with _verrou:
+        fin_chargement = _en_cours.get((filepath, prices_dtype))
+    if fin_chargement is None or not fin_chargement.wait(attente_max):
+        return None
+    with _verrou:
+        return _donnees.pop((filepath, prices_dtype), None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Lance le tableau de bord Streamlit après avoir démarré le préchauffage des caches.",
+        epilog="Les autres options sont transmises à `streamlit run` (ex. --server.port 8502).")
+    parser.add_argument("--sans-prechauffage", action="store_true", help="démarrage à froid (mesures)")
+    args, options_streamlit = parser.parse_known_args(argv)
+
+    # Streamlit (et pandas, qu'il importe) avant le thread : plotly teste la présence de pandas dans
+    # sys.modules et ne doit pas y trouver un module en cours d'import
+    from streamlit.web import cli
+
+    if not args.sans_prechauffage:
+        start_warm_up()
+    return cli.main(["run", MAIN_SCRIPT, *options_streamlit], prog_name="streamlit", standalone_mode=False)
+
+
+if __name__ == "__main__":
+    # `python -m src.startup` exécute ce fichier sous le nom __main__ : main.py et src.st_adapter
+    # importent src.startup, un autre module. Le lanceur passe par ce dernier pour que le thread et les
+    # données du préchauffage soient ceux que les pages consultent
+    from src import startup
+
+    sys.exit(startup.main())
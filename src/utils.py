@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# Conventions communes à toutes les pages
+RF_ANNUEL = 0.0475      # taux sans risque annuel
+JOURS_PAR_AN = 252      # annualisation des rendements journaliers
+
+# Libellés des fenêtres non mensuelles de la table des KPIs
+FENETRE_CREATION = "Création"
+FENETRE_YTD = "YTD"
+
+
+def _fenetres(dates, annee_ytd):
+    # Chaque date appartient à son mois ("2024-01"), son année ("2024"),
+    # à la fenêtre YTD si elle est dans l'année en cours, et à la fenêtre depuis création
+    dates = pd.Series(pd.DatetimeIndex(dates))
+    annee = dates.dt.strftime("%Y")
+    blocs = [
+        pd.DataFrame({"Fenetre": dates.dt.strftime("%Y-%m"), "Type": "Mois", "Date": dates}),
+        pd.DataFrame({"Fenetre": annee, "Type": "Année", "Date": dates}),
+        pd.DataFrame({"Fenetre": FENETRE_YTD, "Type": "YTD", "Date": dates[annee == annee_ytd]}),
+        pd.DataFrame({"Fenetre": FENETRE_CREATION, "Type": "Création", "Date": dates}),
+    ]
+    return pd.concat(blocs, ignore_index=True)
+
+
+def _serie_par_fenetre(df, colonne, annee_ytd, niveau_initial=None):
+    # Valeurs de `colonne` rattachées à chaque fenêtre. Rendements journaliers calculés sur toute la série :
+    # le premier jour d'un mois, d'une année ou du YTD garde son rendement depuis la clôture précédente.
+    # Base = dernière clôture avant la fenêtre ; avant le premier jour, `niveau_initial` (capital de départ)
+    # s'il est connu, sinon le premier niveau. "Création" part toujours du premier niveau
+    valeurs = df.drop_duplicates("Date").set_index("Date")[colonne].sort_index()
+    rendements = valeurs.pct_change()
+    veille = valeurs.shift(1)
+    if len(veille) and niveau_initial is not None:
+        veille.iloc[0] = niveau_initial
+    veille = veille.fillna(valeurs)
+    long = _fenetres(valeurs.index, annee_ytd)
+    long["Valeur"] = valeurs.reindex(long["Date"]).to_numpy()
+    long["Rendement"] = rendements.reindex(long["Date"]).to_numpy()
+    long = long.sort_values(["Fenetre", "Date"], kind="stable").reset_index(drop=True)
+    premiers = long.groupby("Fenetre")["Date"].transform("first")
+    long["Base"] = veille.reindex(premiers).to_numpy()
+    creation = long["Fenetre"] == FENETRE_CREATION
+    long.loc[creation, "Base"] = long.loc[creation, "Valeur"].iloc[0] if creation.any() else np.nan
+    return long
+
+
+def compute_kpi_table(report, benchmark, rf_annuel=RF_ANNUEL, capital_initial=None):
+    # Tous les KPIs, pour chaque mois, chaque année, YTD et depuis création, en une passe groupée.
+    # Performances depuis la clôture précédant la fenêtre (capital_initial avant le premier jour)
+    if report.empty:
+        return pd.DataFrame()
+    annee_ytd = report["Date"].max().strftime("%Y")
+    ptf = _serie_par_fenetre(report, "Valeur Liquidative", annee_ytd, niveau_initial=capital_initial)
+    bench = _serie_par_fenetre(benchmark, "Prix", annee_ytd)
+
+    # Performance, nombre de jours et max drawdown sur la VL
+    groupes_ptf = ptf.groupby("Fenetre", sort=False)
+    table = groupes_ptf.agg(
+        Type=("Type", "first"),
+        Debut=("Date", "first"),
+        Fin=("Date", "last"),
+        Nb_Jours=("Date", "size"),
+        VL_Debut=("Base", "first"),
+        VL_Fin=("Valeur", "last"),
+    )
+    # Drawdown depuis la base de la fenêtre (clôture précédente comprise dans le plus haut)
+    plus_haut = np.maximum(groupes_ptf["Valeur"].cummax(), ptf["Base"])
+    ptf["Drawdown"] = (ptf["Valeur"] / plus_haut - 1).clip(upper=0)
+    table["Max_Drawdown"] = ptf.groupby("Fenetre", sort=False)["Drawdown"].min()
+    table["Perf_Ptf"] = table["VL_Fin"] / table["VL_Debut"] - 1
+    perf_bench = bench.groupby("Fenetre", sort=False).agg(base=("Base", "first"), fin=("Valeur", "last"))
+    table["Perf_Bench"] = perf_bench["fin"] / perf_bench["base"] - 1
+
+    # Moments des rendements journaliers (jours communs ptf / benchmark) par sommes
+    merged = pd.merge(
+        ptf[["Fenetre", "Date", "Rendement"]].rename(columns={"Rendement": "x"}),
+        bench[["Fenetre", "Date", "Rendement"]].rename(columns={"Rendement": "y"}),
+        on=["Fenetre", "Date"],
+        how="inner"
+    ).dropna()
+    x, y = merged["x"], merged["y"]
+    negatif = x < 0
+    sommes = merged.assign(
+        xx=x * x, yy=y * y, xy=x * y,
+        x_neg=x.where(negatif, 0.0), xx_neg=(x * x).where(negatif, 0.0), n_neg=negatif.astype(int),
+    ).groupby("Fenetre", sort=False).agg(
+        n=("x", "size"), sx=("x", "sum"), sy=("y", "sum"), sxx=("xx", "sum"), syy=("yy", "sum"),
+        sxy=("xy", "sum"), sx_neg=("x_neg", "sum"), sxx_neg=("xx_neg", "sum"), n_neg=("n_neg", "sum"),
+    ).reindex(table.index)
+
+    n = sommes["n"]
+    var_x = (sommes["sxx"] - sommes["sx"] ** 2 / n) / (n - 1)
+    var_y = (sommes["syy"] - sommes["sy"] ** 2 / n) / (n - 1)
+    cov_xy = (sommes["sxy"] - sommes["sx"] * sommes["sy"] / n) / (n - 1)
+    var_neg = (sommes["sxx_neg"] - sommes["sx_neg"] ** 2 / sommes["n_neg"]) / (sommes["n_neg"] - 1)
+    var_ecart = var_x + var_y - 2 * cov_xy
+    racine_an = np.sqrt(JOURS_PAR_AN)
+
+    table["Vol_Ptf"] = np.sqrt(var_x.clip(lower=0)) * racine_an
+    table["Vol_Bench"] = np.sqrt(var_y.clip(lower=0)) * racine_an
+    table["Beta"] = cov_xy / var_y
+    table["Correlation"] = cov_xy / np.sqrt(var_x * var_y)
+    table["R2"] = table["Correlation"] ** 2
+    table["Tracking_Error"] = np.sqrt(var_ecart.clip(lower=0)) * racine_an
+    downside_risk = np.sqrt(var_neg.clip(lower=0)) * racine_an
+
+    # Performance annualisée par composition : seulement pour les fenêtres d'au moins un an
+    # (composer 20 jours sur 252 amplifie le moindre mouvement)
+    table["Perf_Annualisee"] = ((1 + table["Perf_Ptf"]) ** (JOURS_PAR_AN / table["Nb_Jours"]) - 1).where(
+        table["Nb_Jours"] >= JOURS_PAR_AN)
+    # Ratios annualisés arithmétiquement, comme les indicateurs roulants (src.rolling) : rendement
+    # journalier moyen x 252, net du taux sans risque, rapporté au risque annualisé (x racine de 252)
+    table["Rendement_Moyen_Annualise"] = sommes["sx"] / n * JOURS_PAR_AN
+    exces = table["Rendement_Moyen_Annualise"] - rf_annuel
+    table["Sharpe"] = exces / table["Vol_Ptf"]
+    table["Sortino"] = exces / downside_risk
+    table["Treynor"] = exces / table["Beta"]
+    table["Info_Ratio"] = (table["Perf_Ptf"] - table["Perf_Bench"]) / table["Tracking_Error"]
+
+    table = table.drop(columns=["VL_Debut", "VL_Fin"]).replace([np.inf, -np.inf], np.nan)
+    table.index.name = "Fenetre"
+    return table
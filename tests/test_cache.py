@@ -0,0 +1,91 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import cache
+
+
+@pytest.fixture
+def classeur(tmp_path):
+    chemin = tmp_path / "classeur.xlsx"
+    chemin.write_bytes(b"contenu-1")
+    return chemin
+
+
+def _lecteur(appels):
+    # Faux lecteur : une feuille = le contenu du fichier, appels enregistrés
+    def reader(filepath, feuilles):
+        appels.append(list(feuilles))
+        with open(filepath, "rb") as f:
+            contenu = f.read().decode()
+        return {feuille: pd.DataFrame({"feuille": [feuille], "contenu": [contenu]}) for feuille in feuilles}
+    return reader
+
+
+def _charger(classeur, tmp_path, appels, **kwargs):
+    frames = cache.load_sheets(str(classeur), ["A", "B"], _lecteur(appels), cache_dir=str(tmp_path / "cache"),
+                               **kwargs)
+    return frames["A"]["contenu"].iloc[0]
+
+
+def _modifier(chemin, contenu, decalage_mtime=10):
+    stat = os.stat(chemin)
+    chemin.write_bytes(contenu)
+    os.utime(chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns + decalage_mtime * 10 ** 9))
+
+
+def test_cache_resservi_sans_relire(classeur, tmp_path):
+    appels = []
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert appels == [["A", "B"]]
+
+
+@pytest.mark.parametrize("contenu", [b"contenu-2", b"contenu-plus-long"], ids=["meme-taille", "autre-taille"])
+def test_modification_invalide_le_cache(classeur, tmp_path, contenu):
+    appels = []
+    _charger(classeur, tmp_path, appels)
+    _modifier(classeur, contenu)
+    assert _charger(classeur, tmp_path, appels) == contenu.decode()
+    assert len(appels) == 2
+
+
+def test_mtime_seul_garde_le_cache(classeur, tmp_path):
+    # Fichier réenregistré sans changement : nouveau hash calculé, même version, pas de relecture
+    appels = []
+    _charger(classeur, tmp_path, appels)
+    _modifier(classeur, b"contenu-1")
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert len(appels) == 1
+
+
+def test_format_lecteur_invalide_le_cache(classeur, tmp_path):
+    appels = []
+    _charger(classeur, tmp_path, appels)
+    _charger(classeur, tmp_path, appels, format_lecteur=1)
+    assert len(appels) == 2
+
+
+@pytest.mark.parametrize("corruption", [b"", b"PAR1 tronque"], ids=["vide", "tronque"])
+def test_fichier_corrompu_relu_depuis_le_classeur(classeur, tmp_path, corruption):
+    appels = []
+    _charger(classeur, tmp_path, appels)
+    version = cache._dossier_version(cache.workbook_version(str(classeur), str(tmp_path / "cache")), 0)
+    chemin = cache._chemin_feuille(str(tmp_path / "cache"), version, "A")
+    with open(chemin, "wb") as f:
+        f.write(corruption)
+
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert appels == [["A", "B"], ["A"]]
+    # Feuille réécrite : le chargement suivant est de nouveau servi par le cache
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert len(appels) == 2
+
+
+def test_index_corrompu(classeur, tmp_path):
+    appels = []
+    _charger(classeur, tmp_path, appels)
+    (tmp_path / "cache" / cache.INDEX_FILE).write_text("{pas du json")
+    assert _charger(classeur, tmp_path, appels) == "contenu-1"
+    assert len(appels) == 1
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.compute_engine import compute_daily_report
+from src.data_loader import load_data
+
+DATA_PATH = "data/data.xlsx"
+# VL produite par le moteur d'origine (boucle jour par jour du commit de base) sur data.xlsx,
+# capital initial 100 000, cash à 3 % : référence figée, indépendante des deux moteurs testés
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "baseline_nav.csv")
+
+
+def _synthetique(seed, nb_jours=120, nb_tickers=12, nb_transactions=300):
+    # Prix manquants (~5 %), transactions hors calendrier (avant le premier jour de marché, week-ends)
+    # et type d'opération inconnu ("Autre")
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-16", periods=nb_jours)
+    tickers = [f"T{i}" for i in range(nb_tickers)]
+    prix = pd.DataFrame(rng.uniform(10, 200, (nb_jours, nb_tickers)), index=dates, columns=tickers)
+    prix = prix.mask(rng.random(prix.shape) < 0.05)
+    jours_tx = rng.choice(pd.date_range("2024-01-10", periods=int(nb_jours * 1.5)), nb_transactions)
+    transactions = pd.DataFrame({
+        "Date": jours_tx,
+        "Type": rng.choice(["Achat", "Vente", "Short", "Rachat", "Autre"], nb_transactions),
+        "Ticker": rng.choice(tickers, nb_transactions),
+        "Nb actions": rng.integers(1, 100, nb_transactions),
+        "Prix local unitaire": rng.uniform(10, 200, nb_transactions),
+        "Frais": rng.integers(0, 20, nb_transactions).astype(float),
+    }).sort_values("Date", kind="stable").reset_index(drop=True)
+    prix_long = prix.rename_axis("Date").reset_index().melt(id_vars="Date", var_name="Ticker", value_name="Prix")
+    return transactions, prix_long, pd.DataFrame({"Date": dates})
+
+
+def _comparer(transactions, prices, jours_marche, capital_initial=100_000, taux_cash=0.03):
+    reference, positions_reference = compute_daily_report(
+        transactions, prices, jours_marche, capital_initial, taux_cash, mode="boucle", with_positions=True)
+    report, positions = compute_daily_report(
+        transactions, prices, jours_marche, capital_initial, taux_cash, mode="vectorise", with_positions=True)
+
+    assert list(report.columns) == list(reference.columns)
+    pd.testing.assert_frame_equal(report, reference, check_dtype=False, rtol=1e-9)
+    assert positions.dates.equals(positions_reference.dates)
+    np.testing.assert_array_equal(positions_reference.reindex_tickers(positions.tickers), positions.to_dense())
+    # Tickers jamais détenus par la boucle : absents ou à zéro dans le moteur vectorisé
+    np.testing.assert_array_equal(positions.reindex_tickers(positions_reference.tickers),
+                                  positions_reference.to_dense())
+
+
+def _classeur(cache_dir):
+    return load_data(DATA_PATH, cache_dir=str(cache_dir))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorise_equivalent_boucle_synthetique(seed):
+    _comparer(*_synthetique(seed))
+
+
+def test_vectorise_equivalent_boucle_sans_transaction():
+    transactions, prices, jours_marche = _synthetique(0)
+    _comparer(transactions.iloc[:0], prices, jours_marche)
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="classeur de données absent")
+def test_vectorise_equivalent_boucle_classeur(tmp_path):
+    data = _classeur(tmp_path)
+    _comparer(data["transactions"], data["prices"], data["jours_marche"])
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="classeur de données absent")
+@pytest.mark.parametrize("mode", ["boucle", "vectorise"])
+def test_moteur_egal_reference_figee(mode, tmp_path):
+    reference = pd.read_csv(REFERENCE_PATH, parse_dates=["Date"])
+    data = _classeur(tmp_path)
+    report = compute_daily_report(data["transactions"], data["prices"], data["jours_marche"], 100_000, 0.03,
+                                  mode=mode)
+    pd.testing.assert_frame_equal(report[list(reference.columns)].reset_index(drop=True), reference,
+                                  check_dtype=False, rtol=1e-12)
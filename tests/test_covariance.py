@@ -0,0 +1,72 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import covariance
+from src.covariance import CovarianceHistory, get_covariance
+from src.price_store import ResolvedPrices
+
+
+def _prix(seed, nb_jours=150, nb_tickers=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=nb_jours)
+    valeurs = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (nb_jours, nb_tickers)), axis=0))
+    return ResolvedPrices(dates, [f"T{i}" for i in range(nb_tickers)], valeurs,
+                          np.zeros(valeurs.shape, dtype=np.int64))
+
+
+def _rendements(prix):
+    return prix.values[1:] / prix.values[:-1] - 1     # ligne s - 1 = rendement du jour s
+
+
+# Mémoire réduite : un état conservé tous les quelques jours, les autres rejoués à la demande
+@pytest.mark.parametrize("memoire_max", [covariance.MEMOIRE_MAX, 200])
+def test_glissante_egale_np_cov(memoire_max):
+    prix = _prix(0)
+    historique = CovarianceHistory(prix, "glissante", fenetre=60, memoire_max=memoire_max)
+    rendements = _rendements(prix)
+    for i in (2, 30, 59, 60, 61, 100, 149):
+        fenetre = rendements[max(i - 60, 0):i]
+        attendu = np.cov(fenetre, rowvar=False, bias=True)
+        np.testing.assert_allclose(historique.covariance(prix.dates[i]), attendu, rtol=1e-4, atol=1e-9)
+
+
+@pytest.mark.parametrize("memoire_max", [covariance.MEMOIRE_MAX, 200])
+def test_ewma_egale_somme_ponderee(memoire_max):
+    prix = _prix(1)
+    historique = CovarianceHistory(prix, "ewma", lambda_ewma=0.94, memoire_max=memoire_max)
+    rendements = _rendements(prix)
+    for i in (1, 10, 75, 149):
+        poids = (1 - 0.94) * 0.94 ** np.arange(i - 1, -1, -1)
+        r = rendements[:i]
+        attendu = (r * poids[:, None]).T @ r
+        np.testing.assert_allclose(historique.covariance(prix.dates[i]), attendu, rtol=1e-4, atol=1e-9)
+
+
+def test_get_covariance_construit_une_fois(monkeypatch):
+    # Sessions concurrentes sur la même clé : une seule construction, le même objet pour tous
+    constructions = []
+
+    class HistoriqueLent(CovarianceHistory):
+        def __init__(self, *args, **kwargs):
+            constructions.append(1)
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(covariance, "CovarianceHistory", HistoriqueLent)
+    covariance.clear_covariance()
+    results = SimpleNamespace(version="v", capital_initial=100_000, taux_cash=0.03, prix=_prix(2, nb_jours=20))
+    obtenus = []
+    threads = [threading.Thread(target=lambda: obtenus.append(get_covariance(results))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    covariance.clear_covariance()
+
+    assert len(constructions) == 1
+    assert len(obtenus) == 8 and all(historique is obtenus[0] for historique in obtenus)
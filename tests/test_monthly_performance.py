@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.compute_engine import compute_daily_report
+from src.data_loader import load_data
+from src.monthly_performance import COLONNE_TOTAL, MOIS_ORDRE, compute_monthly_calendar
+from src.utils import FENETRE_YTD, compute_kpi_table
+
+DATA_PATH = "data/data.xlsx"
+
+
+def _series(seed=0, nb_jours=420):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-16", periods=nb_jours)
+    vl = 100_000 * np.cumprod(1 + rng.normal(0.0005, 0.01, nb_jours))
+    prix = 8000 * np.cumprod(1 + rng.normal(0.0003, 0.012, nb_jours))
+    return pd.DataFrame({"Date": dates, "Valeur Liquidative": vl}), pd.DataFrame({"Date": dates, "Prix": prix})
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_mois_composes_egaux_aux_kpis_annuels(seed):
+    report, benchmark = _series(seed)
+    calendrier = compute_monthly_calendar(report, benchmark, totaux=True, capital_initial=100_000)
+    kpis = compute_kpi_table(report, benchmark, capital_initial=100_000)
+    annee_courante = str(report["Date"].max().year)
+
+    for annee in ("2024", "2025"):
+        for ligne, colonne in ((f"{annee} - Ptf", "Perf_Ptf"), (f"{annee} - Bench", "Perf_Bench")):
+            mois = calendrier.loc[ligne, MOIS_ORDRE].dropna()
+            # Le calendrier est arrondi à 4 décimales
+            assert np.prod(1 + mois) - 1 == pytest.approx(kpis.loc[annee, colonne], abs=5e-4)
+            assert calendrier.loc[ligne, COLONNE_TOTAL] == pytest.approx(kpis.loc[annee, colonne], abs=1e-4)
+    assert calendrier.loc[f"{annee_courante} - Ptf", COLONNE_TOTAL] == pytest.approx(
+        kpis.loc[FENETRE_YTD, "Perf_Ptf"], abs=1e-4)
+
+
+def test_mois_depuis_cloture_precedente():
+    report, benchmark = _series()
+    calendrier = compute_monthly_calendar(report, benchmark)
+    vl = report.set_index("Date")["Valeur Liquidative"]
+    attendu = vl[:"2024-03-31"].iloc[-1] / vl[:"2024-02-29"].iloc[-1] - 1
+    assert calendrier.loc["2024 - Ptf", "Mar"] == pytest.approx(attendu, abs=1e-4)
+    # Sans capital initial, le premier mois part du premier niveau
+    assert calendrier.loc["2024 - Ptf", "Jan"] == pytest.approx(vl[:"2024-01-31"].iloc[-1] / vl.iloc[0] - 1, abs=1e-4)
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="classeur de données absent")
+def test_total_egal_ytd_classeur(tmp_path):
+    data = load_data(DATA_PATH, cache_dir=str(tmp_path))
+    report = compute_daily_report(data["transactions"], data["prices"], data["jours_marche"], 100_000, 0.03)
+    calendrier = compute_monthly_calendar(report, data["benchmark"], totaux=True, capital_initial=100_000)
+    kpis = compute_kpi_table(report, data["benchmark"], capital_initial=100_000)
+    annee = str(report["Date"].max().year)
+    assert calendrier.loc[f"{annee} - Ptf", COLONNE_TOTAL] == pytest.approx(kpis.loc[FENETRE_YTD, "Perf_Ptf"], abs=1e-4)
+    assert calendrier.loc[f"{annee} - Bench", COLONNE_TOTAL] == pytest.approx(
+        kpis.loc[FENETRE_YTD, "Perf_Bench"], abs=1e-4)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.compute_engine import SENS_OPERATIONS
+from src.pnl import compute_pnl
+from src.price_store import ResolvedPrices
+
+
+def _synthetique(seed, nb_jours=60, nb_tickers=3, nb_transactions=200):
+    # Transactions tirées en fonction de la position courante : ventes partielles, liquidations
+    # exactes (retour à zéro), retournements long / short et renforcements
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=nb_jours)
+    tickers = [f"T{i}" for i in range(nb_tickers)]
+    valeurs = rng.uniform(10, 200, (nb_jours, nb_tickers))
+    valeurs[rng.random(valeurs.shape) < 0.05] = np.nan
+    prix = ResolvedPrices(dates, tickers, valeurs, np.zeros(valeurs.shape, dtype=np.int64))
+
+    position = dict.fromkeys(tickers, 0)
+    lignes = []
+    for jour in np.sort(rng.integers(0, nb_jours, nb_transactions)):
+        ticker = tickers[rng.integers(nb_tickers)]
+        courante = position[ticker]
+        tirage = rng.random()
+        if courante and tirage < 0.25:
+            quantite = -courante                                     # liquidation complète
+        elif courante and tirage < 0.5:
+            quantite = -np.sign(courante) * rng.integers(1, abs(courante) + 1)   # vente partielle
+        elif courante and tirage < 0.6:
+            quantite = -courante - np.sign(courante) * rng.integers(1, 50)        # retournement
+        else:
+            quantite = int(rng.choice([-1, 1])) * int(rng.integers(1, 50))
+        position[ticker] = courante + quantite
+        if quantite > 0:
+            type_op = "Rachat" if courante < 0 else "Achat"
+        else:
+            type_op = "Vente" if courante > 0 else "Short"
+        lignes.append({
+            "Date": dates[jour], "Type": type_op, "Ticker": ticker, "Nb actions": abs(int(quantite)),
+            "Prix local unitaire": rng.uniform(10, 200), "Frais": float(rng.integers(0, 20)),
+        })
+    return pd.DataFrame(lignes), prix
+
+
+def _grand_livre(transactions, prix, methode):
+    # Référence : registre explicite des lots ouverts [quantité signée, coût], opération par opération
+    dates, tickers = prix.dates, list(prix.tickers)
+    lots = {ticker: [] for ticker in tickers}
+    realise = dict.fromkeys(tickers, 0.0)
+    cout_revient = np.zeros((len(dates), len(tickers)))
+    pnl_realise = np.zeros_like(cout_revient)
+    pnl_latent = np.zeros_like(cout_revient)
+    operations = {date: groupe.to_dict("records") for date, groupe in transactions.groupby("Date")}
+
+    for i, date in enumerate(dates):
+        for op in operations.get(date, []):
+            ticker = op["Ticker"]
+            quantite = SENS_OPERATIONS[op["Type"].lower()] * float(op["Nb actions"])
+            unitaire, frais = op["Prix local unitaire"], op["Frais"]
+            registre = lots[ticker]
+            detenu = sum(q for q, _ in registre)
+            if detenu * quantite < 0:
+                ferme = np.sign(quantite) * min(abs(quantite), abs(detenu))
+                frais_fermeture = frais * abs(ferme) / abs(quantite)
+                if methode == "pmp":
+                    cout_total = sum(c for _, c in registre)
+                    libere = cout_total * abs(ferme) / abs(detenu)
+                    reste = detenu + ferme
+                    registre[:] = [[reste, cout_total - libere]] if reste else []
+                else:
+                    libere, a_fermer = 0.0, abs(ferme)
+                    while a_fermer > 0:
+                        q, c = registre[0]
+                        pris = min(abs(q), a_fermer)
+                        libere += c * pris / abs(q)
+                        a_fermer -= pris
+                        if pris == abs(q):
+                            registre.pop(0)
+                        else:
+                            registre[0] = [q - np.sign(q) * pris, c * (1 - pris / abs(q))]
+                realise[ticker] += -(ferme * unitaire + frais_fermeture) - libere
+                quantite -= ferme
+                frais -= frais_fermeture
+            if quantite:
+                registre.append([quantite, quantite * unitaire + frais])
+        for j, ticker in enumerate(tickers):
+            detenu = sum(q for q, _ in lots[ticker])
+            cout = sum(c for _, c in lots[ticker]) if detenu else 0.0
+            cout_revient[i, j] = cout
+            pnl_realise[i, j] = realise[ticker]
+            pnl_latent[i, j] = detenu * prix.values[i, j] - cout if detenu else 0.0
+    return cout_revient, pnl_realise, pnl_latent
+
+
+@pytest.mark.parametrize("methode", ["pmp", "fifo"])
+@pytest.mark.parametrize("seed", range(4))
+def test_pnl_egal_grand_livre(seed, methode):
+    transactions, prix = _synthetique(seed)
+    attendu = _grand_livre(transactions, prix, methode)
+    panel = compute_pnl(transactions, prix, methode)
+    for obtenu, reference in zip((panel.cout_revient, panel.pnl_realise, panel.pnl_latent), attendu):
+        np.testing.assert_allclose(obtenu, reference, rtol=1e-9, atol=1e-6)
+
+
+def test_liquidation_complete_solde_le_cout():
+    # Achat en deux lots puis vente du total : plus de coût de revient, réalisé = encaissé - décaissé
+    dates = pd.bdate_range("2024-01-02", periods=3)
+    prix = ResolvedPrices(dates, ["A"], np.array([[10.0], [12.0], [15.0]]), np.zeros((3, 1), dtype=np.int64))
+    transactions = pd.DataFrame({
+        "Date": dates[[0, 1, 2]], "Type": ["Achat", "Achat", "Vente"], "Ticker": "A",
+        "Nb actions": [10, 5, 15], "Prix local unitaire": [10.0, 12.0, 15.0], "Frais": [1.0, 1.0, 2.0],
+    })
+    for methode in ("pmp", "fifo"):
+        panel = compute_pnl(transactions, prix, methode)
+        assert panel.cout_revient[-1, 0] == 0.0
+        assert panel.pnl_latent[-1, 0] == 0.0
+        assert panel.pnl_realise[-1, 0] == pytest.approx(15 * 15.0 - 2.0 - (10 * 10.0 + 1.0) - (5 * 12.0 + 1.0))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.range_index import PerformanceRangeIndex, SeriesRangeIndex
+
+
+def _serie(seed, n):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=n)
+    valeurs = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return dates, valeurs
+
+
+def _max_drawdown(valeurs):
+    return float(np.min(valeurs / np.maximum.accumulate(valeurs) - 1))
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 64, 77])
+def test_requetes_egales_calcul_direct(n):
+    # Toutes les paires (i, j), tailles puissances de 2 ou non
+    dates, valeurs = _serie(n, n)
+    index = SeriesRangeIndex(dates, valeurs)
+    for i in range(n):
+        for j in range(i, n):
+            tranche = valeurs[i:j + 1]
+            assert index.range_max(i, j) == tranche.max()
+            assert index.range_min(i, j) == tranche.min()
+            assert index.performance(i, j) == pytest.approx(valeurs[j] / valeurs[i] - 1, rel=1e-12, abs=1e-14)
+            assert index.max_drawdown(i, j) == pytest.approx(_max_drawdown(tranche), rel=1e-12, abs=1e-14)
+
+
+def test_dates_non_triees():
+    dates, valeurs = _serie(0, 30)
+    ordre = np.random.default_rng(1).permutation(30)
+    index = SeriesRangeIndex(dates[ordre], valeurs[ordre])
+    assert index.dates.equals(dates)
+    np.testing.assert_array_equal(index.valeurs, valeurs)
+
+
+def test_query_egale_tranche_par_dates():
+    dates, valeurs = _serie(2, 60)
+    _, valeurs_bench = _serie(3, 60)
+    report = pd.DataFrame({"Date": dates, "Valeur Liquidative": valeurs})
+    # Benchmark décalé : certaines périodes n'ont pas de cotation du benchmark
+    benchmark = pd.DataFrame({"Date": dates[20:], "Prix": valeurs_bench[20:]})
+    index = PerformanceRangeIndex(report, benchmark)
+
+    for debut, fin in [("2024-01-01", "2024-03-31"), ("2024-01-06", "2024-01-20"), ("2024-02-10", "2024-02-12"),
+                       ("2024-02-15", "2024-02-15"), ("2024-03-30", "2024-04-30")]:
+        dans = (dates >= pd.Timestamp(debut)) & (dates <= pd.Timestamp(fin))
+        resultat = index.query(debut, fin)
+        if not dans.any():
+            assert resultat is None
+            continue
+        tranche = valeurs[dans]
+        assert resultat["Debut"] == dates[dans][0] and resultat["Fin"] == dates[dans][-1]
+        assert resultat["Nb_Jours"] == dans.sum()
+        assert resultat["Perf_Ptf"] == pytest.approx(tranche[-1] / tranche[0] - 1)
+        assert resultat["Max_Drawdown"] == pytest.approx(_max_drawdown(tranche))
+        dans_bench = dans[20:]
+        if dans_bench.any():
+            tranche_bench = valeurs_bench[20:][dans_bench]
+            assert resultat["Perf_Bench"] == pytest.approx(tranche_bench[-1] / tranche_bench[0] - 1)
+            assert resultat["Max_Drawdown_Bench"] == pytest.approx(_max_drawdown(tranche_bench))
+        else:
+            assert np.isnan(resultat["Perf_Bench"]) and np.isnan(resultat["Exces"])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import risk
+from src.results import get_portfolio_results
+from src.risk import compute_var, simulate_returns
+from tests.test_compute_engine import _synthetique
+
+
+@pytest.fixture
+def pool_force(monkeypatch):
+    # Pool dès quelques milliers de chemins ; compte les pools réellement créés
+    pools = []
+
+    class PoolCompte(risk.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(risk, "SEUIL_POOL", 1_000)
+    monkeypatch.setattr(risk, "ProcessPoolExecutor", PoolCompte)
+    return pools
+
+
+def test_pool_egal_serie(pool_force):
+    rng = np.random.default_rng(0)
+    rendements = rng.normal(0, 0.01, (250, 6))
+    poids = rng.uniform(-0.2, 0.4, 6)
+    serie = simulate_returns(rendements, poids, 10, nb_chemins=4_000, taille_lot=1_000, max_workers=1)
+    assert not pool_force
+    parallele = simulate_returns(rendements, poids, 10, nb_chemins=4_000, taille_lot=1_000, max_workers=2)
+    assert len(pool_force) == 1
+    np.testing.assert_array_equal(parallele, serie)
+
+
+def test_meme_graine_meme_var(pool_force, monkeypatch, tmp_path):
+    # Chaîne complète (résultats partagés -> exposition -> bootstrap), checkpoint dans un dossier temporaire ;
+    # 12 000 chemins = plusieurs lots de TAILLE_LOT, répartis sur le pool
+    monkeypatch.chdir(tmp_path)
+    transactions, prices, jours_marche = _synthetique(0)
+    transactions["GICS Class"] = "Industrials"
+    benchmark = pd.DataFrame({"Date": jours_marche["Date"],
+                              "Prix": 100 * np.cumprod(1 + np.full(len(jours_marche), 0.001))})
+    data = {"transactions": transactions, "prices": prices, "benchmark": benchmark,
+            "jours_marche": jours_marche, "version": "test-risk"}
+    results = get_portfolio_results(data)
+
+    def var(graine, max_workers):
+        risk.clear_var()
+        return compute_var(results, methode="bootstrap", nb_chemins=12_000, graine=graine, max_workers=max_workers)
+
+    reference = var(7, 1)
+    assert not pool_force
+    assert var(7, 2) == reference
+    assert len(pool_force) == len(risk.HORIZONS)
+    assert var(7, 1) == reference
+    assert var(8, 1) != reference
+    risk.clear_var()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rolling import compute_rolling_metrics
+from src.utils import compute_kpi_table
+
+
+def test_sharpe_roulant_meme_convention_que_les_kpis():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=120)
+    vl = 100_000 * np.cumprod(1 + rng.normal(0.0005, 0.01, len(dates)))
+    prix = 8000 * np.cumprod(1 + rng.normal(0.0003, 0.012, len(dates)))
+    report = pd.DataFrame({"Date": dates, "Valeur Liquidative": vl})
+    benchmark = pd.DataFrame({"Date": dates, "Prix": prix})
+    rendements = pd.DataFrame({
+        "Date": dates,
+        "Rendement_Ptf": report["Valeur Liquidative"].pct_change(),
+        "Rendement_Benchmark": benchmark["Prix"].pct_change(),
+    }).dropna()
+
+    # Fenêtre roulante de 20 jours au dernier jour de mars = rendements du mois de mars
+    kpis = compute_kpi_table(report, benchmark)
+    mars = rendements[rendements["Date"].dt.strftime("%Y-%m") == "2024-03"]
+    roulant = compute_rolling_metrics(rendements, fenetres=(len(mars),))
+    sharpe = roulant.loc[roulant["Date"] == mars["Date"].iloc[-1], "Sharpe"].iloc[0]
+    assert sharpe == pytest.approx(kpis.loc["2024-03", "Sharpe"])
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import sqlite_store
+from src.data_loader import load_data as load_workbook
+from src.price_store import as_price_store
+from tests.test_compute_engine import DATA_PATH, _synthetique
+
+
+def _transactions(seed):
+    # Colonnes du classeur, Frais entiers comme dans data.xlsx
+    transactions, prices, jours_marche = _synthetique(seed, nb_transactions=80)
+    transactions = transactions.assign(Frais=transactions["Frais"].astype("int64"), Nom="Société",
+                                       ISIN="FR0000000000", **{"GICS Class": "Industrials"}, Devise="EUR")
+    transactions["Montant total"] = transactions["Nb actions"] * transactions["Prix local unitaire"]
+    transactions["Ticker"] = transactions["Ticker"].astype("category")
+    return transactions[sqlite_store.COLONNES_TRANSACTIONS], prices, jours_marche
+
+
+def _comparer_prix(obtenus, attendus):
+    obtenus, attendus = as_price_store(obtenus), as_price_store(attendus)
+    assert obtenus.dates.equals(attendus.dates)
+    assert list(obtenus.tickers) == list(attendus.tickers)
+    np.testing.assert_array_equal(obtenus.values, attendus.values)
+
+
+def _aller_retour(db_path, transactions, prices, jours_marche):
+    benchmark = pd.DataFrame({"Date": jours_marche["Date"], "Prix": np.linspace(100.0, 120.0, len(jours_marche))})
+    sqlite_store.upsert(db_path, transactions, prices, benchmark, jours_marche, remplacer=True)
+    data = sqlite_store.load_data(db_path)
+    pd.testing.assert_frame_equal(data["transactions"], transactions.reset_index(drop=True), check_categorical=False)
+    pd.testing.assert_frame_equal(data["benchmark"], benchmark.reset_index(drop=True))
+    pd.testing.assert_frame_equal(data["jours_marche"], jours_marche.reset_index(drop=True))
+    return data
+
+
+def test_aller_retour_conserve_les_types(tmp_path):
+    transactions, prices, jours_marche = _transactions(0)
+    data = _aller_retour(str(tmp_path / "base.sqlite"), transactions, prices, jours_marche)
+    assert data["transactions"]["Frais"].dtype == np.int64
+    # Le format long des prix est réécrit en matrice : mêmes valeurs, NaN compris, sur les jours de marché
+    attendus = as_price_store(prices)
+    lus = as_price_store(data["prices"])
+    np.testing.assert_array_equal(lus.reindex(lus.dates, attendus.tickers),
+                                  attendus.reindex(lus.dates, attendus.tickers))
+
+
+def test_frais_flottants_et_manquants(tmp_path):
+    db_path = str(tmp_path / "base.sqlite")
+    transactions, prices, jours_marche = _transactions(1)
+    transactions = transactions.assign(Frais=transactions["Frais"] + 0.5)
+    _aller_retour(db_path, transactions, prices, jours_marche)
+    # Nb actions manquant : la colonne entière se relit en flottants plutôt que d'échouer
+    transactions = transactions.assign(**{"Nb actions": transactions["Nb actions"].astype(float)})
+    transactions.loc[transactions.index[0], "Nb actions"] = np.nan
+    sqlite_store.upsert(db_path, transactions, remplacer=True)
+    assert sqlite_store.read_transactions(db_path)["Nb actions"].isna().sum() == 1
+
+
+def test_lectures_sans_ticker(tmp_path):
+    db_path = str(tmp_path / "base.sqlite")
+    transactions, prices, jours_marche = _transactions(2)
+    _aller_retour(db_path, transactions, prices, jours_marche)
+    prix = sqlite_store.read_prices(db_path, tickers=[])
+    assert prix.values.shape == (len(jours_marche), 0)
+    assert prix.dates.equals(pd.DatetimeIndex(jours_marche["Date"]))
+    assert sqlite_store.read_prices(db_path, tickers=["INCONNU"]).values.shape == (len(jours_marche), 0)
+    vides = sqlite_store.read_transactions(db_path, tickers=[])
+    assert vides.empty and list(vides.columns) == sqlite_store.COLONNES_TRANSACTIONS
+    assert vides["Frais"].dtype == np.int64
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="classeur de données absent")
+def test_aller_retour_classeur(tmp_path):
+    data = load_workbook(DATA_PATH, cache_dir=str(tmp_path / "cache"))
+    db_path = str(tmp_path / "base.sqlite")
+    sqlite_store.upsert(db_path, data["transactions"], data["prices"], data["benchmark"], data["jours_marche"],
+                        remplacer=True)
+    relu = sqlite_store.load_data(db_path)
+    pd.testing.assert_frame_equal(relu["transactions"], data["transactions"].reset_index(drop=True),
+                                  check_categorical=False)
+    pd.testing.assert_frame_equal(relu["benchmark"], data["benchmark"].reset_index(drop=True))
+    pd.testing.assert_frame_equal(relu["jours_marche"], data["jours_marche"].reset_index(drop=True))
+    _comparer_prix(relu["prices"], data["prices"])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import FENETRE_CREATION, FENETRE_YTD, JOURS_PAR_AN, compute_kpi_table
+
+
+def _series(seed=0, nb_jours=400):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-16", periods=nb_jours)
+    vl = 100_000 * np.cumprod(1 + rng.normal(0.0005, 0.01, nb_jours))
+    prix = 8000 * np.cumprod(1 + rng.normal(0.0003, 0.012, nb_jours))
+    return pd.DataFrame({"Date": dates, "Valeur Liquidative": vl}), pd.DataFrame({"Date": dates, "Prix": prix})
+
+
+def test_fenetres_depuis_cloture_precedente():
+    report, benchmark = _series()
+    table = compute_kpi_table(report, benchmark, capital_initial=100_000)
+    vl = report.set_index("Date")["Valeur Liquidative"]
+    prix = benchmark.set_index("Date")["Prix"]
+
+    # Année et YTD : depuis la dernière clôture de l'année précédente
+    fin_2024 = vl[:"2024-12-31"].iloc[-1]
+    assert table.loc["2025", "Perf_Ptf"] == pytest.approx(vl.iloc[-1] / fin_2024 - 1)
+    assert table.loc[FENETRE_YTD, "Perf_Bench"] == pytest.approx(prix.iloc[-1] / prix[:"2024-12-31"].iloc[-1] - 1)
+    # Mois : depuis la clôture du mois précédent
+    assert table.loc["2024-03", "Perf_Ptf"] == pytest.approx(vl[:"2024-03-31"].iloc[-1] / vl[:"2024-02-29"].iloc[-1] - 1)
+    # Première année : depuis le capital initial ; création : depuis le premier niveau
+    assert table.loc["2024", "Perf_Ptf"] == pytest.approx(fin_2024 / 100_000 - 1)
+    assert table.loc[FENETRE_CREATION, "Perf_Ptf"] == pytest.approx(vl.iloc[-1] / vl.iloc[0] - 1)
+
+
+def test_ratios_annualises_arithmetiquement():
+    report, benchmark = _series(1)
+    table = compute_kpi_table(report, benchmark, rf_annuel=0.02)
+    x = report.set_index("Date")["Valeur Liquidative"].pct_change()
+    mois = x["2024-02"]
+    sharpe = (mois.mean() * JOURS_PAR_AN - 0.02) / (mois.std() * np.sqrt(JOURS_PAR_AN))
+    assert table.loc["2024-02", "Sharpe"] == pytest.approx(sharpe)
+    # Pas de composition sur moins d'un an
+    assert np.isnan(table.loc["2024-02", "Perf_Annualisee"])